@@ -1,9 +1,26 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 import requests
 import jwt
 from functools import wraps
 import logging
 from datetime import datetime
+import os
+import sys
+import time
+
+# Добавляем корень проекта для общих модулей (shared)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from upstream import UpstreamPool, filter_headers
+from token_cache import TokenCache, RevocationList
+from health import HealthMonitor
+from circuit import UpstreamGuard, CircuitOpenError, BulkheadFullError
+from singleflight import SingleFlight
+from shared.metrics import Metrics, init_app as init_metrics
+from shared.internal_auth import internal_headers
+from shared.tracing import (
+    TRACEPARENT_HEADER, Tracer, init_app as init_tracing, current_trace, span
+)
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -12,48 +29,162 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 
-# Конфигурация сервисов
+# Трассировка начинается здесь и передается сервисам заголовком traceparent
+tracer = Tracer.from_env('api-gateway', timing_name='gateway')
+init_tracing(app, tracer)
+
+# Метрики запросов и вызовов сервисов в формате Prometheus на /metrics
+metrics = Metrics()
+init_metrics(app, metrics)
+metrics.describe('gateway_upstream_requests_total', 'counter', 'Запросы к сервисам')
+metrics.describe('gateway_upstream_duration_seconds', 'histogram', 'Время ответа сервиса')
+
+# Конфигурация сервисов (адреса основных сервисов можно переопределить,
+# например, для запуска без Docker в tests/load/bench.py)
 SERVICES = {
-    'auth': 'http://auth-service:5001',
-    'users': 'http://user-service:5002',
-    'tenders': 'http://tender-service:5003',
+    'auth': os.environ.get('AUTH_SERVICE_URL', 'http://auth-service:5001'),
+    'users': os.environ.get('USER_SERVICE_URL', 'http://user-service:5002'),
+    'tenders': os.environ.get('TENDER_SERVICE_URL', 'http://tender-service:5003'),
     'documents': 'http://document-service:5004',
     'notifications': 'http://notification-service:5005',
     'analytics': 'http://analytics-service:5006'
 }
 
+# Таймауты (подключение, чтение) в секундах для каждого сервиса
+SERVICE_TIMEOUTS = {
+    'auth': (2, 10),
+    'users': (2, 10),
+    'tenders': (2, 30),
+    'documents': (2, 60),
+    'notifications': (2, 10),
+    'analytics': (2, 30)
+}
+
+# Постоянные сессии с пулами keep-alive соединений к сервисам
+UPSTREAMS = {
+    name: UpstreamPool.from_env(name, url, *SERVICE_TIMEOUTS.get(name, (2, 30)))
+    for name, url in SERVICES.items()
+}
+
+# Выключатели, адаптивные таймауты и лимиты одновременных запросов
+GUARDS = {
+    name: UpstreamGuard.from_env(name, upstream.timeout[1], upstream.pool_maxsize)
+    for name, upstream in UPSTREAMS.items()
+}
+
+# Объединение одинаковых одновременных GET публичных маршрутов;
+# в асинхронном режиме asgi.py добавляет сюда свой экземпляр
+request_coalescer = SingleFlight()
+COALESCERS = {'wsgi': request_coalescer}
+
+# Таймауты чтения (сек) для длительных маршрутов: путь в сервисе -> таймаут
+LONG_REQUEST_TIMEOUTS = {
+    'tenders/import': float(os.environ.get('GATEWAY_IMPORT_TIMEOUT', 600)),
+    'tenders/export': float(os.environ.get('GATEWAY_EXPORT_TIMEOUT', 300)),
+    'tenders/applications/export': float(os.environ.get('GATEWAY_EXPORT_TIMEOUT', 300)),
+    # Полный пересчет статистики - INSERT ... SELECT по всем тендерам и заявкам
+    'tenders/stats/rebuild': float(os.environ.get('GATEWAY_STATS_REBUILD_TIMEOUT', 600))
+}
+
+# Размер фрагмента при потоковой передаче ответа
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Пути health-check сервисов (у остальных - /health)
+HEALTH_PATHS = {
+    'auth': 'auth/health',
+    'users': 'users/health',
+    'tenders': 'tenders/health'
+}
+
+HEALTH_DEADLINE = float(os.environ.get('GATEWAY_HEALTH_DEADLINE', 2))
+
+def make_health_probe(service_name):
+    upstream = UPSTREAMS[service_name]
+    path = HEALTH_PATHS.get(service_name, 'health')
+    
+    def probe():
+        # Одна попытка, каждый таймаут не больше дедлайна опроса
+        return upstream.probe(
+            path, timeout=(min(upstream.timeout[0], HEALTH_DEADLINE), HEALTH_DEADLINE)
+        ).status_code
+    return probe
+
+# Снимок состояния сервисов, обновляемый в фоне
+health_monitor = HealthMonitor(
+    {name: make_health_probe(name) for name in SERVICES},
+    interval=float(os.environ.get('GATEWAY_HEALTH_INTERVAL', 5)),
+    deadline=HEALTH_DEADLINE
+)
+health_monitor.start()
+
+def fetch_blocked_users():
+    response = UPSTREAMS['auth'].request('GET', 'auth/blocked', timeout=5, headers=internal_headers())
+    response.raise_for_status()
+    return response.json()['user_ids']
+
+# Кэш расшифрованных токенов и список заблокированных пользователей
+token_cache = TokenCache(
+    maxsize=int(os.environ.get('GATEWAY_TOKEN_CACHE_SIZE', 50000)),
+    ttl=float(os.environ.get('GATEWAY_TOKEN_CACHE_TTL', 3600))
+)
+revocation_list = RevocationList(
+    fetch_blocked_users,
+    refresh_interval=float(os.environ.get('GATEWAY_REVOCATION_REFRESH', 15))
+)
+revocation_list.start()
+
+def decode_token(auth_header):
+    """Проверка заголовка Authorization: возвращает (данные токена, ошибка)"""
+    if not auth_header:
+        return None, 'Токен отсутствует'
+    
+    try:
+        token = auth_header
+        # Извлекаем токен из формата "Bearer TOKEN"
+        if token.startswith('Bearer '):
+            token = token.split(' ')[1]
+        
+        # Декодируем токен, если его нет в кэше
+        data = token_cache.get(token)
+        if data is None:
+            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            token_cache.set(token, data)
+        
+    except jwt.ExpiredSignatureError:
+        return None, 'Срок действия токена истек'
+    except jwt.InvalidTokenError:
+        return None, 'Неверный токен'
+    except Exception as e:
+        logger.error(f"Ошибка проверки токена: {str(e)}")
+        return None, 'Ошибка аутентификации'
+    
+    if 'user_id' not in data or 'role' not in data:
+        logger.error("Ошибка проверки токена: нет user_id или role")
+        return None, 'Ошибка аутентификации'
+    
+    if revocation_list.is_blocked(data['user_id']):
+        return None, 'Учетная запись заблокирована'
+    
+    return data, None
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
+        data, error = decode_token(request.headers.get('Authorization'))
         
-        if not token:
-            return jsonify({'error': 'Токен отсутствует'}), 401
+        if error:
+            return jsonify({'error': error}), 401
         
-        try:
-            # Извлекаем токен из формата "Bearer TOKEN"
-            if token.startswith('Bearer '):
-                token = token.split(' ')[1]
-            
-            # Декодируем токен
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            request.user_id = data['user_id']
-            request.user_role = data['role']
-            
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Срок действия токена истек'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Неверный токен'}), 401
-        except Exception as e:
-            logger.error(f"Ошибка проверки токена: {str(e)}")
-            return jsonify({'error': 'Ошибка аутентификации'}), 401
+        request.user_id = data['user_id']
+        request.user_role = data['role']
         
         return f(*args, **kwargs)
     return decorated
 
 @app.before_request
 def log_request_info():
-    logger.info(f'{datetime.now()} - {request.method} {request.path}')
+    trace = current_trace()
+    logger.info(f'{datetime.now()} - {request.method} {request.path} trace={trace.trace_id if trace else "-"}')
 
 # Публичные маршруты (не требуют аутентификации)
 @app.route('/api/auth/register', methods=['POST'])
@@ -70,11 +201,15 @@ def verify():
 
 @app.route('/api/tenders', methods=['GET'])
 def get_public_tenders():
-    return proxy_to_service('tenders', 'tenders')
+    return proxy_to_service('tenders', 'tenders', coalesce=True)
+
+@app.route('/api/tenders/batch', methods=['GET'])
+def get_tenders_batch():
+    return proxy_to_service('tenders', 'tenders/batch', coalesce=True)
 
 @app.route('/api/tenders/<int:tender_id>', methods=['GET'])
 def get_tender_detail(tender_id):
-    return proxy_to_service('tenders', f'tenders/{tender_id}')
+    return proxy_to_service('tenders', f'tenders/{tender_id}', coalesce=True)
 
 # Защищенные маршруты (требуют аутентификации)
 @app.route('/api/users/profile', methods=['GET'])
@@ -97,46 +232,147 @@ def get_users_list():
 def create_tender():
     return proxy_to_service('tenders', 'tenders')
 
+@app.route('/api/tenders/import', methods=['POST'])
+@token_required
+def import_tenders():
+    return proxy_to_service('tenders', 'tenders/import', stream_body=True)
+
+@app.route('/api/tenders/export', methods=['GET'])
+@token_required
+def export_tenders():
+    return proxy_to_service('tenders', 'tenders/export', stream_response=True)
+
+@app.route('/api/tenders/applications/export', methods=['GET'])
+@token_required
+def export_applications():
+    return proxy_to_service('tenders', 'tenders/applications/export', stream_response=True)
+
+@app.route('/api/tenders/stats', methods=['GET'])
+@token_required
+def get_tender_stats():
+    return proxy_to_service('tenders', 'tenders/stats')
+
+@app.route('/api/tenders/stats/rebuild', methods=['POST'])
+@token_required
+def rebuild_tender_stats():
+    return proxy_to_service('tenders', 'tenders/stats/rebuild')
+
 @app.route('/api/tenders/<int:tender_id>/applications', methods=['POST'])
 @token_required
 def create_application(tender_id):
     return proxy_to_service('tenders', f'tenders/{tender_id}/applications')
 
-def proxy_to_service(service_name, path):
+def call_upstream(service_name, path, headers, stream_body=False, stream_response=False):
+    """Запрос к сервису через выключатель; ошибки requests пробрасываются"""
+    upstream = UPSTREAMS[service_name]
+    guard = GUARDS[service_name]
+    probe = guard.acquire()
+    
+    # Длительные маршруты не ограничиваются адаптивным таймаутом
+    read_timeout = LONG_REQUEST_TIMEOUTS.get(path) or guard.read_timeout()
+    
+    started = time.monotonic()
+    ok = False
+    status = 'error'
+    try:
+        with span(f'upstream {service_name}', 'upstream', path=path):
+            # Родитель спанов сервиса - спан этого вызова
+            trace = current_trace()
+            if trace is not None:
+                headers[TRACEPARENT_HEADER] = trace.traceparent()
+            response = upstream.request(
+                request.method,
+                path,
+                timeout=(upstream.timeout[0], read_timeout),
+                headers=headers,
+                # Большое тело передается потоком, без чтения в память
+                data=request.stream if stream_body else request.get_data(),
+                params=request.args,
+                cookies=request.cookies,
+                stream=stream_response
+            )
+        ok = response.status_code < 500
+        status = str(response.status_code)
+        return response
+    finally:
+        elapsed = time.monotonic() - started
+        guard.release(ok, elapsed, probe)
+        metrics.inc('gateway_upstream_requests_total', (('service', service_name), ('status', status)))
+        metrics.observe('gateway_upstream_duration_seconds', elapsed, (('service', service_name),))
+
+def coalescing_key(service_name, path):
+    """Ключ объединения: все, от чего зависит ответ публичного GET"""
+    return (
+        service_name,
+        path,
+        tuple(sorted(request.args.items(multi=True))),
+        getattr(request, 'user_role', None),
+        request.headers.get('If-None-Match')
+    )
+
+def proxy_to_service(service_name, path, coalesce=False, stream_body=False, stream_response=False):
+    """Проксирование запроса.
+    
+    coalesce=True - объединять одинаковые GET,
+    stream_body=True - передавать тело запроса потоком,
+    stream_response=True - передавать тело ответа потоком, без распаковки.
+    """
     if service_name not in SERVICES:
         return jsonify({'error': 'Сервис не найден'}), 404
     
-    service_url = f"{SERVICES[service_name]}/{path}"
+    # Сервис недоступен по последнему опросу - не ждем таймаута подключения
+    if health_monitor.is_down(service_name):
+        response = jsonify({'error': 'Сервис недоступен'})
+        response.headers['Retry-After'] = str(max(int(health_monitor.interval), 1))
+        return response, 503
     
     try:
         # Проксирование запроса к соответствующему сервису
-        headers = {
-            key: value for key, value in request.headers 
-            if key.lower() not in ['host', 'content-length']
-        }
+        # traceparent заменяется в call_upstream контекстом трассировки gateway
+        headers = filter_headers(request.headers, exclude=('host', 'content-length', TRACEPARENT_HEADER))
         
         # Добавляем информацию о пользователе в заголовки для защищенных маршрутов
         if hasattr(request, 'user_id'):
             headers['X-User-ID'] = str(request.user_id)
             headers['X-User-Role'] = request.user_role
         
-        response = requests.request(
-            method=request.method,
-            url=service_url,
-            headers=headers,
-            data=request.get_data(),
-            params=request.args,
-            cookies=request.cookies,
-            allow_redirects=False,
-            timeout=30
-        )
+        if coalesce and request.method == 'GET' and not request.content_length:
+            # Одинаковые одновременные запросы получают один ответ сервиса
+            response = request_coalescer.do(
+                coalescing_key(service_name, path),
+                lambda: call_upstream(service_name, path, headers)
+            )
+        elif stream_response:
+            # Сжатие - только если его запросил клиент: тело не распаковывается
+            headers.setdefault('Accept-Encoding', 'identity')
+            response = call_upstream(service_name, path, headers, stream_body, stream_response=True)
+        else:
+            response = call_upstream(service_name, path, headers, stream_body)
         
         # Логируем ответ
         logger.info(f'Response from {service_name}: {response.status_code}')
         
-        # Возвращаем ответ от сервиса
-        return (response.content, response.status_code, dict(response.headers))
+        if stream_response:
+            proxied = Response(
+                response.raw.stream(STREAM_CHUNK_SIZE, decode_content=False),
+                response.status_code,
+                filter_headers(response.headers.items(), exclude=('content-length',))
+            )
+            proxied.call_on_close(response.close)
+            return proxied
+        
+        # Возвращаем ответ от сервиса; тело уже распаковано requests,
+        # поэтому Content-Encoding и Content-Length не передаем
+        response_headers = filter_headers(
+            response.headers.items(), exclude=('content-encoding', 'content-length')
+        )
+        return (response.content, response.status_code, response_headers)
     
+    except (CircuitOpenError, BulkheadFullError) as e:
+        logger.warning(f"Запрос к {service_name} отклонен: {type(e).__name__}")
+        response = jsonify({'error': 'Сервис временно недоступен'})
+        response.headers['Retry-After'] = str(GUARDS[service_name].retry_after())
+        return response, 503
     except requests.exceptions.Timeout:
         return jsonify({'error': 'Таймаут запроса к сервису'}), 504
     except requests.exceptions.ConnectionError:
@@ -148,21 +384,72 @@ def proxy_to_service(service_name, path):
 # Health check endpoints
 @app.route('/health')
 def health_check():
-    health_status = {}
-    
-    for service_name, service_url in SERVICES.items():
-        try:
-            response = requests.get(f"{service_url}/health", timeout=5)
-            health_status[service_name] = 'healthy' if response.status_code == 200 else 'unhealthy'
-        except:
-            health_status[service_name] = 'unreachable'
+    snapshot = health_monitor.snapshot()
     
     return jsonify({
         'status': 'running',
         'timestamp': datetime.now().isoformat(),
-        'services': health_status
+        'services': {name: state['status'] for name, state in snapshot.items()},
+        'details': snapshot,
+        'monitor': health_monitor.stats()
     })
 
+@app.route('/health/upstreams')
+def upstreams_stats():
+    return jsonify({
+        name: upstream.stats() for name, upstream in UPSTREAMS.items()
+    })
+
+@app.route('/health/tokens')
+def tokens_stats():
+    return jsonify({
+        'token_cache': token_cache.stats(),
+        'revocation_list': revocation_list.stats()
+    })
+
+@app.route('/health/tracing')
+def tracing_stats():
+    return jsonify(tracer.stats())
+
+@app.route('/health/coalescing')
+def coalescing_stats():
+    return jsonify({mode: coalescer.stats() for mode, coalescer in COALESCERS.items()})
+
+@app.route('/api/admin/circuits', methods=['GET'])
+@token_required
+def circuits_state():
+    if request.user_role != 'admin':
+        return jsonify({'error': 'Недостаточно прав'}), 403
+    
+    return jsonify({name: guard.stats() for name, guard in GUARDS.items()})
+
+@app.route('/api/admin/circuits/<service_name>/reset', methods=['POST'])
+@token_required
+def reset_circuit(service_name):
+    if request.user_role != 'admin':
+        return jsonify({'error': 'Недостаточно прав'}), 403
+    
+    if service_name not in GUARDS:
+        return jsonify({'error': 'Сервис не найден'}), 404
+    
+    GUARDS[service_name].reset()
+    logger.info(f"Выключатель {service_name} сброшен администратором {request.user_id}")
+    return jsonify({'message': 'Выключатель сброшен', 'state': GUARDS[service_name].stats()})
+
+# Сервисы с журналом медленных запросов (shared/slow_queries.py)
+SLOW_QUERY_SERVICES = ('auth', 'users', 'tenders')
+
+@app.route('/api/admin/slow-queries/<service_name>', methods=['GET', 'DELETE'])
+@token_required
+def slow_queries(service_name):
+    if request.user_role != 'admin':
+        return jsonify({'error': 'Недостаточно прав'}), 403
+    
+    if service_name not in SLOW_QUERY_SERVICES:
+        return jsonify({'error': 'Сервис не найден'}), 404
+    
+    return proxy_to_service(service_name, f'{service_name}/slow-queries')
+
 @app.route('/')
 def api_home():
     return jsonify({
@@ -177,13 +464,24 @@ def api_home():
             'tenders': {
                 'GET /api/tenders': 'Получить список тендеров',
                 'GET /api/tenders/{id}': 'Получить детали тендера',
+                'GET /api/tenders/batch?ids=1,2,3': 'Получить детали нескольких тендеров',
                 'POST /api/tenders': 'Создать тендер (требует аутентификации)',
-                'POST /api/tenders/{id}/applications': 'Подать заявку (требует аутентификации)'
+                'POST /api/tenders/{id}/applications': 'Подать заявку (требует аутентификации)',
+                'POST /api/tenders/import': 'Импорт тендеров из NDJSON (admin/manager)',
+                'GET /api/tenders/export?format=ndjson|csv': 'Выгрузка тендеров (требует аутентификации)',
+                'GET /api/tenders/applications/export': 'Выгрузка заявок (admin/manager)'
             },
             'users': {
                 'GET /api/users/profile': 'Получить профиль (требует аутентификации)',
                 'PUT /api/users/profile': 'Обновить профиль (требует аутентификации)',
                 'GET /api/users/list': 'Список пользователей (только для admin/manager)'
+            },
+            'admin': {
+                'GET /api/admin/circuits': 'Состояние выключателей сервисов (только для admin)',
+                'POST /api/admin/circuits/{service}/reset': 'Сбросить выключатель (только для admin)',
+                'GET /api/admin/slow-queries/{service}?limit=&sort=total|max|avg|calls':
+                    'SQL-запросы сервиса по суммарному времени, EXPLAIN медленных (только для admin)',
+                'DELETE /api/admin/slow-queries/{service}': 'Очистить статистику SQL-запросов (только для admin)'
             }
         }
     })
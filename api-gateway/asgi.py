@@ -0,0 +1,403 @@
+"""
+Асинхронный (ASGI) режим API Gateway.
+
+Проксируемые маршруты (/api/auth/*, /api/tenders*, /api/users/*)
+обслуживаются в asyncio: тела запроса и ответа передаются по частям,
+не буферизуясь целиком в памяти, а медленный сервис не занимает
+рабочий поток. Остальные маршруты (/, /health и т.д.) обрабатывает
+исходное Flask-приложение через адаптер WSGI -> ASGI.
+
+Запуск:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+
+from app import (
+    app as flask_app, SERVICES, UPSTREAMS, GUARDS, COALESCERS, LONG_REQUEST_TIMEOUTS,
+    decode_token, health_monitor, tracer, metrics
+)
+from circuit import UpstreamGuard, CircuitOpenError, BulkheadFullError
+from singleflight import AsyncSingleFlight
+from upstream import HOP_BY_HOP_HEADERS
+from shared.tracing import TRACEPARENT_HEADER, format_traceparent, new_span_id
+
+logger = logging.getLogger(__name__)
+
+# (метод, путь, сервис, путь в сервисе, требуется ли токен) - как в app.py
+ROUTES = [
+    ('POST', r'/api/auth/register', 'auth', 'auth/register', False),
+    ('POST', r'/api/auth/login', 'auth', 'auth/login', False),
+    ('POST', r'/api/auth/verify', 'auth', 'auth/verify', False),
+    ('GET', r'/api/tenders', 'tenders', 'tenders', False),
+    ('GET', r'/api/tenders/batch', 'tenders', 'tenders/batch', False),
+    ('GET', r'/api/tenders/export', 'tenders', 'tenders/export', True),
+    ('GET', r'/api/tenders/applications/export', 'tenders', 'tenders/applications/export', True),
+    ('GET', r'/api/tenders/stats', 'tenders', 'tenders/stats', True),
+    ('GET', r'/api/tenders/(?P<tender_id>\d+)', 'tenders', 'tenders/{tender_id}', False),
+    ('GET', r'/api/users/profile', 'users', 'users/profile', True),
+    ('PUT', r'/api/users/profile', 'users', 'users/profile', True),
+    ('GET', r'/api/users/list', 'users', 'users/list', True),
+    ('POST', r'/api/tenders', 'tenders', 'tenders', True),
+    ('POST', r'/api/tenders/import', 'tenders', 'tenders/import', True),
+    ('POST', r'/api/tenders/stats/rebuild', 'tenders', 'tenders/stats/rebuild', True),
+    ('POST', r'/api/tenders/(?P<tender_id>\d+)/applications', 'tenders',
+     'tenders/{tender_id}/applications', True),
+]
+
+# Шаблон маршрута для меток метрик: /api/tenders/<tender_id>
+COMPILED_ROUTES = [
+    (method, re.compile(pattern + r'/?$'), re.sub(r'\(\?P<(\w+)>[^)]*\)', r'<\1>', pattern),
+     service, target, auth)
+    for method, pattern, service, target, auth in ROUTES
+]
+
+# Максимум одновременных соединений к одному сервису в асинхронном режиме
+ASYNC_POOL_MAXSIZE = int(os.environ.get('ASYNC_UPSTREAM_POOL_MAXSIZE', 200))
+
+# В асинхронном режиме лимит одновременных запросов - по размеру
+# асинхронного пула; GUARDS заменяются, чтобы /api/admin/circuits
+# показывал состояние именно этих выключателей
+GUARDS.update({
+    name: UpstreamGuard.from_env(name, upstream.timeout[1], ASYNC_POOL_MAXSIZE)
+    for name, upstream in UPSTREAMS.items()
+})
+
+
+def match_route(method, path):
+    """(шаблон маршрута, сервис, путь в сервисе, требуется ли токен) или None"""
+    for route_method, pattern, rule, service, target, auth in COMPILED_ROUTES:
+        if route_method != method:
+            continue
+        match = pattern.match(path)
+        if match:
+            return rule, service, target.format(**match.groupdict()), auth
+    return None
+
+
+async def send_json(send, status, payload, retry_after=None):
+    body = json.dumps(payload).encode('utf-8')
+    headers = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode('latin-1'))
+    ]
+    if retry_after is not None:
+        headers.append((b'retry-after', str(retry_after).encode('latin-1')))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def iter_request_body(receive):
+    """Тело запроса клиента по частям, без чтения целиком"""
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        chunk = message.get('body', b'')
+        if chunk:
+            yield chunk
+        if not message.get('more_body', False):
+            return
+
+
+def response_headers_with_trace(raw_headers, trace):
+    """Заголовки ответа сервиса (без hop-by-hop) с Server-Timing gateway"""
+    headers = [
+        (key, value) for key, value in raw_headers
+        if key.decode('latin-1').lower() not in HOP_BY_HOP_HEADERS
+        and key.lower() != b'x-trace-id'
+    ]
+    headers.append((b'server-timing', trace.server_timing().encode('latin-1')))
+    headers.append((b'x-trace-id', trace.trace_id.encode('latin-1')))
+    return headers
+
+
+class UpstreamFailure(Exception):
+    """Сбой сервиса, учитываемый выключателем (ответ клиенту уже отправлен)"""
+
+
+class AsyncGateway:
+    """ASGI-приложение: потоковое проксирование с fallback на Flask"""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.clients = {}
+        self.coalescer = AsyncSingleFlight()
+        COALESCERS['asgi'] = self.coalescer
+
+    def client(self, service_name):
+        client = self.clients.get(service_name)
+        if client is None:
+            connect_timeout, read_timeout = UPSTREAMS[service_name].timeout
+            client = httpx.AsyncClient(
+                base_url=SERVICES[service_name],
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=ASYNC_POOL_MAXSIZE,
+                    max_keepalive_connections=ASYNC_POOL_MAXSIZE
+                ),
+                # Повтор только при ошибке подключения: запрос не был отправлен
+                transport=httpx.AsyncHTTPTransport(retries=2),
+                trust_env=False
+            )
+            self.clients[service_name] = client
+        return client
+
+    async def aclose(self):
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients.clear()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        if scope['type'] != 'http':
+            return
+
+        route = match_route(scope['method'], scope['path'])
+        if route is None:
+            await self.fallback(scope, receive, send)
+            return
+
+        traceparent = next(
+            (value.decode('latin-1') for key, value in scope['headers']
+             if key.lower() == TRACEPARENT_HEADER.encode('latin-1')),
+            None
+        )
+        rule, service_name, path, auth_required = route
+        trace = tracer.start(f"{scope['method']} {rule}", traceparent)
+        response_status = ['500']
+
+        async def send_observed(message):
+            if message['type'] == 'http.response.start':
+                response_status[0] = str(message['status'])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.proxy(scope, receive, send_observed, trace, service_name, path, auth_required)
+        finally:
+            trace.finish()
+            metrics.inc('http_requests_total', (
+                ('route', rule), ('method', scope['method']), ('status', response_status[0])
+            ))
+            metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                            (('route', rule), ('method', scope['method'])))
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def proxy(self, scope, receive, send, trace, service_name, path, auth_required):
+        logger.info(f"{datetime.now()} - {scope['method']} {scope['path']} trace={trace.trace_id}")
+
+        headers = {}
+        for key, value in scope['headers']:
+            name = key.decode('latin-1').lower()
+            # traceparent заменяется контекстом трассировки gateway
+            if name in HOP_BY_HOP_HEADERS or name in ('host', TRACEPARENT_HEADER):
+                continue
+            headers[name] = value.decode('latin-1')
+
+        # Тело ответа не распаковывается: сжатие - только по запросу клиента
+        headers.setdefault('accept-encoding', 'identity')
+
+        if auth_required:
+            data, error = decode_token(headers.get('authorization'))
+            if error:
+                await send_json(send, 401, {'error': error})
+                return
+            headers['x-user-id'] = str(data['user_id'])
+            headers['x-user-role'] = data['role']
+
+        # Тело передается только если клиент его объявил
+        has_body = 'content-length' in headers or any(
+            key.lower() == b'transfer-encoding' for key, _ in scope['headers']
+        )
+
+        # Сервис недоступен по последнему опросу - отвечаем сразу
+        if health_monitor.is_down(service_name):
+            await send_json(send, 503, {'error': 'Сервис недоступен'},
+                            retry_after=max(int(health_monitor.interval), 1))
+            return
+
+        # Публичные GET без тела объединяются (single-flight)
+        if scope['method'] == 'GET' and not auth_required and not has_body:
+            await self.proxy_coalesced(scope, send, trace, service_name, path, headers)
+            return
+
+        guard = GUARDS[service_name]
+        try:
+            probe = guard.acquire()
+        except (CircuitOpenError, BulkheadFullError) as e:
+            logger.warning(f"Запрос к {service_name} отклонен: {type(e).__name__}")
+            await send_json(send, 503, {'error': 'Сервис временно недоступен'},
+                            retry_after=guard.retry_after())
+            return
+
+        started = time.monotonic()
+        ok = False
+        try:
+            await self.forward(
+                scope, receive, send, trace, service_name, path, headers, has_body, guard
+            )
+            ok = True
+        except UpstreamFailure:
+            pass
+        finally:
+            guard.release(ok, time.monotonic() - started, probe)
+
+    async def proxy_coalesced(self, scope, send, trace, service_name, path, headers):
+        """Один запрос к сервису на все одинаковые одновременные GET"""
+        query_string = scope.get('query_string', b'').decode('latin-1')
+        key = (service_name, path, query_string, headers.get('if-none-match'))
+
+        # Спаны сервиса попадут в трассировку запроса, выполнившего вызов
+        span_id = new_span_id()
+        headers[TRACEPARENT_HEADER] = format_traceparent(trace.trace_id, span_id, trace.sampled)
+        started = time.monotonic()
+        try:
+            status, response_headers, body = await self.coalescer.do(
+                key, lambda: self.fetch(service_name, path, query_string, headers)
+            )
+        except (CircuitOpenError, BulkheadFullError) as e:
+            logger.warning(f"Запрос к {service_name} отклонен: {type(e).__name__}")
+            await send_json(send, 503, {'error': 'Сервис временно недоступен'},
+                            retry_after=GUARDS[service_name].retry_after())
+            return
+        except httpx.TimeoutException:
+            await send_json(send, 504, {'error': 'Таймаут запроса к сервису'})
+            return
+        except httpx.TransportError:
+            await send_json(send, 503, {'error': 'Сервис недоступен'})
+            return
+        except Exception as e:
+            logger.error(f"Ошибка проксирования: {str(e)}")
+            await send_json(send, 500, {'error': 'Внутренняя ошибка сервера'})
+            return
+        finally:
+            trace.record(f'upstream {service_name}', 'upstream', time.monotonic() - started,
+                         {'path': path}, span_id=span_id)
+
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': response_headers_with_trace(response_headers, trace)
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def fetch(self, service_name, path, query_string, headers):
+        """Ответ сервиса целиком: (код, заголовки, тело без распаковки)"""
+        guard = GUARDS[service_name]
+        probe = guard.acquire()
+
+        started = time.monotonic()
+        ok = False
+        try:
+            client = self.client(service_name)
+            upstream_request = client.build_request(
+                'GET',
+                '/' + path,
+                params=query_string or None,
+                headers=headers,
+                timeout=httpx.Timeout(
+                    guard.read_timeout(), connect=UPSTREAMS[service_name].timeout[0]
+                )
+            )
+            response = await client.send(upstream_request, stream=True)
+            try:
+                body = b''.join([chunk async for chunk in response.aiter_raw()])
+            finally:
+                await response.aclose()
+
+            logger.info(f'Response from {service_name}: {response.status_code}')
+            ok = response.status_code < 500
+            response_headers = [
+                (key, value) for key, value in response.headers.raw
+                if key.decode('latin-1').lower() not in HOP_BY_HOP_HEADERS
+            ]
+            return response.status_code, response_headers, body
+        finally:
+            guard.release(ok, time.monotonic() - started, probe)
+
+    async def forward(self, scope, receive, send, trace, service_name, path, headers, has_body, guard):
+        """Передача запроса и ответа; UpstreamFailure - сбой сервиса"""
+        span_id = new_span_id()
+        headers[TRACEPARENT_HEADER] = format_traceparent(trace.trace_id, span_id, trace.sampled)
+        client = self.client(service_name)
+        connect_timeout = UPSTREAMS[service_name].timeout[0]
+        upstream_request = client.build_request(
+            scope['method'],
+            '/' + path,
+            params=scope.get('query_string', b'').decode('latin-1') or None,
+            headers=headers,
+            content=iter_request_body(receive) if has_body else None,
+            timeout=httpx.Timeout(
+                LONG_REQUEST_TIMEOUTS.get(path) or guard.read_timeout(), connect=connect_timeout
+            )
+        )
+
+        started = time.monotonic()
+        try:
+            response = await client.send(upstream_request, stream=True)
+        except httpx.TimeoutException:
+            await send_json(send, 504, {'error': 'Таймаут запроса к сервису'})
+            raise UpstreamFailure()
+        except httpx.TransportError:
+            await send_json(send, 503, {'error': 'Сервис недоступен'})
+            raise UpstreamFailure()
+        except Exception as e:
+            logger.error(f"Ошибка проксирования: {str(e)}")
+            await send_json(send, 500, {'error': 'Внутренняя ошибка сервера'})
+            raise UpstreamFailure()
+
+        logger.info(f'Response from {service_name}: {response.status_code}')
+        # Время до получения заголовков ответа: тело еще передается
+        trace.record(f'upstream {service_name}', 'upstream', time.monotonic() - started,
+                     {'path': path}, span_id=span_id)
+
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': response_headers_with_trace(response.headers.raw, trace)
+            })
+            # Тело передается как есть (без распаковки) по мере поступления
+            async for chunk in response.aiter_raw():
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        except Exception as e:
+            logger.error(f"Ошибка передачи ответа от {service_name}: {str(e)}")
+            raise UpstreamFailure()
+        finally:
+            await response.aclose()
+
+        if response.status_code >= 500:
+            raise UpstreamFailure()
+
+
+application = AsyncGateway(WsgiToAsgi(flask_app))
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(application, host='0.0.0.0', port=5000)
@@ -0,0 +1,259 @@
+"""
+Защита API Gateway от медленных и упавших сервисов.
+
+Для каждого сервиса работают:
+    - автоматический выключатель (closed / open / half_open) по доле
+      ошибок в скользящем окне: при превышении порога запросы к сервису
+      сразу отклоняются на open_seconds, затем пропускается пробный
+      запрос, и по его результату выключатель закрывается или снова
+      открывается;
+    - адаптивный таймаут чтения: p99 успешных ответов в окне, умноженный
+      на коэффициент, но не больше настроенного таймаута сервиса;
+    - ограничение одновременных запросов (bulkhead), чтобы один
+      медленный сервис не занял все рабочие потоки шлюза.
+
+Переменные окружения:
+    CIRCUIT_WINDOW, CIRCUIT_MIN_REQUESTS, CIRCUIT_ERROR_THRESHOLD,
+    CIRCUIT_OPEN_SECONDS, ADAPTIVE_TIMEOUT_FACTOR, ADAPTIVE_TIMEOUT_MIN,
+    UPSTREAM_<NAME>_MAX_CONCURRENT
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Выключатель сервиса разомкнут"""
+
+
+class BulkheadFullError(Exception):
+    """Достигнут лимит одновременных запросов к сервису"""
+
+
+class RollingWindow:
+    """Исходы и длительности запросов за последние window секунд.
+
+    Число запросов и ошибок ведется счетчиками при добавлении и вытеснении
+    событий; перцентиль пересчитывается не чаще раза в refresh секунд, а не
+    сортировкой всего окна на каждом запросе.
+    """
+
+    def __init__(self, window=30.0, maxlen=10000, refresh=1.0):
+        self.window = window
+        self.maxlen = maxlen
+        self.refresh = refresh
+        self._events = deque()
+        self._failures = 0
+        # Длительности только успешных запросов - для перцентиля
+        self._latencies = deque(maxlen=maxlen)
+        self._percentiles = {}
+        self._computed_at = None
+
+    def add(self, ok, latency):
+        now = time.monotonic()
+        if len(self._events) >= self.maxlen:
+            self._pop()
+        self._events.append((now, ok))
+        if ok:
+            self._latencies.append((now, latency))
+        else:
+            self._failures += 1
+
+    def _pop(self):
+        _, ok = self._events.popleft()
+        if not ok:
+            self._failures -= 1
+
+    def _trim(self):
+        border = time.monotonic() - self.window
+        while self._events and self._events[0][0] < border:
+            self._pop()
+        while self._latencies and self._latencies[0][0] < border:
+            self._latencies.popleft()
+
+    def counts(self):
+        """(всего запросов, из них ошибок)"""
+        self._trim()
+        return len(self._events), self._failures
+
+    def percentile(self, q, min_samples=50):
+        """Перцентиль длительности успешных запросов; None при малой выборке"""
+        self._trim()
+        if len(self._latencies) < min_samples:
+            return None
+        now = time.monotonic()
+        if self._computed_at is None or now - self._computed_at >= self.refresh:
+            self._percentiles = {}
+            self._computed_at = now
+        value = self._percentiles.get(q)
+        if value is None:
+            latencies = sorted(latency for _, latency in self._latencies)
+            index = min(len(latencies) - 1, max(0, math.ceil(q * len(latencies)) - 1))
+            value = self._percentiles[q] = latencies[index]
+        return value
+
+    def clear(self):
+        self._events.clear()
+        self._latencies.clear()
+        self._failures = 0
+        self._percentiles = {}
+        self._computed_at = None
+
+
+class UpstreamGuard:
+    """Выключатель, адаптивный таймаут и bulkhead для одного сервиса"""
+
+    def __init__(self, name, read_timeout=30.0, max_concurrent=20, window=30.0,
+                 min_requests=20, error_threshold=0.5, open_seconds=10.0,
+                 timeout_factor=3.0, min_timeout=1.0):
+        self.name = name
+        self.max_read_timeout = read_timeout
+        self.max_concurrent = max_concurrent
+        self.min_requests = min_requests
+        self.error_threshold = error_threshold
+        self.open_seconds = open_seconds
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+
+        self._window = RollingWindow(window)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+
+        self.state = CLOSED
+        self.opened_at = None
+        # Номер пробного запроса half_open, пока он выполняется
+        self._probe = None
+        self._probes = 0
+        self._in_flight = 0
+
+        self.rejected_open = 0
+        self.rejected_bulkhead = 0
+        self.trips = 0
+
+    @classmethod
+    def from_env(cls, name, read_timeout=30.0, max_concurrent=20):
+        env = os.environ.get
+        return cls(
+            name,
+            read_timeout=read_timeout,
+            max_concurrent=int(env(f'UPSTREAM_{name.upper()}_MAX_CONCURRENT', max_concurrent)),
+            window=float(env('CIRCUIT_WINDOW', 30)),
+            min_requests=int(env('CIRCUIT_MIN_REQUESTS', 20)),
+            error_threshold=float(env('CIRCUIT_ERROR_THRESHOLD', 0.5)),
+            open_seconds=float(env('CIRCUIT_OPEN_SECONDS', 10)),
+            timeout_factor=float(env('ADAPTIVE_TIMEOUT_FACTOR', 3)),
+            min_timeout=float(env('ADAPTIVE_TIMEOUT_MIN', 1))
+        )
+
+    def acquire(self):
+        """Разрешение на запрос; при отказе - CircuitOpenError/BulkheadFullError.
+
+        Возвращает номер пробного запроса (в half_open) или None; его
+        нужно передать в release().
+        """
+        probe = None
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self.rejected_open += 1
+                    raise CircuitOpenError(self.name)
+                self.state = HALF_OPEN
+
+            if self.state == HALF_OPEN:
+                # В полуоткрытом состоянии - только один пробный запрос
+                if self._probe is not None:
+                    self.rejected_open += 1
+                    raise CircuitOpenError(self.name)
+                self._probes += 1
+                probe = self._probe = self._probes
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if probe is not None and self._probe == probe:
+                    self._probe = None
+                self.rejected_bulkhead += 1
+            raise BulkheadFullError(self.name)
+
+        with self._lock:
+            self._in_flight += 1
+        return probe
+
+    def release(self, ok, latency, probe=None):
+        """Учет результата запроса, разрешенного acquire().
+
+        probe - значение, возвращенное acquire(). Состояние half_open
+        меняет только текущий пробный запрос: ответы запросов, начатых
+        до размыкания, попадают лишь в окно.
+        """
+        self._slots.release()
+        with self._lock:
+            self._in_flight -= 1
+
+            if probe is not None and probe == self._probe:
+                self._probe = None
+                if ok:
+                    self.state = CLOSED
+                    self._window.clear()
+                else:
+                    self._trip()
+                return
+
+            self._window.add(ok, latency)
+            if self.state == CLOSED:
+                total, failures = self._window.counts()
+                if total >= self.min_requests and failures / total >= self.error_threshold:
+                    self._trip()
+
+    def _trip(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+
+    def reset(self):
+        """Принудительное замыкание выключателя"""
+        with self._lock:
+            self.state = CLOSED
+            self.opened_at = None
+            self._probe = None
+            self._window.clear()
+
+    def read_timeout(self):
+        """Таймаут чтения: p99 * коэффициент в пределах [min_timeout, настроенный]"""
+        with self._lock:
+            p99 = self._window.percentile(0.99)
+        if p99 is None:
+            return self.max_read_timeout
+        return min(self.max_read_timeout, max(self.min_timeout, p99 * self.timeout_factor))
+
+    def retry_after(self):
+        if self.state != OPEN:
+            return 1
+        remaining = self.open_seconds - (time.monotonic() - self.opened_at)
+        return max(1, math.ceil(remaining))
+
+    def stats(self):
+        with self._lock:
+            total, failures = self._window.counts()
+            p99 = self._window.percentile(0.99)
+            state = self.state
+            in_flight = self._in_flight
+        return {
+            'state': state,
+            'window_requests': total,
+            'window_failures': failures,
+            'error_rate': round(failures / total, 4) if total else 0.0,
+            'p99_ms': round(p99 * 1000, 1) if p99 is not None else None,
+            'read_timeout': round(self.read_timeout(), 3),
+            'in_flight': in_flight,
+            'max_concurrent': self.max_concurrent,
+            'trips': self.trips,
+            'rejected_open': self.rejected_open,
+            'rejected_bulkhead': self.rejected_bulkhead
+        }
@@ -0,0 +1,148 @@
+"""
+Фоновый мониторинг состояния сервисов для API Gateway.
+
+Все сервисы опрашиваются параллельно с общим дедлайном: сервис, не
+ответивший за отведенное время, считается недоступным, и опрос не
+ждет таймаутов подключения по очереди. Результат хранится снимком,
+который фоновый поток обновляет раз в interval секунд, поэтому /health
+отвечает сразу. Опрос, не уложившийся в дедлайн, не запускается повторно,
+пока не завершится: следующее обновление ждет его же, поэтому зависший
+сервис занимает не больше одного потока пула. По снимку же прокси отклоняет запросы к недоступным
+сервисам кодом 503, не дожидаясь таймаута подключения.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+HEALTHY = 'healthy'
+UNHEALTHY = 'unhealthy'
+UNREACHABLE = 'unreachable'
+
+
+class HealthMonitor:
+    """Параллельный опрос сервисов и снимок их состояния"""
+
+    def __init__(self, probes, interval=5.0, deadline=2.0):
+        # probes: имя сервиса -> функция, возвращающая HTTP-код health-check
+        self.probes = probes
+        self.interval = interval
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(len(probes), 1), thread_name_prefix='health-probe'
+        )
+        self._snapshot = {
+            name: {
+                'status': None,
+                'latency_ms': None,
+                'last_check': None,
+                'last_success': None,
+                'error': None
+            }
+            for name in probes
+        }
+        # Последний запущенный опрос каждого сервиса
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.refreshes = 0
+        self.refresh_time = None
+        self.stalled_probes = 0
+
+    def _probe(self, name):
+        started = time.monotonic()
+        status_code = self.probes[name]()
+        return status_code, (time.monotonic() - started) * 1000
+
+    def refresh(self):
+        """Опрос всех сервисов; возвращает новый снимок"""
+        started = time.monotonic()
+        futures = {}
+        with self._lock:
+            for name in self.probes:
+                future = self._futures.get(name)
+                if future is not None and not future.done():
+                    # Прошлый опрос еще идет - ждем его, а не занимаем второй поток
+                    self.stalled_probes += 1
+                else:
+                    future = self._futures[name] = self._executor.submit(self._probe, name)
+                futures[future] = name
+        wait(futures, timeout=self.deadline)
+        now = time.time()
+
+        snapshot = {}
+        for future, name in futures.items():
+            previous = self._snapshot[name]
+            state = {
+                'status': UNREACHABLE,
+                'latency_ms': None,
+                'last_check': now,
+                'last_success': previous['last_success'],
+                'error': None
+            }
+
+            if not future.done():
+                state['error'] = f'нет ответа за {self.deadline} с'
+            elif future.exception() is not None:
+                state['error'] = type(future.exception()).__name__
+            else:
+                status_code, latency_ms = future.result()
+                state['latency_ms'] = round(latency_ms, 1)
+                if status_code == 200:
+                    state['status'] = HEALTHY
+                    state['last_success'] = now
+                else:
+                    state['status'] = UNHEALTHY
+                    state['error'] = f'HTTP {status_code}'
+
+            snapshot[name] = state
+
+        with self._lock:
+            self._snapshot = snapshot
+            self.refreshes += 1
+            self.refresh_time = round((time.monotonic() - started) * 1000, 1)
+        return snapshot
+
+    def snapshot(self):
+        """Последний снимок; без фонового обновления опрос выполняется сразу"""
+        if self._thread is None:
+            return self.refresh()
+        return self._snapshot
+
+    def is_down(self, name):
+        """Сервис недоступен по свежему снимку (не старше трех интервалов)"""
+        state = self._snapshot.get(name)
+        if state is None or state['status'] != UNREACHABLE:
+            return False
+        return time.time() - state['last_check'] <= self.interval * 3
+
+    def start(self):
+        """Запуск фонового обновления (один поток на процесс)"""
+        with self._lock:
+            if self._thread is not None or self.interval <= 0:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='health-refresh', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Ошибка опроса сервисов: {str(e)}")
+            time.sleep(self.interval)
+
+    def stats(self):
+        return {
+            'interval': self.interval,
+            'deadline': self.deadline,
+            'refreshes': self.refreshes,
+            'refresh_time_ms': self.refresh_time,
+            'stalled_probes': self.stalled_probes
+        }
@@ -0,0 +1,109 @@
+"""
+Объединение одинаковых одновременных запросов (single-flight).
+
+Пока запрос с данным ключом выполняется, повторные запросы с тем же
+ключом не идут к сервису, а ждут результат первого и получают его же
+(или то же исключение). Ключ составляет вызывающий код: сервис, путь,
+параметры и все, от чего зависит ответ (роль, If-None-Match).
+
+SingleFlight - для потоков (Flask), AsyncSingleFlight - для asyncio.
+"""
+
+import asyncio
+import threading
+
+
+class _Stats:
+
+    def __init__(self):
+        self.leaders = 0
+        self.deduplicated = 0
+
+    def stats(self):
+        total = self.leaders + self.deduplicated
+        return {
+            'upstream_calls': self.leaders,
+            'deduplicated': self.deduplicated,
+            'dedup_ratio': round(self.deduplicated / total, 4) if total else 0.0,
+            'in_flight': len(self._calls)
+        }
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(_Stats):
+    """Single-flight для рабочих потоков"""
+
+    def __init__(self):
+        super().__init__()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Результат fn() - собственный или первого запроса с тем же ключом"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight(_Stats):
+    """Single-flight для asyncio (один цикл событий)"""
+
+    def __init__(self):
+        super().__init__()
+        self._calls = {}
+
+    async def do(self, key, fn):
+        """Результат await fn() - собственный или первого запроса с тем же ключом"""
+        future = self._calls.get(key)
+        if future is not None:
+            self.deduplicated += 1
+            # shield: отмена одного ожидающего не отменяет общий результат
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        try:
+            result = await fn()
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже передано вызывающему; без ожидающих не логируем его
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
@@ -0,0 +1,96 @@
+"""
+Кэш проверенных JWT и список заблокированных пользователей для API Gateway.
+
+Расшифрованные данные токена хранятся по SHA-256 от токена до момента
+его истечения (exp), поэтому повторные запросы не выполняют проверку
+подписи и разбор JSON. Признак is_active учитывается через список
+заблокированных пользователей, который фоновый поток периодически
+забирает из auth-service одним запросом.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+
+from shared.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+class TokenCache:
+    """Расшифрованные токены, ключ - дайджест токена"""
+
+    def __init__(self, maxsize=50000, ttl=3600):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, token):
+        return self._cache.get(token_digest(token))
+
+    def set(self, token, data):
+        exp = data.get('exp')
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+        self._cache.set(token_digest(token), data, ttl=ttl)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class RevocationList:
+    """Множество заблокированных пользователей, обновляемое в фоне"""
+
+    def __init__(self, fetch, refresh_interval=15.0):
+        self._fetch = fetch
+        self.refresh_interval = refresh_interval
+        self._blocked = frozenset()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.last_success = None
+        self.refreshes = 0
+        self.errors = 0
+
+    def is_blocked(self, user_id):
+        return user_id in self._blocked
+
+    def refresh(self):
+        """Загрузка актуального списка; при ошибке остается прежний"""
+        try:
+            blocked = frozenset(self._fetch())
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Не удалось обновить список заблокированных пользователей: {str(e)}")
+            return False
+
+        self._blocked = blocked
+        self.last_success = time.time()
+        self.refreshes += 1
+        return True
+
+    def start(self):
+        """Запуск фонового обновления (один поток на процесс)"""
+        with self._lock:
+            if self._thread is not None or self.refresh_interval <= 0:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='revocation-refresh', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.refresh_interval)
+
+    def stats(self):
+        return {
+            'blocked_users': len(self._blocked),
+            'refresh_interval': self.refresh_interval,
+            'last_success': self.last_success,
+            'refreshes': self.refreshes,
+            'errors': self.errors
+        }
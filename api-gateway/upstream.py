@@ -0,0 +1,183 @@
+"""
+Пулы постоянных HTTP-соединений от API Gateway к микросервисам.
+
+Для каждого сервиса создается отдельная сессия requests с ограниченным
+пулом keep-alive соединений, собственными таймаутами и повторами.
+Повторы после отправки запроса (read/status) выполняются только для
+идемпотентных методов; ошибка установления соединения повторяется для
+любого метода, так как запрос до сервиса не дошел.
+"""
+
+import os
+import threading
+import time
+from http import cookiejar
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# Hop-by-hop заголовки не должны передаваться через прокси (RFC 7230)
+HOP_BY_HOP_HEADERS = frozenset([
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailers', 'transfer-encoding', 'upgrade'
+])
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, '') else default
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+class _BlockAllCookies(cookiejar.CookiePolicy):
+    """Сессия общая для всех клиентов, поэтому cookies в ней не сохраняются"""
+
+    netscape = True
+    rfc2965 = hide_cookie2 = False
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+    def domain_return_ok(self, domain, request):
+        return False
+
+    def path_return_ok(self, path, request):
+        return False
+
+
+class UpstreamPool:
+    """Постоянная сессия к одному сервису с метриками пула"""
+
+    def __init__(self, name, base_url, connect_timeout=2.0, read_timeout=30.0,
+                 pool_maxsize=20, retries=2, backoff_factor=0.1):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            allowed_methods=IDEMPOTENT_METHODS,
+            status_forcelist=(502, 503, 504),
+            backoff_factor=backoff_factor,
+            raise_on_status=False,
+            raise_on_redirect=False
+        )
+        # pool_block=True: при исчерпании пула запрос ждет свободное
+        # соединение, а не открывает лишнее, которое сразу будет закрыто
+        self._adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+            max_retries=retry
+        )
+        self.pool_maxsize = pool_maxsize
+
+        self.session = requests.Session()
+        self.session.trust_env = False
+        self.session.cookies.set_policy(_BlockAllCookies())
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+
+        # Health-check - одной попыткой и мимо основного пула: повторы
+        # и ожидание свободного соединения растянули бы опрос за дедлайн
+        self._probe_session = requests.Session()
+        self._probe_session.trust_env = False
+        self._probe_session.cookies.set_policy(_BlockAllCookies())
+        probe_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+        self._probe_session.mount('http://', probe_adapter)
+        self._probe_session.mount('https://', probe_adapter)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._in_flight = 0
+        self._total_time = 0.0
+
+    @classmethod
+    def from_env(cls, name, base_url, connect_timeout=2.0, read_timeout=30.0):
+        """Создание пула; переменные UPSTREAM_<NAME>_* переопределяют значения"""
+        prefix = f'UPSTREAM_{name.upper()}_'
+        return cls(
+            name,
+            base_url,
+            connect_timeout=_env_float(prefix + 'CONNECT_TIMEOUT', connect_timeout),
+            read_timeout=_env_float(prefix + 'READ_TIMEOUT', read_timeout),
+            pool_maxsize=_env_int(prefix + 'POOL_MAXSIZE', _env_int('UPSTREAM_POOL_MAXSIZE', 20)),
+            retries=_env_int(prefix + 'RETRIES', _env_int('UPSTREAM_RETRIES', 2))
+        )
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """Выполнение запроса к сервису через постоянную сессию"""
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+        started = time.monotonic()
+        try:
+            return self.session.request(
+                method=method,
+                url=self.url(path),
+                timeout=timeout or self.timeout,
+                allow_redirects=False,
+                **kwargs
+            )
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._in_flight -= 1
+                self._total_time += elapsed
+
+    def probe(self, path, timeout):
+        """GET health-check без повторов; timeout - (подключение, чтение)"""
+        return self._probe_session.get(self.url(path), timeout=timeout, allow_redirects=False)
+
+    def stats(self):
+        """Метрики пула: запросы, ошибки и число открытых соединений"""
+        connections_opened = 0
+        idle = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections_opened += pool.num_connections
+            idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+
+        with self._lock:
+            requests_total = self._requests
+            return {
+                'requests': requests_total,
+                'errors': self._errors,
+                'in_flight': self._in_flight,
+                'avg_time_ms': round(self._total_time * 1000 / requests_total, 2) if requests_total else 0.0,
+                'pool_maxsize': self.pool_maxsize,
+                'connections_opened': connections_opened,
+                'idle_connections': idle,
+                'connect_timeout': self.timeout[0],
+                'read_timeout': self.timeout[1]
+            }
+
+
+def filter_headers(headers, exclude=()):
+    """Удаление hop-by-hop и перечисленных заголовков"""
+    excluded = HOP_BY_HOP_HEADERS.union(exclude)
+    return {key: value for key, value in headers if key.lower() not in excluded}
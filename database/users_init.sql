@@ -1,26 +1,3 @@
-CREATE DATABASE IF NOT EXISTS users_db;
-USE users_db;
-
-CREATE TABLE IF NOT EXISTS user_profiles (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    user_id INT NOT NULL UNIQUE,
-    first_name VARCHAR(100),
-    last_name VARCHAR(100),
-    phone VARCHAR(20),
-    company VARCHAR(255),
-    position VARCHAR(100),
-    avatar_url VARCHAR(500),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-);
-
-CREATE TABLE IF NOT EXISTS user_settings (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    user_id INT NOT NULL UNIQUE,
-    email_notifications BOOLEAN DEFAULT TRUE,
-    sms_notifications BOOLEAN DEFAULT FALSE,
-    language VARCHAR(10) DEFAULT 'ru',
-    timezone VARCHAR(50) DEFAULT 'Europe/Moscow',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-);
\ No newline at end of file
+-- Схему создают и обновляют миграции user-service (MIGRATIONS в services/user-service/app.py,
+-- команда flask --app app.py migrate); здесь только база данных.
+CREATE DATABASE IF NOT EXISTS users_db CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
@@ -1,8 +1,9 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response
 import requests
 import os
 import json
 from datetime import datetime
+from itertools import islice
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'
@@ -68,14 +69,14 @@ MOCK_TENDERS = [
     }
 ]
 
-def call_api(endpoint, method='GET', data=None):
+def call_api(endpoint, method='GET', data=None, params=None):
     """Универсальная функция для вызова API с обработкой ошибок"""
     try:
         url = f"{app.config['API_GATEWAY_URL']}/{endpoint}"
         headers = {'Content-Type': 'application/json'}
         
         if method == 'GET':
-            response = requests.get(url, headers=headers, timeout=5)
+            response = requests.get(url, headers=headers, params=params, timeout=5)
         elif method == 'POST':
             response = requests.post(url, headers=headers, json=data, timeout=5)
         elif method == 'PUT':
@@ -92,13 +93,62 @@ def call_api(endpoint, method='GET', data=None):
     except Exception as e:
         return None, f'API error: {str(e)}'
 
+def tender_query_params(args, default_status='active'):
+    """Параметры списка тендеров, передаваемые в tender-service"""
+    params = {
+        'page': max(args.get('page', 1, type=int), 1),
+        'per_page': max(args.get('per_page', 10, type=int), 1),
+        'status': args.get('status', default_status),
+        'search': args.get('search', '')
+    }
+    for key in ('after', 'skip_total'):
+        if key in args:
+            params[key] = args[key]
+    return params
+
+def query_mock_tenders(params):
+    """Фильтрация и пагинация mock данных с теми же параметрами, что у API.
+    
+    Страница выбирается ленивым проходом с islice, без промежуточных
+    списков; полный проход нужен только для total (skip_total его отключает).
+    """
+    status = params.get('status')
+    search = params.get('search', '').lower()
+    page = params['page']
+    per_page = params['per_page']
+    
+    def matches(tender):
+        if status and tender.get('status') != status:
+            return False
+        if search:
+            return (search in tender.get('title', '').lower() or
+                    search in tender.get('description', '').lower() or
+                    search in tender.get('customer', '').lower())
+        return True
+    
+    start = (page - 1) * per_page
+    tenders = list(islice(filter(matches, MOCK_TENDERS), start, start + per_page))
+    
+    total = None
+    if str(params.get('skip_total', '')).lower() not in ('1', 'true', 'yes'):
+        total = sum(1 for tender in MOCK_TENDERS if matches(tender))
+    
+    return {
+        'tenders': tenders,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'total_pages': (total + per_page - 1) // per_page if total is not None else None,
+        'next_cursor': None
+    }
+
 # Главная страница
 @app.route('/')
 def index():
     breadcrumbs = [{'name': 'Главная', 'url': '#'}]
     
     # Пробуем получить тендеры из API, если не получается - используем mock данные
-    tenders_data, status = call_api('tenders')
+    tenders_data, status = call_api('tenders', params={'per_page': 3, 'skip_total': 1})
     if tenders_data:
         recent_tenders = tenders_data.get('tenders', [])[:3]
     else:
@@ -115,24 +165,16 @@ def tenders():
     ]
     
     # Получаем параметры фильтрации
-    page = request.args.get('page', 1, type=int)
-    search = request.args.get('search', '')
-    status_filter = request.args.get('status', 'active')
+    params = tender_query_params(request.args)
     
     # Пробуем получить данные из API
-    tenders_data, api_status = call_api(f'tenders?page={page}&status={status_filter}&search={search}')
+    tenders_data, api_status = call_api('tenders', params=params)
     
     if tenders_data:
         tenders_list = tenders_data
     else:
         # Используем mock данные если API недоступно
-        tenders_list = {
-            'tenders': MOCK_TENDERS,
-            'total': len(MOCK_TENDERS),
-            'page': page,
-            'per_page': 10,
-            'total_pages': 1
-        }
+        tenders_list = query_mock_tenders(params)
     
     return render_template('tenders.html', breadcrumbs=breadcrumbs, tenders_data=tenders_list)
 
@@ -385,87 +427,25 @@ def api_register():
 @app.route('/api/tenders', methods=['GET'])
 def api_tenders():
     """API для получения списка тендеров"""
+    # Фильтрация и пагинация выполняются в tender-service
+    params = tender_query_params(request.args, default_status='')
+    
     try:
-        # Получаем параметры запроса
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        search = request.args.get('search', '')
-        status = request.args.get('status', '')
+        response = requests.get(
+            f"{app.config['API_GATEWAY_URL']}/tenders",
+            params=params,
+            timeout=5
+        )
         
-        # Пробуем получить данные из реального API
-        api_response, status_code = call_api('tenders')
+        if response.status_code == 200:
+            # Ответ передается без разбора и повторной сериализации
+            return Response(response.content, status=200, mimetype='application/json')
         
-        if api_response and 'tenders' in api_response:
-            # Фильтрация данных от API
-            filtered_tenders = api_response['tenders']
-            
-            if status:
-                filtered_tenders = [t for t in filtered_tenders if t.get('status') == status]
-            
-            if search:
-                search_lower = search.lower()
-                filtered_tenders = [
-                    t for t in filtered_tenders 
-                    if search_lower in t.get('title', '').lower() or 
-                       search_lower in t.get('description', '').lower() or
-                       search_lower in t.get('customer', '').lower()
-                ]
-            
-            # Пагинация
-            total = len(filtered_tenders)
-            total_pages = (total + per_page - 1) // per_page
-            start_idx = (page - 1) * per_page
-            end_idx = start_idx + per_page
-            paginated_tenders = filtered_tenders[start_idx:end_idx]
-            
-            return jsonify({
-                'tenders': paginated_tenders,
-                'total': total,
-                'page': page,
-                'per_page': per_page,
-                'total_pages': total_pages
-            })
-        else:
-            # Возвращаем mock данные
-            filtered_tenders = MOCK_TENDERS
-            
-            # Применяем фильтры к mock данным
-            if status:
-                filtered_tenders = [t for t in filtered_tenders if t.get('status') == status]
-            
-            if search:
-                search_lower = search.lower()
-                filtered_tenders = [
-                    t for t in filtered_tenders 
-                    if search_lower in t.get('title', '').lower() or 
-                       search_lower in t.get('description', '').lower() or
-                       search_lower in t.get('customer', '').lower()
-                ]
-            
-            total = len(filtered_tenders)
-            total_pages = (total + per_page - 1) // per_page
-            start_idx = (page - 1) * per_page
-            end_idx = start_idx + per_page
-            paginated_tenders = filtered_tenders[start_idx:end_idx]
-            
-            return jsonify({
-                'tenders': paginated_tenders,
-                'total': total,
-                'page': page,
-                'per_page': per_page,
-                'total_pages': total_pages
-            })
-            
-    except Exception as e:
+    except requests.exceptions.RequestException as e:
         print(f"Error in api_tenders: {e}")
-        # Возвращаем mock данные в случае ошибки
-        return jsonify({
-            'tenders': MOCK_TENDERS,
-            'total': len(MOCK_TENDERS),
-            'page': 1,
-            'per_page': 10,
-            'total_pages': 1
-        })
+    
+    # Возвращаем mock данные, если API недоступно
+    return jsonify(query_mock_tenders(params))
 
 @app.route('/api/users/profile', methods=['GET'])
 def api_user_profile():
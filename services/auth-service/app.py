@@ -1,11 +1,24 @@
 from flask import Flask, request, jsonify
 import jwt
-import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash
 import mysql.connector
 from functools import wraps
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+import os
+import sys
+
+# Добавляем корень проекта для общих модулей (shared)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from shared.db_pool import ConnectionPool, init_app as init_db_pool
+from shared.metrics import Metrics, init_app as init_metrics
+from shared.slow_queries import SlowQueryLog, init_app as init_slow_queries
+from shared.migrations import add_index, drop_index, init_app as init_migrations
+from shared.tracing import Tracer, init_app as init_tracing
+from shared.cache import TTLCache
+from shared.internal_auth import internal_only
+from hashing import HASH_METHOD, HashQueueFullError, PasswordHasher
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
@@ -14,57 +27,104 @@ app.config['SECRET_KEY'] = 'your-secret-key-here'
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_db_connection():
+def _connect():
     return mysql.connector.connect(
-        host="mysql-auth",
-        user="root",
-        password="password",
-        database="auth_db",
+        host=os.environ.get('DB_HOST', 'mysql-auth'),
+        user=os.environ.get('DB_USER', 'root'),
+        password=os.environ.get('DB_PASSWORD', 'password'),
+        database=os.environ.get('DB_NAME', 'auth_db'),
         charset='utf8mb4',
         collation='utf8mb4_unicode_ci'
     )
 
-def init_db():
-    """Инициализация базы данных"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # Создание таблицы пользователей
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                role ENUM('admin', 'manager', 'client') DEFAULT 'client',
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_email (email),
-                INDEX idx_role (role)
-            )
-        ''')
-        
-        # Создание администратора по умолчанию
-        admin_password = generate_password_hash('admin123')
-        cursor.execute('''
-            INSERT IGNORE INTO users (email, password, role) 
-            VALUES (%s, %s, %s)
-        ''', ('admin@tender-system.ru', admin_password, 'admin'))
-        
-        conn.commit()
-        logger.info("База данных аутентификации инициализирована")
-        
-    except Exception as e:
-        logger.error(f"Ошибка инициализации БД: {str(e)}")
-        conn.rollback()
-    finally:
-        cursor.close()
-        conn.close()
+# Пул соединений с БД (параметры задаются переменными DB_POOL_*)
+db_pool = ConnectionPool.from_env(_connect, name='auth_db')
+init_db_pool(app, db_pool)
+
+# Трассировка запросов и заголовок Server-Timing (параметры TRACE_*)
+tracer = Tracer.from_env('auth-service')
+init_tracing(app, tracer, db_pool)
+
+# Метрики запросов и SQL в формате Prometheus на /metrics
+metrics = Metrics()
+init_metrics(app, metrics, db_pool)
+
+# Статистика SQL по отпечаткам запросов и EXPLAIN медленных (параметры SLOW_QUERY_*)
+slow_queries = SlowQueryLog.from_env()
+init_slow_queries(app, slow_queries, db_pool, '/auth/slow-queries')
+
+def get_db_connection():
+    return db_pool.connection()
+
+# Кэш статуса пользователей для /auth/verify: user_id -> is_active.
+# AUTH_VERIFY_CACHE_TTL - максимальная задержка применения блокировки,
+# если уведомление об изменении пользователя не дошло
+user_status_cache = TTLCache(
+    maxsize=int(os.environ.get('AUTH_VERIFY_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('AUTH_VERIFY_CACHE_TTL', 30))
+)
+
+# Пул процессов для хеширования паролей (параметры PASSWORD_HASH_*)
+password_hasher = PasswordHasher.from_env()
+
+def overloaded_response():
+    response = jsonify({'error': 'Сервис перегружен, повторите попытку позже'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+# Миграции схемы (shared/migrations.py): применяются командой flask migrate
+USERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        email VARCHAR(255) UNIQUE NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        role ENUM('admin', 'manager', 'client') DEFAULT 'client',
+        is_active BOOLEAN DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_email (email),
+        INDEX idx_role (role),
+        INDEX idx_created (created_at, id)
+    )
+'''
+
+def add_pagination_index(conn, cursor):
+    # Составной индекс для курсорной пагинации в уже существующей таблице
+    add_index(cursor, 'users', 'idx_created', 'created_at, id')
+
+def create_default_admin(conn, cursor):
+    """Администратор по умолчанию"""
+    admin_password = generate_password_hash('admin123', method=HASH_METHOD)
+    cursor.execute('''
+        INSERT IGNORE INTO users (email, password, role) 
+        VALUES (%s, %s, %s)
+    ''', ('admin@tender-system.ru', admin_password, 'admin'))
+
+def update_user_indexes(conn, cursor):
+    # Базы, созданные из database/auth_init.sql, были без idx_role
+    add_index(cursor, 'users', 'idx_role', 'role')
+    # /auth/blocked опрашивается gateway постоянно, а заблокированных мало
+    add_index(cursor, 'users', 'idx_is_active', 'is_active')
+    # Дублирует уникальный индекс email
+    drop_index(cursor, 'users', 'idx_email')
+
+MIGRATIONS = [
+    (1, 'Таблица пользователей', [USERS_TABLE, add_pagination_index]),
+    (2, 'Администратор по умолчанию', [create_default_admin]),
+    (3, 'Индексы выборок пользователей', [update_user_indexes])
+]
 
 @app.route('/auth/health')
 def health_check():
-    return jsonify({'status': 'healthy', 'service': 'auth-service'})
+    return jsonify({
+        'status': 'healthy',
+        'service': 'auth-service',
+        'db_pool': db_pool.stats(),
+        'verify_cache': user_status_cache.stats(),
+        'password_hasher': password_hasher.stats(),
+        'tracing': tracer.stats(),
+        'slow_queries': slow_queries.stats()
+    })
 
 @app.route('/auth/register', methods=['POST'])
 def register():
@@ -86,7 +146,7 @@ def register():
         if len(password) < 6:
             return jsonify({'error': 'Пароль должен содержать минимум 6 символов'}), 400
         
-        hashed_password = generate_password_hash(password)
+        hashed_password = password_hasher.hash(password)
         
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -106,7 +166,7 @@ def register():
             'user_id': user_id,
             'role': role,
             'email': email,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
+            'exp': datetime.utcnow() + timedelta(hours=24)
         }, app.config['SECRET_KEY'], algorithm='HS256')
         
         logger.info(f"Зарегистрирован новый пользователь: {email}")
@@ -120,10 +180,32 @@ def register():
         
     except mysql.connector.IntegrityError:
         return jsonify({'error': 'Пользователь с таким email уже существует'}), 400
+    except HashQueueFullError:
+        return overloaded_response()
     except Exception as e:
         logger.error(f"Ошибка регистрации: {str(e)}")
         return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
 
+def upgrade_password_hash(user_id, password):
+    """Перехеширование пароля текущим методом; ошибка не мешает входу"""
+    try:
+        new_hash = password_hasher.hash(password)
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('UPDATE users SET password = %s WHERE id = %s', (new_hash, user_id))
+        conn.commit()
+        cursor.close()
+        conn.close()
+        
+        password_hasher.upgraded += 1
+        logger.info(f"Хеш пароля пользователя {user_id} обновлен до {password_hasher.method}")
+    except HashQueueFullError:
+        # Обновим при следующем входе
+        pass
+    except Exception as e:
+        logger.warning(f"Не удалось обновить хеш пароля пользователя {user_id}: {str(e)}")
+
 @app.route('/auth/login', methods=['POST'])
 def login():
     try:
@@ -154,12 +236,16 @@ def login():
         if not user['is_active']:
             return jsonify({'error': 'Учетная запись заблокирована'}), 403
         
-        if check_password_hash(user['password'], password):
+        if password_hasher.verify(user['password'], password):
+            # Прозрачное обновление хеша при смене метода или стоимости
+            if password_hasher.needs_rehash(user['password']):
+                upgrade_password_hash(user['id'], password)
+            
             token = jwt.encode({
                 'user_id': user['id'],
                 'role': user['role'],
                 'email': user['email'],
-                'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
+                'exp': datetime.utcnow() + timedelta(hours=24)
             }, app.config['SECRET_KEY'], algorithm='HS256')
             
             logger.info(f"Успешный вход пользователя: {email}")
@@ -173,6 +259,8 @@ def login():
         
         return jsonify({'error': 'Неверный email или пароль'}), 401
         
+    except HashQueueFullError:
+        return overloaded_response()
     except Exception as e:
         logger.error(f"Ошибка входа: {str(e)}")
         return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
@@ -188,17 +276,23 @@ def verify_token():
         
         data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
         
-        # Проверяем, существует ли пользователь в БД
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute('SELECT id, is_active FROM users WHERE id = %s', (data['user_id'],))
-        user = cursor.fetchone()
+        # Проверяем, существует ли пользователь в БД (с кэшированием)
+        is_active = user_status_cache.get(data['user_id'])
         
-        cursor.close()
-        conn.close()
+        if is_active is None:
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            
+            cursor.execute('SELECT id, is_active FROM users WHERE id = %s', (data['user_id'],))
+            user = cursor.fetchone()
+            
+            cursor.close()
+            conn.close()
+            
+            is_active = bool(user and user['is_active'])
+            user_status_cache.set(data['user_id'], is_active)
         
-        if not user or not user['is_active']:
+        if not is_active:
             return jsonify({'valid': False, 'error': 'Пользователь не найден или заблокирован'}), 401
         
         return jsonify({
@@ -216,9 +310,48 @@ def verify_token():
         logger.error(f"Ошибка проверки токена: {str(e)}")
         return jsonify({'valid': False, 'error': 'Ошибка проверки токена'}), 500
 
-# Инициализация БД при запуске
-with app.app_context():
-    init_db()
+@app.route('/auth/blocked', methods=['GET'])
+@internal_only
+def get_blocked_users():
+    """Идентификаторы заблокированных пользователей (для API Gateway)"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT id FROM users WHERE is_active = FALSE')
+        user_ids = [row[0] for row in cursor.fetchall()]
+        
+        cursor.close()
+        conn.close()
+        
+        return jsonify({'user_ids': user_ids})
+        
+    except Exception as e:
+        logger.error(f"Ошибка получения заблокированных пользователей: {str(e)}")
+        return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
+
+@app.route('/auth/cache/invalidate', methods=['POST'])
+@internal_only
+def invalidate_user_cache():
+    """Сброс кэша статуса пользователей (вызывается user-service)"""
+    data = request.get_json(silent=True)
+    user_ids = data.get('user_ids') if isinstance(data, dict) else None
+    
+    # bool - подкласс int, но идентификатором пользователя не является
+    if not isinstance(user_ids, list) or not all(
+        isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids
+    ):
+        return jsonify({'error': 'user_ids должен быть списком целых чисел'}), 400
+    
+    for user_id in user_ids:
+        user_status_cache.invalidate(user_id)
+    
+    logger.info(f"Кэш статуса сброшен для пользователей: {user_ids}")
+    
+    return jsonify({'invalidated': len(user_ids)})
+
+# При запуске только проверяется версия схемы; миграции - flask migrate
+init_migrations(app, db_pool, MIGRATIONS)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Хеширование паролей в отдельном пуле процессов.
+
+Хеширование (pbkdf2/scrypt) занимает процессор на сотни миллисекунд
+и в потоке запроса блокирует обработку health-check и /auth/verify.
+Здесь оно выполняется в ProcessPoolExecutor с ограниченной очередью:
+если очередь заполнена, вызывающий сразу получает HashQueueFullError
+и отвечает 503 вместо того, чтобы ждать.
+
+Параметры:
+    PASSWORD_HASH_METHOD  - метод werkzeug с параметрами стоимости,
+                            например 'pbkdf2:sha256:600000' или
+                            'scrypt:32768:8:1' (по умолчанию первый)
+    PASSWORD_HASH_WORKERS - число процессов (по числу ядер)
+    PASSWORD_HASH_QUEUE   - максимум задач в работе и в очереди (64)
+    PASSWORD_HASH_TIMEOUT - ожидание результата, сек (10)
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+SALT_LENGTH = 16
+# Пул создается из потока запроса многопоточного сервера: при fork дочерний
+# процесс унаследовал бы захваченные блокировки (logging, пул соединений)
+POOL_START_METHOD = 'forkserver'
+
+
+def normalize_method(method):
+    """Полная запись метода, как ее пишет werkzeug в префикс хеша.
+
+    Краткие 'scrypt', 'pbkdf2', 'pbkdf2:sha256' дополняются параметрами
+    стоимости werkzeug по умолчанию - без вычисления хеша.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        if not args:
+            args = ['32768', '8', '1']
+        if len(args) != 3:
+            raise ValueError(f'Метод scrypt принимает 3 параметра: {method}')
+        return ':'.join([name] + [str(int(arg)) for arg in args])
+    if name == 'pbkdf2':
+        if len(args) > 2:
+            raise ValueError(f'Метод pbkdf2 принимает 2 параметра: {method}')
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'{name}:{hash_name}:{iterations}'
+    return method
+
+
+class HashQueueFullError(Exception):
+    """Очередь хеширования заполнена или результат не получен вовремя"""
+
+
+class PasswordHasher:
+    """Пул процессов для generate/check_password_hash с ограниченной очередью"""
+
+    def __init__(self, method=HASH_METHOD, workers=None, queue_size=64, timeout=10.0):
+        # needs_rehash() сравнивает префикс хеша с полной формой метода
+        self.method = normalize_method(method)
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+        self.submitted = 0
+        self.rejected = 0
+        self.upgraded = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or None,
+            queue_size=int(os.environ.get('PASSWORD_HASH_QUEUE', 64)),
+            timeout=float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+        )
+
+    def _get_executor(self):
+        # Пул создается лениво, уже в процессе воркера (после fork)
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(POOL_START_METHOD)
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashQueueFullError('Очередь хеширования заполнена')
+
+        try:
+            self.submitted += 1
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self.rejected += 1
+            raise HashQueueFullError('Превышено время ожидания хеширования')
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, SALT_LENGTH)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Хеш создан другим методом или с другой стоимостью"""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def stats(self):
+        return {
+            'method': self.method,
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'submitted': self.submitted,
+            'rejected': self.rejected,
+            'upgraded': self.upgraded
+        }
@@ -1,8 +1,35 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 import mysql.connector
+from mysql.connector import errorcode
 import logging
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 import json
+import os
+import sys
+import threading
+
+
+# Добавляем корень проекта для общих модулей (shared)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from shared.db_pool import ConnectionPool, init_app as init_db_pool
+from shared.metrics import Metrics, init_app as init_metrics
+from shared.slow_queries import SlowQueryLog, init_app as init_slow_queries
+from shared.migrations import add_column, add_index, drop_index, init_app as init_migrations
+from shared.tracing import Tracer, init_app as init_tracing
+from shared.pagination import (
+    InvalidCursorError, decode_cursor, keyset_condition, keyset_params, next_cursor
+)
+from shared.response_cache import ResponseCache
+from search import index_text, tender_filters
+from export import EXPORT_FORMATS, iter_batches, ndjson_chunks, csv_chunks, gzip_chunks
+from journal import Journal
+from stats import (
+    CREATE_TABLES as STATS_TABLES, record_tenders, record_applications,
+    rebuild as rebuild_stats, read_stats
+)
+from application_buffer import ApplicationBuffer, ApplicationRejected
 
 app = Flask(__name__)
 
@@ -10,168 +37,495 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_db_connection():
+def _connect():
     return mysql.connector.connect(
-        host="mysql-tenders",
-        user="root",
-        password="password",
-        database="tenders_db",
+        host=os.environ.get('DB_HOST', 'mysql-tenders'),
+        user=os.environ.get('DB_USER', 'root'),
+        password=os.environ.get('DB_PASSWORD', 'password'),
+        database=os.environ.get('DB_NAME', 'tenders_db'),
         charset='utf8mb4',
         collation='utf8mb4_unicode_ci'
     )
 
-def init_db():
-    """Инициализация базы данных тендеров"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+# Пул соединений с БД (параметры задаются переменными DB_POOL_*)
+db_pool = ConnectionPool.from_env(_connect, name='tenders_db')
+init_db_pool(app, db_pool)
+
+# Трассировка запросов и заголовок Server-Timing (параметры TRACE_*)
+tracer = Tracer.from_env('tender-service')
+init_tracing(app, tracer, db_pool)
+
+# Метрики запросов и SQL в формате Prometheus на /metrics
+metrics = Metrics()
+init_metrics(app, metrics, db_pool)
+
+# Статистика SQL по отпечаткам запросов и EXPLAIN медленных (параметры SLOW_QUERY_*)
+slow_queries = SlowQueryLog.from_env()
+init_slow_queries(app, slow_queries, db_pool, '/tenders/slow-queries')
+
+def get_db_connection():
+    return db_pool.connection()
+
+# Кэш ответов публичных GET /tenders и /tenders/<id>
+response_cache = ResponseCache(
+    maxsize=int(os.environ.get('TENDER_CACHE_SIZE', 1000)),
+    max_bytes=int(os.environ.get('TENDER_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+    ttl=float(os.environ.get('TENDER_CACHE_TTL', 60))
+)
+
+def cached_json_response(entry, cache_status):
+    """Ответ из кэша с ETag; при совпадении If-None-Match - 304 без тела"""
+    response = Response(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    # Клиент может хранить ответ, но обязан перепроверять его по ETag
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Cache'] = cache_status
+    return response.make_conditional(request)
+
+def invalidate_tender(tender_id, *statuses):
+    """Сброс кэша после изменения тендера.
     
-    try:
-        # Таблица тендеров
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tenders (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                title VARCHAR(500) NOT NULL,
-                description TEXT,
-                customer VARCHAR(255) NOT NULL,
-                budget DECIMAL(15,2),
-                currency VARCHAR(3) DEFAULT 'RUB',
-                status ENUM('draft', 'active', 'cancelled', 'completed') DEFAULT 'draft',
-                tender_type ENUM('open', 'closed', 'limited') DEFAULT 'open',
-                deadline DATETIME,
-                created_by INT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_status (status),
-                INDEX idx_deadline (deadline),
-                INDEX idx_created_by (created_by)
-            )
-        ''')
-        
-        # Таблица заявок
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS applications (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                tender_id INT NOT NULL,
-                user_id INT NOT NULL,
-                proposal TEXT,
-                price DECIMAL(15,2),
-                status ENUM('submitted', 'reviewed', 'accepted', 'rejected') DEFAULT 'submitted',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (tender_id) REFERENCES tenders(id) ON DELETE CASCADE,
-                UNIQUE KEY unique_application (tender_id, user_id),
-                INDEX idx_tender_id (tender_id),
-                INDEX idx_user_id (user_id)
-            )
-        ''')
-        
-        # Таблица документов тендера
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tender_documents (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                tender_id INT NOT NULL,
-                document_name VARCHAR(255) NOT NULL,
-                document_path VARCHAR(500),
-                file_size INT,
-                uploaded_by INT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (tender_id) REFERENCES tenders(id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # Создание тестовых данных
+    statuses - статусы, списки которых затронуты (новый и прежний при смене статуса).
+    """
+    tags = [f'tender:{tender_id}']
+    if statuses:
+        tags.append('status:*')
+        tags.extend(f'status:{status}' for status in statuses)
+    response_cache.invalidate(*tags)
+
+def invalidate_after_commit(counts):
+    """Сброс кэша после переноса пачки заявок из журнала"""
+    for tender_id in counts:
+        invalidate_tender(tender_id)
+
+# Буфер заявок через локальный журнал (пустой путь - заявки пишутся сразу в БД)
+APPLICATION_JOURNAL = os.environ.get('TENDER_APPLICATION_JOURNAL', '')
+application_buffer = None
+if APPLICATION_JOURNAL:
+    application_buffer = ApplicationBuffer(
+        Journal(APPLICATION_JOURNAL, fsync=os.environ.get('TENDER_JOURNAL_FSYNC', '1') != '0'),
+        get_db_connection,
+        on_commit=invalidate_after_commit,
+        batch_size=int(os.environ.get('TENDER_JOURNAL_BATCH_SIZE', 200)),
+        id_block_size=int(os.environ.get('TENDER_JOURNAL_ID_BLOCK', 1000))
+    )
+
+    @app.before_request
+    def start_application_buffer():
+        # Запуск при первом запросе, а не при импорте: при debug=True
+        # модуль импортируется дважды, а журнал должен открыть один процесс
+        application_buffer.start()
+
+# Колонки тендера, отдаваемые клиентам (без служебной search_text)
+TENDER_COLUMNS = '''
+    t.id, t.title, t.description, t.customer, t.budget, t.currency, t.status,
+    t.tender_type, t.deadline, t.created_by, t.applications_count,
+    t.created_at, t.updated_at
+'''
+
+# Миграции схемы (shared/migrations.py): применяются командой flask migrate
+TENDERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS tenders (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        title VARCHAR(500) NOT NULL,
+        description TEXT,
+        customer VARCHAR(255) NOT NULL,
+        budget DECIMAL(15,2),
+        currency VARCHAR(3) DEFAULT 'RUB',
+        status ENUM('draft', 'active', 'cancelled', 'completed') DEFAULT 'draft',
+        tender_type ENUM('open', 'closed', 'limited') DEFAULT 'open',
+        deadline DATETIME,
+        created_by INT NOT NULL,
+        applications_count INT NOT NULL DEFAULT 0,
+        search_text TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_status (status),
+        INDEX idx_deadline (deadline),
+        INDEX idx_created_by (created_by),
+        INDEX idx_status_created (status, created_at, id),
+        INDEX idx_created (created_at, id),
+        FULLTEXT INDEX ft_search_text (search_text)
+    )
+'''
+
+APPLICATIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS applications (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        tender_id INT NOT NULL,
+        user_id INT NOT NULL,
+        proposal TEXT,
+        price DECIMAL(15,2),
+        status ENUM('submitted', 'reviewed', 'accepted', 'rejected') DEFAULT 'submitted',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        FOREIGN KEY (tender_id) REFERENCES tenders(id) ON DELETE CASCADE,
+        idempotency_key VARCHAR(64) NULL,
+        UNIQUE KEY unique_application (tender_id, user_id),
+        UNIQUE KEY unique_idempotency_key (idempotency_key),
+        INDEX idx_tender_id (tender_id),
+        INDEX idx_user_id (user_id)
+    )
+'''
+
+# Блоки номеров заявок, выдаваемых буфером до записи в БД
+ID_ALLOCATOR_TABLE = '''
+    CREATE TABLE IF NOT EXISTS id_allocator (
+        name VARCHAR(64) PRIMARY KEY,
+        next_id BIGINT NOT NULL
+    )
+'''
+
+# Заявки из журнала, которые MySQL не принял (см. application_buffer.py)
+APPLICATION_DEAD_LETTERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS application_dead_letters (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        application_id INT NOT NULL,
+        journal_seq BIGINT NOT NULL,
+        payload MEDIUMTEXT NOT NULL,
+        error VARCHAR(500) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_application_id (application_id)
+    )
+'''
+
+TENDER_DOCUMENTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS tender_documents (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        tender_id INT NOT NULL,
+        document_name VARCHAR(255) NOT NULL,
+        document_path VARCHAR(500),
+        file_size INT,
+        uploaded_by INT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (tender_id) REFERENCES tenders(id) ON DELETE CASCADE
+    )
+'''
+
+def upgrade_existing_tables(conn, cursor):
+    """Колонки и индексы, добавленные в уже существующие таблицы"""
+    # Счетчик заявок
+    if add_column(cursor, 'tenders', 'applications_count', 'INT NOT NULL DEFAULT 0 AFTER created_by'):
+        rebuild_applications_count(cursor)
+    
+    # Колонка и полнотекстовый индекс для поиска
+    add_column(cursor, 'tenders', 'search_text', 'TEXT AFTER applications_count')
+    add_index(cursor, 'tenders', 'ft_search_text', 'search_text', kind='FULLTEXT INDEX')
+    
+    # Составные индексы для курсорной пагинации списка тендеров
+    add_index(cursor, 'tenders', 'idx_status_created', 'status, created_at, id')
+    add_index(cursor, 'tenders', 'idx_created', 'created_at, id')
+    
+    # Ключ идемпотентности заявок (буфер заявок через журнал)
+    add_column(cursor, 'applications', 'idempotency_key', 'VARCHAR(64) NULL')
+    add_index(cursor, 'applications', 'unique_idempotency_key', 'idempotency_key', kind='UNIQUE KEY')
+
+def create_initial_data(conn, cursor):
+    """Тестовые тендеры в пустой базе, поисковый индекс и сводная статистика"""
+    cursor.execute('SELECT COUNT(*) FROM tenders')
+    if cursor.fetchone()[0] == 0:
         cursor.execute('''
-            INSERT IGNORE INTO tenders 
+            INSERT INTO tenders 
             (title, description, customer, budget, status, deadline, created_by) 
             VALUES 
             ('Поставка компьютерной техники', 'Закупка компьютеров и периферии для офиса', 'ООО Ромашка', 500000.00, 'active', DATE_ADD(NOW(), INTERVAL 30 DAY), 1),
             ('Ремонт офисных помещений', 'Капитальный ремонт офиса площадью 200 кв.м.', 'ЗАО Весна', 1500000.00, 'active', DATE_ADD(NOW(), INTERVAL 45 DAY), 1),
             ('Разработка веб-портала', 'Создание корпоративного портала с системой документооборота', 'ИП Иванов', 300000.00, 'draft', DATE_ADD(NOW(), INTERVAL 60 DAY), 1)
         ''')
-        
         conn.commit()
-        logger.info("База данных тендеров инициализирована")
-        
+    
+    # Индексация тендеров без search_text (тестовые данные, старые записи)
+    reindex_search_text(conn)
+    
+    # Пустые сводные таблицы заполняются пересчетом
+    cursor.execute('SELECT COUNT(*) FROM stats_tenders')
+    if cursor.fetchone()[0] == 0:
+        rebuild_stats(cursor)
+
+def update_listing_indexes(conn, cursor):
+    """Одинаковые индексы выборок во всех базах, в том числе созданных из database/tenders_init.sql"""
+    add_index(cursor, 'tenders', 'idx_deadline', 'deadline')
+    add_index(cursor, 'tenders', 'idx_created_by', 'created_by')
+    # Подсчет и выборка по статусу идут по idx_status_created
+    drop_index(cursor, 'tenders', 'idx_status')
+    
+    # Повторные заявки уже в базе: ключ не создастся, пока их не разберут вручную
+    add_index(cursor, 'applications', 'unique_application', 'tender_id, user_id', kind='UNIQUE KEY')
+    add_index(cursor, 'applications', 'idx_user_id', 'user_id')
+    # Выгрузка заявок с фильтром status упорядочена по id
+    add_index(cursor, 'applications', 'idx_status', 'status')
+    # Заявки тендера ищутся по началу unique_application
+    drop_index(cursor, 'applications', 'idx_tender_id')
+
+MIGRATIONS = [
+    (1, 'Таблицы тендеров, заявок, документов и статистики', [
+        TENDERS_TABLE, APPLICATIONS_TABLE, upgrade_existing_tables, ID_ALLOCATOR_TABLE
+    ] + STATS_TABLES + [TENDER_DOCUMENTS_TABLE]),
+    (2, 'Тестовые тендеры, поисковый индекс и статистика', [create_initial_data]),
+    (3, 'Индексы выборок тендеров и заявок', [update_listing_indexes]),
+    (4, 'Заявки из журнала, не принятые БД', [APPLICATION_DEAD_LETTERS_TABLE])
+]
+
+def rebuild_applications_count(cursor, tender_id=None):
+    """Пересчет счетчика заявок по таблице applications"""
+    query = '''
+        UPDATE tenders t
+        LEFT JOIN (
+            SELECT tender_id, COUNT(*) AS cnt
+            FROM applications
+            GROUP BY tender_id
+        ) a ON a.tender_id = t.id
+        SET t.applications_count = COALESCE(a.cnt, 0), t.updated_at = t.updated_at
+    '''
+    params = []
+    
+    if tender_id is not None:
+        query += ' WHERE t.id = %s'
+        params.append(tender_id)
+    
+    cursor.execute(query, params)
+    return cursor.rowcount
+
+def reindex_search_text(conn, only_missing=True, batch_size=500):
+    """Заполнение search_text пакетами по возрастанию id"""
+    read_cursor = conn.cursor(dictionary=True)
+    write_cursor = conn.cursor()
+    last_id = 0
+    indexed = 0
+    
+    try:
+        while True:
+            query = 'SELECT id, title, description, customer FROM tenders WHERE id > %s'
+            if only_missing:
+                query += ' AND search_text IS NULL'
+            query += ' ORDER BY id LIMIT %s'
+            
+            read_cursor.execute(query, (last_id, batch_size))
+            rows = read_cursor.fetchall()
+            if not rows:
+                break
+            
+            write_cursor.executemany(
+                'UPDATE tenders SET search_text = %s, updated_at = updated_at WHERE id = %s',
+                [
+                    (index_text(row['title'], row['description'], row['customer']), row['id'])
+                    for row in rows
+                ]
+            )
+            conn.commit()
+            
+            last_id = rows[-1]['id']
+            indexed += len(rows)
+    finally:
+        read_cursor.close()
+        write_cursor.close()
+    
+    return indexed
+
+@app.cli.command('reindex-search')
+def reindex_search_command():
+    """Перестроить search_text для всех тендеров"""
+    conn = get_db_connection()
+    
+    try:
+        indexed = reindex_search_text(conn, only_missing=False)
+        logger.info(f"Поисковый индекс перестроен, тендеров: {indexed}")
+    finally:
+        conn.close()
+
+@app.cli.command('rebuild-applications-count')
+def rebuild_applications_count_command():
+    """Пересчитать applications_count для всех тендеров"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        updated = rebuild_applications_count(cursor)
+        conn.commit()
+        logger.info(f"Счетчик заявок пересчитан, изменено тендеров: {updated}")
     except Exception as e:
-        logger.error(f"Ошибка инициализации БД тендеров: {str(e)}")
+        logger.error(f"Ошибка пересчета счетчика заявок: {str(e)}")
         conn.rollback()
+        raise
     finally:
         cursor.close()
         conn.close()
 
 @app.route('/tenders/health')
 def health_check():
-    return jsonify({'status': 'healthy', 'service': 'tender-service'})
+    return jsonify({
+        'status': 'healthy',
+        'service': 'tender-service',
+        'db_pool': db_pool.stats(),
+        'response_cache': response_cache.stats(),
+        'application_buffer': application_buffer.stats() if application_buffer else None,
+        'tracing': tracer.stats(),
+        'slow_queries': slow_queries.stats()
+    })
 
 @app.route('/tenders', methods=['GET'])
 def get_tenders():
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = max(request.args.get('per_page', 10, type=int), 1)
         status = request.args.get('status', 'active')
         search = request.args.get('search', '')
+        # Курсорный режим: after= (пустой - с начала списка)
+        after = request.args.get('after')
+        skip_total = request.args.get('skip_total', '').lower() in ('1', 'true', 'yes')
+        
+        cursor_value = None
+        if after:
+            try:
+                cursor_value = decode_cursor(after)
+            except InvalidCursorError:
+                return jsonify({'error': 'Некорректный курсор'}), 400
+        
+        # Ключ кэша по нормализованным параметрам
+        search = ' '.join(search.lower().split())
+        cache_key = ('list', page if after is None else None, per_page, status, search, after, skip_total)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached_json_response(cached, 'HIT')
+        generation = response_cache.generation
         
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Подсчет общего количества
-        query_count = 'SELECT COUNT(*) as total FROM tenders WHERE 1=1'
-        params_count = []
+        filters, filter_params, fulltext_query = tender_filters(status, search)
+        order_by = 't.created_at DESC, t.id DESC'
+        relevance = ''
+        relevance_params = []
         
-        if status:
-            query_count += ' AND status = %s'
-            params_count.append(status)
-        
-        if search:
-            query_count += ' AND (title LIKE %s OR description LIKE %s OR customer LIKE %s)'
-            search_param = f'%{search}%'
-            params_count.extend([search_param, search_param, search_param])
+        # В курсорном режиме порядок всегда по (created_at, id)
+        if fulltext_query and after is None:
+            relevance = ', MATCH(t.search_text) AGAINST (%s IN BOOLEAN MODE) as relevance'
+            relevance_params.append(fulltext_query)
+            order_by = 'relevance DESC, t.created_at DESC, t.id DESC'
         
-        cursor.execute(query_count, params_count)
-        total = cursor.fetchone()['total']
+        # Подсчет общего количества (можно пропустить через skip_total=1)
+        total = None
+        if not skip_total:
+            cursor.execute('SELECT COUNT(*) as total FROM tenders t WHERE 1=1' + filters, filter_params)
+            total = cursor.fetchone()['total']
         
         # Получение тендеров
-        query = '''
-            SELECT t.*, 
-                   u.email as creator_email,
-                   (SELECT COUNT(*) FROM applications a WHERE a.tender_id = t.id) as applications_count
+        query = f'''
+            SELECT {TENDER_COLUMNS},
+                   u.email as creator_email{relevance}
             FROM tenders t
             LEFT JOIN users u ON t.created_by = u.id
             WHERE 1=1
-        '''
-        params = []
+        ''' + filters
+        params = relevance_params + filter_params
         
-        if status:
-            query += ' AND t.status = %s'
-            params.append(status)
+        if cursor_value is not None:
+            query += keyset_condition('t.created_at', 't.id')
+            params.extend(keyset_params(cursor_value))
         
-        if search:
-            query += ' AND (t.title LIKE %s OR t.description LIKE %s OR t.customer LIKE %s)'
-            search_param = f'%{search}%'
-            params.extend([search_param, search_param, search_param])
+        # Лишняя строка нужна, чтобы узнать, есть ли следующая страница
+        query += f' ORDER BY {order_by} LIMIT %s'
+        params.append(per_page + 1)
         
-        query += ' ORDER BY t.created_at DESC LIMIT %s OFFSET %s'
-        offset = (page - 1) * per_page
-        params.extend([per_page, offset])
+        if after is None:
+            query += ' OFFSET %s'
+            params.append((page - 1) * per_page)
         
         cursor.execute(query, params)
-        tenders = cursor.fetchall()
+        rows = cursor.fetchall()
         
         cursor.close()
         conn.close()
         
-        return jsonify({
-            'tenders': tenders,
+        body = jsonify({
+            'tenders': rows[:per_page],
             'total': total,
             'page': page,
             'per_page': per_page,
-            'total_pages': (total + per_page - 1) // per_page
-        })
+            'total_pages': (total + per_page - 1) // per_page if total is not None else None,
+            # Курсор не согласован с сортировкой по релевантности
+            'next_cursor': next_cursor(rows, per_page) if not relevance else None
+        }).get_data()
+        
+        # Страница сбрасывается при изменении любого тендера на ней
+        # и при появлении тендеров в ее статусе
+        tags = [f'tender:{row["id"]}' for row in rows[:per_page]]
+        tags.append(f'status:{status or "*"}')
+        entry = response_cache.set(cache_key, body, tags, generation=generation)
+        return cached_json_response(entry, 'MISS')
         
     except Exception as e:
         logger.error(f"Ошибка получения списка тендеров: {str(e)}")
         return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
 
+INSERT_TENDER_SQL = '''
+    INSERT INTO tenders 
+    (title, description, customer, budget, currency, status, tender_type, deadline, created_by, search_text)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+'''
+
+# Обязательные поля тендера
+REQUIRED_TENDER_FIELDS = ['title', 'customer', 'deadline']
+# Строковые поля тендера и их предельная длина (None - TEXT)
+TENDER_TEXT_FIELDS = {'title': 500, 'customer': 255, 'description': None}
+# Денежные поля - DECIMAL(15,2)
+MAX_AMOUNT = Decimal('9999999999999.99')
+AMOUNT_STEP = Decimal('0.01')
+
+def parse_amount(value):
+    """Decimal из числа или строки; None, если значение не число"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        return None
+    return amount if amount.is_finite() else None
+
+def validate_tender(data):
+    """Текст ошибки валидации или None"""
+    if not isinstance(data, dict):
+        return 'Ожидается JSON-объект'
+    for field in REQUIRED_TENDER_FIELDS:
+        if not data.get(field):
+            return f'Поле {field} обязательно'
+    # Типы проверяются до построения поискового текста и записи в БД:
+    # иначе строка импорта с числом в title роняет весь запрос
+    for field, max_length in TENDER_TEXT_FIELDS.items():
+        value = data.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            return f'Поле {field} должно быть строкой'
+        if max_length is not None and len(value) > max_length:
+            return f'Поле {field} длиннее {max_length} символов'
+    if not isinstance(data['deadline'], str):
+        return 'Поле deadline должно быть строкой с датой'
+    if data.get('budget') is not None:
+        budget = parse_amount(data['budget'])
+        if budget is None or budget < 0 or budget > MAX_AMOUNT or budget != budget.quantize(AMOUNT_STEP):
+            return f'Бюджет должен быть неотрицательным числом до {MAX_AMOUNT} с точностью до копеек'
+    return None
+
+def stats_key(row):
+    """(статус, валюта, бюджет) из значений tender_row() - для статистики"""
+    return row[5], row[4], row[3]
+
+def tender_row(data, user_id):
+    """Значения для INSERT_TENDER_SQL"""
+    return (
+        data['title'],
+        data.get('description', ''),
+        data['customer'],
+        data.get('budget'),
+        data.get('currency', 'RUB'),
+        data.get('status', 'draft'),
+        data.get('tender_type', 'open'),
+        data['deadline'],
+        user_id,
+        index_text(data['title'], data.get('description', ''), data['customer'])
+    )
+
 @app.route('/tenders', methods=['POST'])
 def create_tender():
     try:
@@ -184,35 +538,24 @@ def create_tender():
         data = request.get_json()
         
         # Валидация обязательных полей
-        required_fields = ['title', 'customer', 'deadline']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'Поле {field} обязательно'}), 400
+        error = validate_tender(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO tenders 
-            (title, description, customer, budget, currency, status, tender_type, deadline, created_by)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ''', (
-            data['title'],
-            data.get('description', ''),
-            data['customer'],
-            data.get('budget'),
-            data.get('currency', 'RUB'),
-            data.get('status', 'draft'),
-            data.get('tender_type', 'open'),
-            data['deadline'],
-            user_id
-        ))
+        row = tender_row(data, user_id)
+        cursor.execute(INSERT_TENDER_SQL, row)
         
         tender_id = cursor.lastrowid
+        record_tenders(cursor, [stats_key(row)])
         conn.commit()
         cursor.close()
         conn.close()
         
+        invalidate_tender(tender_id, data.get('status', 'draft'))
+        
         logger.info(f"Создан новый тендер {tender_id} пользователем {user_id}")
         
         # Здесь будет вызов сервиса уведомлений
@@ -227,14 +570,397 @@ def create_tender():
         logger.error(f"Ошибка создания тендера: {str(e)}")
         return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
 
+@app.route('/tenders/stats', methods=['GET'])
+def get_stats():
+    """Сводная статистика для отчетов (admin/manager) из сводных таблиц"""
+    try:
+        user_role = request.headers.get('X-User-Role')
+        
+        if user_role not in ['admin', 'manager']:
+            return jsonify({'error': 'Недостаточно прав для просмотра статистики'}), 403
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        result = read_stats(cursor)
+        cursor.close()
+        conn.close()
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Ошибка получения статистики: {str(e)}")
+        return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
+
+@app.route('/tenders/stats/rebuild', methods=['POST'])
+def rebuild_stats_tables():
+    """Пересчет статистики с нуля (admin)"""
+    try:
+        user_role = request.headers.get('X-User-Role')
+        
+        if user_role != 'admin':
+            return jsonify({'error': 'Недостаточно прав для пересчета статистики'}), 403
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        try:
+            rebuild_stats(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        result = read_stats(cursor)
+        cursor.close()
+        conn.close()
+        
+        logger.info("Статистика тендеров пересчитана")
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Ошибка пересчета статистики: {str(e)}")
+        return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
+
+# Максимум тендеров в одном запросе /tenders/batch
+MAX_BATCH_IDS = int(os.environ.get('TENDER_BATCH_MAX_IDS', 100))
+
+def parse_batch_ids(values):
+    """Идентификаторы из ids=1,2,3 (можно несколько параметров ids) в порядке запроса"""
+    ids = []
+    for value in values:
+        for part in value.split(','):
+            part = part.strip()
+            if part:
+                ids.append(int(part))
+    return ids
+
+# Размер пачки вставки и максимум ошибок в отчете импорта
+IMPORT_BATCH_SIZE = int(os.environ.get('TENDER_IMPORT_BATCH_SIZE', 500))
+IMPORT_MAX_ERRORS = int(os.environ.get('TENDER_IMPORT_MAX_ERRORS', 1000))
+
+def insert_tender_batch(conn, cursor, batch):
+    """Вставка пачки [(номер строки, значения)] одной транзакцией.
+    
+    Если пачка отклонена БД, строки вставляются по одной, чтобы найти
+    ошибочные. Возвращает [(номер строки, ошибка)].
+    """
+    try:
+        cursor.executemany(INSERT_TENDER_SQL, [row for _, row in batch])
+        record_tenders(cursor, [stats_key(row) for _, row in batch])
+        conn.commit()
+        return []
+    except mysql.connector.Error:
+        conn.rollback()
+    
+    errors = []
+    inserted = []
+    for line_no, row in batch:
+        try:
+            cursor.execute(INSERT_TENDER_SQL, row)
+            inserted.append(stats_key(row))
+        except mysql.connector.Error as e:
+            errors.append((line_no, e.msg))
+    record_tenders(cursor, inserted)
+    conn.commit()
+    return errors
+
+@app.route('/tenders/import', methods=['POST'])
+def import_tenders():
+    """Импорт тендеров из NDJSON (один JSON-объект в строке) потоком"""
+    try:
+        user_id = request.headers.get('X-User-ID')
+        user_role = request.headers.get('X-User-Role')
+        
+        if user_role not in ['admin', 'manager']:
+            return jsonify({'error': 'Недостаточно прав для импорта тендеров'}), 403
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        imported = 0
+        failed = 0
+        errors = []
+        batch = []
+        
+        def add_error(line_no, message):
+            # Отчет ограничен, чтобы память не зависела от объема ввода
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({'line': line_no, 'error': message})
+        
+        def flush():
+            nonlocal imported, failed
+            batch_errors = insert_tender_batch(conn, cursor, batch)
+            for line_no, message in batch_errors:
+                add_error(line_no, message)
+            imported += len(batch) - len(batch_errors)
+            failed += len(batch_errors)
+            batch.clear()
+            # Новые тендеры могут попасть в любую закэшированную выборку
+            response_cache.clear()
+        
+        # Тело читается построчно, без загрузки целиком
+        for line_no, line in enumerate(request.stream, start=1):
+            if not line.strip():
+                continue
+            
+            try:
+                data = json.loads(line)
+            except ValueError:
+                failed += 1
+                add_error(line_no, 'Некорректный JSON')
+                continue
+            
+            error = validate_tender(data)
+            if error:
+                failed += 1
+                add_error(line_no, error)
+                continue
+            
+            batch.append((line_no, tender_row(data, user_id)))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+        
+        if batch:
+            flush()
+        
+        cursor.close()
+        conn.close()
+        
+        logger.info(f"Импорт тендеров пользователем {user_id}: загружено {imported}, ошибок {failed}")
+        
+        return jsonify({
+            'message': 'Импорт завершен',
+            'imported': imported,
+            'failed': failed,
+            'errors': errors,
+            'errors_truncated': failed > len(errors)
+        })
+        
+    except Exception as e:
+        logger.error(f"Ошибка импорта тендеров: {str(e)}")
+        return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
+
+# Выгрузка держит соединение с БД все время передачи, поэтому
+# одновременных выгрузок немного, а остальным запросам хватает пула
+EXPORT_FETCH_SIZE = int(os.environ.get('TENDER_EXPORT_FETCH_SIZE', 1000))
+EXPORT_NET_WRITE_TIMEOUT = int(os.environ.get('TENDER_EXPORT_NET_WRITE_TIMEOUT', 600))
+export_slots = threading.BoundedSemaphore(int(os.environ.get('TENDER_EXPORT_MAX_CONCURRENT', 2)))
+
+def export_response(query, params, name):
+    """Потоковая выгрузка результата запроса.
+    
+    Формат - параметр format (ndjson или csv), сжатие gzip - по Accept-Encoding.
+    Строки читаются небуферизованным курсором пачками по EXPORT_FETCH_SIZE.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Формат выгрузки: ndjson или csv'}), 400
+    
+    if not export_slots.acquire(blocking=False):
+        response = jsonify({'error': 'Слишком много одновременных выгрузок, повторите позже'})
+        response.headers['Retry-After'] = '10'
+        return response, 503
+    
+    conn = None
+    try:
+        # Соединение закрывается по окончании передачи, а не в teardown запроса
+        conn = db_pool.connection(track=False)
+        cursor = conn.cursor()
+        # Клиент может читать медленно: сервер не должен обрывать передачу
+        cursor.execute('SET SESSION net_write_timeout = %s', (EXPORT_NET_WRITE_TIMEOUT,))
+        cursor.execute(query, params)
+        columns = list(cursor.column_names)
+    except Exception:
+        if conn is not None:
+            conn.invalidate()
+        export_slots.release()
+        raise
+    
+    state = {'closed': False, 'completed': False}
+    
+    def cleanup():
+        if state['closed']:
+            return
+        state['closed'] = True
+        if state['completed']:
+            cursor.close()
+            conn.close()
+        else:
+            # Непрочитанный остаток результата: соединение в пул не возвращаем
+            conn.invalidate()
+        export_slots.release()
+    
+    use_gzip = request.accept_encodings['gzip'] > 0
+    
+    def generate():
+        batches = iter_batches(cursor, EXPORT_FETCH_SIZE)
+        if export_format == 'csv':
+            chunks = csv_chunks(columns, batches)
+        else:
+            chunks = ndjson_chunks(columns, batches)
+        if use_gzip:
+            chunks = gzip_chunks(chunks)
+        
+        try:
+            yield from chunks
+            state['completed'] = True
+        finally:
+            cleanup()
+    
+    response = Response(generate(), content_type=EXPORT_FORMATS[export_format])
+    # Ответ может быть закрыт, так и не начав передачу
+    response.call_on_close(cleanup)
+    response.headers['Content-Disposition'] = f'attachment; filename={name}.{export_format}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+@app.route('/tenders/export', methods=['GET'])
+def export_tenders():
+    """Выгрузка каталога тендеров с фильтрами как у GET /tenders"""
+    try:
+        status = request.args.get('status', 'active')
+        search = request.args.get('search', '')
+        filters, params, _ = tender_filters(status, search)
+        
+        query = f'''
+            SELECT {TENDER_COLUMNS}
+            FROM tenders t
+            WHERE 1=1{filters}
+            ORDER BY t.created_at DESC, t.id DESC
+        '''
+        return export_response(query, params, 'tenders')
+        
+    except Exception as e:
+        logger.error(f"Ошибка выгрузки тендеров: {str(e)}")
+        return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
+
+@app.route('/tenders/applications/export', methods=['GET'])
+def export_applications():
+    """Выгрузка заявок (admin/manager); фильтры tender_id, user_id, status"""
+    try:
+        user_role = request.headers.get('X-User-Role')
+        
+        if user_role not in ['admin', 'manager']:
+            return jsonify({'error': 'Недостаточно прав для выгрузки заявок'}), 403
+        
+        filters = ''
+        params = []
+        
+        tender_id = request.args.get('tender_id', type=int)
+        if tender_id:
+            filters += ' AND a.tender_id = %s'
+            params.append(tender_id)
+        
+        user_id = request.args.get('user_id', type=int)
+        if user_id:
+            filters += ' AND a.user_id = %s'
+            params.append(user_id)
+        
+        status = request.args.get('status')
+        if status:
+            filters += ' AND a.status = %s'
+            params.append(status)
+        
+        query = f'''
+            SELECT a.id, a.tender_id, a.user_id, a.proposal, a.price, a.status,
+                   a.created_at, a.updated_at
+            FROM applications a
+            WHERE 1=1{filters}
+            ORDER BY a.id
+        '''
+        return export_response(query, params, 'applications')
+        
+    except Exception as e:
+        logger.error(f"Ошибка выгрузки заявок: {str(e)}")
+        return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
+
+@app.route('/tenders/batch', methods=['GET'])
+def get_tenders_batch():
+    try:
+        try:
+            ids = parse_batch_ids(request.args.getlist('ids'))
+        except ValueError:
+            return jsonify({'error': 'Параметр ids должен содержать числа через запятую'}), 400
+        
+        if not ids:
+            return jsonify({'error': 'Параметр ids обязателен'}), 400
+        
+        if len(ids) > MAX_BATCH_IDS:
+            return jsonify({'error': f'Не более {MAX_BATCH_IDS} тендеров за запрос'}), 400
+        
+        cache_key = ('batch', tuple(ids))
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached_json_response(cached, 'HIT')
+        generation = response_cache.generation
+        
+        unique_ids = list(dict.fromkeys(ids))
+        placeholders = ', '.join(['%s'] * len(unique_ids))
+        
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        
+        # Все тендеры одним запросом
+        cursor.execute(f'''
+            SELECT {TENDER_COLUMNS}, u.email as creator_email
+            FROM tenders t
+            LEFT JOIN users u ON t.created_by = u.id
+            WHERE t.id IN ({placeholders})
+        ''', unique_ids)
+        tenders = {tender['id']: tender for tender in cursor.fetchall()}
+        
+        # Документы всех найденных тендеров вторым запросом
+        documents = {tender_id: [] for tender_id in tenders}
+        if tenders:
+            found_ids = list(tenders)
+            cursor.execute(f'''
+                SELECT * FROM tender_documents
+                WHERE tender_id IN ({', '.join(['%s'] * len(found_ids))})
+                ORDER BY tender_id, id
+            ''', found_ids)
+            for document in cursor.fetchall():
+                documents[document['tender_id']].append(document)
+        
+        cursor.close()
+        conn.close()
+        
+        # Результаты в порядке запроса, для ненайденных - отметка
+        results = []
+        not_found = []
+        for tender_id in ids:
+            tender = tenders.get(tender_id)
+            if tender is None:
+                results.append({'id': tender_id, 'error': 'Тендер не найден'})
+                not_found.append(tender_id)
+            else:
+                results.append(dict(tender, documents=documents[tender_id]))
+        
+        body = jsonify({'tenders': results, 'not_found': not_found}).get_data()
+        tags = [f'tender:{tender_id}' for tender_id in unique_ids]
+        entry = response_cache.set(cache_key, body, tags, generation=generation)
+        return cached_json_response(entry, 'MISS')
+        
+    except Exception as e:
+        logger.error(f"Ошибка пакетного получения тендеров: {str(e)}")
+        return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
+
 @app.route('/tenders/<int:tender_id>', methods=['GET'])
 def get_tender_detail(tender_id):
     try:
+        cache_key = ('detail', tender_id)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached_json_response(cached, 'HIT')
+        generation = response_cache.generation
+        
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute('''
-            SELECT t.*, u.email as creator_email
+        cursor.execute(f'''
+            SELECT {TENDER_COLUMNS}, u.email as creator_email
             FROM tenders t
             LEFT JOIN users u ON t.created_by = u.id
             WHERE t.id = %s
@@ -256,53 +982,105 @@ def get_tender_detail(tender_id):
         cursor.close()
         conn.close()
         
-        return jsonify(tender)
+        entry = response_cache.set(
+            cache_key, jsonify(tender).get_data(), [f'tender:{tender_id}'], generation=generation
+        )
+        return cached_json_response(entry, 'MISS')
         
     except Exception as e:
         logger.error(f"Ошибка получения тендера: {str(e)}")
         return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
 
+# Пределы полей заявки: цена - DECIMAL(15,2), предложение - TEXT
+MAX_APPLICATION_PRICE = MAX_AMOUNT
+MAX_PROPOSAL_LENGTH = int(os.environ.get('TENDER_PROPOSAL_MAX_LENGTH', 10000))
+PRICE_STEP = AMOUNT_STEP
+
+def parse_application(data):
+    """(предложение, цена, None) или (None, None, текст ошибки валидации)"""
+    if not isinstance(data, dict) or not data.get('proposal') or not data.get('price'):
+        return None, None, 'Предложение и цена обязательны'
+    
+    proposal = data['proposal']
+    if not isinstance(proposal, str) or not proposal.strip():
+        return None, None, 'Предложение должно быть непустой строкой'
+    if len(proposal) > MAX_PROPOSAL_LENGTH:
+        return None, None, f'Предложение длиннее {MAX_PROPOSAL_LENGTH} символов'
+    
+    # Цена проверяется до записи в журнал: значение, которое не примет
+    # MySQL, не должно попасть в буфер заявок
+    price = parse_amount(data['price'])
+    if (price is None or price <= 0
+            or price > MAX_APPLICATION_PRICE or price != price.quantize(PRICE_STEP)):
+        return None, None, f'Цена должна быть положительным числом до {MAX_APPLICATION_PRICE} с точностью до копеек'
+    
+    return proposal, price.quantize(PRICE_STEP), None
+
 @app.route('/tenders/<int:tender_id>/applications', methods=['POST'])
 def create_application(tender_id):
     try:
         user_id = request.headers.get('X-User-ID')
         data = request.get_json()
         
-        if not data.get('proposal') or not data.get('price'):
-            return jsonify({'error': 'Предложение и цена обязательны'}), 400
+        proposal, price, error = parse_application(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        if application_buffer is not None:
+            return submit_buffered_application(tender_id, user_id, proposal, price)
         
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Проверяем, существует ли тендер и активен ли он
-        cursor.execute('SELECT status FROM tenders WHERE id = %s', (tender_id,))
-        tender = cursor.fetchone()
-        
-        if not tender:
-            return jsonify({'error': 'Тендер не найден'}), 404
+        # Одна транзакция: UPDATE счетчика блокирует строку тендера и сразу
+        # проверяет, что он активен; уникальность заявки обеспечивает
+        # ключ unique_application, а не предварительный SELECT
+        cursor.execute('''
+            UPDATE tenders
+            SET applications_count = applications_count + 1, updated_at = updated_at
+            WHERE id = %s AND status = 'active'
+        ''', (tender_id,))
         
-        if tender[0] != 'active':
+        if cursor.rowcount == 0:
+            conn.rollback()
+            # Редкий путь: выясняем причину отказа
+            cursor.execute('SELECT status FROM tenders WHERE id = %s', (tender_id,))
+            tender = cursor.fetchone()
+            cursor.close()
+            conn.close()
+            
+            if not tender:
+                return jsonify({'error': 'Тендер не найден'}), 404
             return jsonify({'error': 'Тендер не активен'}), 400
         
-        # Проверяем, не подавал ли пользователь уже заявку
-        cursor.execute('''
-            SELECT id FROM applications WHERE tender_id = %s AND user_id = %s
-        ''', (tender_id, user_id))
+        try:
+            cursor.execute('''
+                INSERT INTO applications (tender_id, user_id, proposal, price)
+                VALUES (%s, %s, %s, %s)
+            ''', (tender_id, user_id, proposal, price))
+        except mysql.connector.IntegrityError as e:
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            
+            if e.errno == errorcode.ER_DUP_ENTRY:
+                return jsonify({'error': 'Вы уже подали заявку на этот тендер'}), 400
+            raise
         
-        if cursor.fetchone():
-            return jsonify({'error': 'Вы уже подали заявку на этот тендер'}), 400
+        application_id = cursor.lastrowid
         
-        # Создаем заявку
-        cursor.execute('''
-            INSERT INTO applications (tender_id, user_id, proposal, price)
-            VALUES (%s, %s, %s, %s)
-        ''', (tender_id, user_id, data['proposal'], data['price']))
+        # Счетчик уже увеличен этой транзакцией, строка тендера заблокирована
+        cursor.execute('SELECT applications_count FROM tenders WHERE id = %s', (tender_id,))
+        count = cursor.fetchone()[0]
+        record_applications(cursor, [price], [(count - 1, count)])
         
-        application_id = cursor.lastrowid
         conn.commit()
         cursor.close()
         conn.close()
         
+        # Изменился счетчик заявок в деталях и списках
+        invalidate_tender(tender_id)
+        
         logger.info(f"Создана заявка {application_id} на тендер {tender_id} пользователем {user_id}")
         
         return jsonify({
@@ -314,9 +1092,30 @@ def create_application(tender_id):
         logger.error(f"Ошибка создания заявки: {str(e)}")
         return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
 
-# Инициализация БД при запуске
-with app.app_context():
-    init_db()
+def submit_buffered_application(tender_id, user_id, proposal, price):
+    """Прием заявки через журнал: 202 после fsync, запись в БД - фоном"""
+    idempotency_key = request.headers.get('Idempotency-Key') or None
+    if idempotency_key and len(idempotency_key) > 64:
+        return jsonify({'error': 'Idempotency-Key длиннее 64 символов'}), 400
+    
+    try:
+        application_id, created = application_buffer.submit(
+            tender_id, int(user_id), proposal, price, idempotency_key
+        )
+    except ApplicationRejected as e:
+        return jsonify({'error': e.message}), e.status_code
+    
+    if created:
+        logger.info(f"Принята заявка {application_id} на тендер {tender_id} пользователем {user_id}")
+    
+    return jsonify({
+        'message': 'Заявка принята',
+        'application_id': application_id,
+        'queued': True
+    }), 202
+
+# При запуске только проверяется версия схемы; миграции - flask migrate
+init_migrations(app, db_pool, MIGRATIONS)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5003, debug=True)
\ No newline at end of file
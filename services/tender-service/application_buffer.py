@@ -0,0 +1,465 @@
+"""
+Буфер записи заявок для пиковой нагрузки перед дедлайном.
+
+В этом режиме заявка сначала дописывается в локальный журнал (journal.py)
+и подтверждается клиенту сразу после fsync, с окончательным номером
+заявки. Фоновый поток переносит записи в MySQL пачками: одна транзакция
+и один commit на пачку вместо commit на каждую заявку.
+
+Гарантии:
+    - порядок: записи переносятся в порядке журнала, контрольная точка
+      сдвигается только после commit пачки;
+    - повтор после сбоя: при запуске незафиксированные записи журнала
+      переносятся заново; номер заявки задан явно, поэтому уже
+      перенесенная запись не вставляется второй раз;
+    - идемпотентность: повтор запроса с тем же Idempotency-Key
+      возвращает ту же заявку;
+    - дедлайн проверяется по времени записи в журнал, а не по времени
+      переноса в БД.
+
+Запись, которую MySQL не примет и при повторе (ошибка в ее данных,
+удаленный тендер), не блокирует очередь: пачка переносится по одной
+записи, отвергнутые сохраняются в application_dead_letters, и контрольная
+точка сдвигается дальше них. При остальных ошибках (связь с БД,
+блокировки, схема) пачка повторяется целиком.
+
+Номера заявок выдаются блоками из таблицы id_allocator, поэтому в этом
+режиме все экземпляры tender-service должны принимать заявки через буфер.
+Следующий блок резервируется заранее и без общей блокировки буфера.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+import mysql.connector
+from mysql.connector import errorcode
+
+from shared.cache import TTLCache
+from stats import record_applications
+
+logger = logging.getLogger(__name__)
+
+INSERT_APPLICATION_SQL = '''
+    INSERT INTO applications
+    (id, tender_id, user_id, proposal, price, created_at, idempotency_key)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+'''
+
+INSERT_DEAD_LETTER_SQL = '''
+    INSERT INTO application_dead_letters (application_id, journal_seq, payload, error)
+    VALUES (%s, %s, %s, %s)
+'''
+
+# Ошибки в данных записи: значение, длина, NULL, внешний ключ, CHECK
+REJECTED_ERRNOS = (
+    errorcode.ER_BAD_NULL_ERROR, errorcode.ER_WARN_DATA_OUT_OF_RANGE,
+    errorcode.WARN_DATA_TRUNCATED, errorcode.ER_TRUNCATED_WRONG_VALUE,
+    errorcode.ER_TRUNCATED_WRONG_VALUE_FOR_FIELD, errorcode.ER_DATA_TOO_LONG,
+    errorcode.ER_NO_REFERENCED_ROW_2, errorcode.ER_CHECK_CONSTRAINT_VIOLATED
+)
+
+
+def is_rejected(error):
+    """MySQL не примет запись и при повторе: ошибка в ее данных"""
+    errno = getattr(error, 'errno', -1)
+    # Без кода ошибки сервера - значение не преобразовано еще в клиенте
+    return errno is None or errno < 0 or errno in REJECTED_ERRNOS
+
+
+def is_duplicate(error):
+    return getattr(error, 'errno', None) == errorcode.ER_DUP_ENTRY
+
+
+class ApplicationRejected(Exception):
+    """Заявка не принята; status_code и сообщение - для ответа клиенту"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class ApplicationBuffer:
+    """Прием заявок через журнал и групповой перенос в MySQL"""
+
+    def __init__(self, journal, get_connection, on_commit=None, batch_size=200,
+                 id_block_size=1000, retry_interval=1.0):
+        self.journal = journal
+        self._get_connection = get_connection
+        self._on_commit = on_commit
+        self.batch_size = batch_size
+        self.id_block_size = id_block_size
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._has_records = threading.Condition(self._lock)
+        self._queue = deque()
+        # Незафиксированные заявки: (тендер, пользователь) и ключи идемпотентности
+        self._pending_pairs = set()
+        self._pending_keys = {}
+        # Недавно перенесенные - на время, пока их может не увидеть чтение из БД
+        self._recent_pairs = TTLCache(maxsize=100000, ttl=60)
+        self._recent_keys = TTLCache(maxsize=100000, ttl=60)
+
+        self._next_id = 0
+        self._block_end = 0
+        # Зарезервированный заранее следующий блок номеров
+        self._spare_block = None
+        self._reserve_lock = threading.Lock()
+
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+        self.accepted = 0
+        self.rejected = 0
+        self.committed = 0
+        self.batches = 0
+        self.replayed = 0
+        self.errors = 0
+        self.dead_letters = 0
+        self.checkpoint_errors = 0
+        self.last_checkpoint_error = None
+
+    def start(self):
+        """Открытие журнала, повтор незафиксированных записей, запуск переноса"""
+        with self._start_lock:
+            if self._started:
+                return
+            records = self.journal.open()
+            with self._lock:
+                for record in records:
+                    self._enqueue(record)
+            self.replayed = len(records)
+            if records:
+                logger.info(f"Журнал заявок: к повторному переносу {len(records)} записей")
+
+            self._thread = threading.Thread(
+                target=self._run, name='application-writer', daemon=True
+            )
+            self._thread.start()
+            self._started = True
+
+    def _enqueue(self, record):
+        self._queue.append(record)
+        self._pending_pairs.add((record['tender_id'], record['user_id']))
+        if record.get('key'):
+            self._pending_keys[record['key']] = record['id']
+
+    def submit(self, tender_id, user_id, proposal, price, idempotency_key=None):
+        """Прием заявки; возвращает (номер заявки, создана ли новая).
+
+        При отказе - ApplicationRejected.
+        """
+        received_at = datetime.now()
+        pair = (tender_id, user_id)
+
+        existing_id = self._find_existing(tender_id, user_id, idempotency_key, received_at)
+        if existing_id is not None:
+            return existing_id, False
+
+        while True:
+            # Запрос к БД за новым блоком номеров - до общей блокировки
+            self._prefetch_id_block()
+
+            with self._lock:
+                # Повторная проверка под блокировкой: параллельный запрос
+                # того же пользователя мог успеть попасть в журнал
+                if idempotency_key and idempotency_key in self._pending_keys:
+                    return self._pending_keys[idempotency_key], False
+                if pair in self._pending_pairs or self._recent_pairs.get(pair):
+                    self.rejected += 1
+                    raise ApplicationRejected('Вы уже подали заявку на этот тендер')
+
+                application_id = self._allocate_id()
+                if application_id is None:
+                    # Номера разобрали параллельные запросы - резервируем еще
+                    continue
+
+                record = {
+                    'id': application_id,
+                    'tender_id': tender_id,
+                    'user_id': user_id,
+                    'proposal': proposal,
+                    'price': str(price),
+                    'ts': received_at.isoformat(sep=' '),
+                    'key': idempotency_key
+                }
+                # Запись в журнал и в очередь - под одной блокировкой,
+                # поэтому порядок переноса совпадает с порядком журнала
+                position = self.journal.write(record)
+                self._enqueue(record)
+                self._has_records.notify()
+                break
+
+        self.journal.wait_durable(position)
+        self.accepted += 1
+        return record['id'], True
+
+    def _find_existing(self, tender_id, user_id, idempotency_key, received_at):
+        """Проверки по БД: тендер, дедлайн, повтор ключа, дубликат заявки"""
+        if idempotency_key:
+            with self._lock:
+                known_id = self._pending_keys.get(idempotency_key)
+            if known_id is None:
+                known_id = self._recent_keys.get(idempotency_key)
+            if known_id is not None:
+                return known_id
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT t.status, t.deadline,
+                       (SELECT a.id FROM applications a
+                        WHERE a.tender_id = t.id AND a.user_id = %s) as pair_id,
+                       (SELECT a.id FROM applications a
+                        WHERE a.idempotency_key = %s) as key_id
+                FROM tenders t
+                WHERE t.id = %s
+            ''', (user_id, idempotency_key, tender_id))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+
+        if row is None:
+            raise ApplicationRejected('Тендер не найден', 404)
+
+        status, deadline, pair_id, key_id = row
+        if key_id is not None:
+            return key_id
+        if status != 'active':
+            self.rejected += 1
+            raise ApplicationRejected('Тендер не активен')
+        if deadline is not None and received_at > deadline:
+            self.rejected += 1
+            raise ApplicationRejected('Срок подачи заявок истек')
+        if pair_id is not None:
+            self.rejected += 1
+            raise ApplicationRejected('Вы уже подали заявку на этот тендер')
+        return None
+
+    def _allocate_id(self):
+        """Следующий номер заявки или None, если блоки номеров кончились.
+
+        Вызывается под self._lock; к БД не обращается.
+        """
+        if self._next_id >= self._block_end:
+            if self._spare_block is None:
+                return None
+            self._next_id, self._block_end = self._spare_block
+            self._spare_block = None
+        application_id = self._next_id
+        self._next_id += 1
+        return application_id
+
+    def _needs_id_block(self):
+        # Следующий блок резервируется, когда текущий израсходован наполовину
+        return self._spare_block is None and self._block_end - self._next_id <= self.id_block_size // 2
+
+    def _prefetch_id_block(self):
+        """Резерв следующего блока в id_allocator заранее, без self._lock"""
+        with self._lock:
+            if not self._needs_id_block():
+                return
+        # Резервирует один поток; остальные продолжают выдавать номера
+        # из текущего блока и ждут здесь, только если он кончился
+        with self._reserve_lock:
+            with self._lock:
+                if not self._needs_id_block():
+                    return
+            try:
+                block = self._reserve_id_block()
+            except Exception as e:
+                with self._lock:
+                    exhausted = self._next_id >= self._block_end
+                if exhausted:
+                    raise
+                # Номера текущего блока еще есть - повторим со следующей заявкой
+                logger.warning(f"Ошибка резервирования блока номеров заявок: {str(e)}")
+                return
+            with self._lock:
+                self._spare_block = block
+
+    def _reserve_id_block(self):
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "INSERT IGNORE INTO id_allocator (name, next_id) VALUES ('applications', 1)"
+            )
+            cursor.execute(
+                "SELECT next_id FROM id_allocator WHERE name = 'applications' FOR UPDATE"
+            )
+            next_id = cursor.fetchone()[0]
+            # Номера, выданные AUTO_INCREMENT до включения буфера, пропускаем
+            cursor.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM applications')
+            start = max(next_id, cursor.fetchone()[0])
+            end = start + self.id_block_size
+            cursor.execute(
+                "UPDATE id_allocator SET next_id = %s WHERE name = 'applications'", (end,)
+            )
+            conn.commit()
+            return start, end
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._has_records.wait()
+                batch = [self._queue[i] for i in range(min(self.batch_size, len(self._queue)))]
+
+            try:
+                counts, dead = self._commit_batch(batch)
+            except Exception as e:
+                # Пачка остается в очереди и переносится повторно
+                self.errors += 1
+                logger.error(f"Ошибка переноса заявок из журнала: {str(e)}")
+                time.sleep(self.retry_interval)
+                continue
+
+            with self._lock:
+                for record in batch:
+                    self._queue.popleft()
+                    pair = (record['tender_id'], record['user_id'])
+                    self._pending_pairs.discard(pair)
+                    if record['id'] in dead:
+                        # Заявки нет в БД - ее можно подать снова
+                        if record.get('key'):
+                            self._pending_keys.pop(record['key'], None)
+                        continue
+                    self._recent_pairs.set(pair, True)
+                    if record.get('key'):
+                        self._pending_keys.pop(record['key'], None)
+                        self._recent_keys.set(record['key'], record['id'])
+            self._checkpoint(batch[-1]['seq'])
+
+            self.committed += sum(counts.values())
+            self.dead_letters += len(dead)
+            self.batches += 1
+            if self._on_commit is not None:
+                try:
+                    self._on_commit(counts)
+                except Exception as e:
+                    logger.error(f"Ошибка обработки перенесенных заявок: {str(e)}")
+
+    def _checkpoint(self, seq):
+        """Сдвиг контрольной точки журнала после commit пачки.
+
+        Пачка уже в БД, поэтому при ошибке она не повторяется: контрольную
+        точку сдвинет следующая пачка, а при перезапуске такие записи будут
+        пропущены как уже записанные. Ошибка видна в stats().
+        """
+        try:
+            self.journal.checkpoint(seq)
+            self.journal.truncate_if_drained()
+            self.last_checkpoint_error = None
+        except Exception as e:
+            self.checkpoint_errors += 1
+            self.last_checkpoint_error = str(e)
+            logger.error(f"Ошибка контрольной точки журнала заявок: {str(e)}")
+
+    def _commit_batch(self, batch):
+        """Перенос пачки одной транзакцией.
+
+        Возвращает ({тендер: добавлено заявок}, номера заявок, отложенных
+        в application_dead_letters).
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            rows = [
+                (r['id'], r['tender_id'], r['user_id'], r['proposal'], r['price'],
+                 r['ts'][:19], r.get('key'))
+                for r in batch
+            ]
+            dead = set()
+            try:
+                cursor.executemany(INSERT_APPLICATION_SQL, rows)
+                inserted = batch
+            except Exception as e:
+                if not (is_duplicate(e) or is_rejected(e)):
+                    raise
+                # Часть записей уже в БД (повтор после сбоя), дублирует другую
+                # или не принимается MySQL: вставляем по одной. Ошибка одной
+                # вставки в MySQL откатывает только ее, а не транзакцию
+                conn.rollback()
+                inserted = []
+                for record, row in zip(batch, rows):
+                    try:
+                        cursor.execute(INSERT_APPLICATION_SQL, row)
+                    except Exception as e:
+                        if is_duplicate(e):
+                            logger.warning(f"Заявка {record['id']} из журнала уже записана или дублирует другую")
+                        elif is_rejected(e):
+                            self._dead_letter(cursor, record, e)
+                            dead.add(record['id'])
+                        else:
+                            raise
+                    else:
+                        inserted.append(record)
+            counts = Counter(r['tender_id'] for r in inserted)
+
+            # Счетчики в порядке номеров тендеров - без взаимных блокировок
+            for tender_id in sorted(counts):
+                cursor.execute('''
+                    UPDATE tenders
+                    SET applications_count = applications_count + %s, updated_at = updated_at
+                    WHERE id = %s
+                ''', (counts[tender_id], tender_id))
+
+            tender_counts = []
+            if counts:
+                placeholders = ', '.join(['%s'] * len(counts))
+                cursor.execute(
+                    f'SELECT id, applications_count FROM tenders WHERE id IN ({placeholders})',
+                    list(counts)
+                )
+                tender_counts = [(count - counts[tender_id], count)
+                                 for tender_id, count in cursor.fetchall()]
+            record_applications(cursor, [r['price'] for r in inserted], tender_counts)
+
+            conn.commit()
+            return counts, dead
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _dead_letter(self, cursor, record, error):
+        """Запись, которую MySQL не принимает, - в application_dead_letters"""
+        logger.error(f"Заявка {record['id']} из журнала не принята БД и отложена: {str(error)}")
+        cursor.execute(INSERT_DEAD_LETTER_SQL, (
+            record['id'], record['seq'], json.dumps(record, ensure_ascii=False, default=str),
+            str(error)[:500]
+        ))
+
+    def stats(self):
+        with self._lock:
+            queued = len(self._queue)
+        return {
+            'queued': queued,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'committed': self.committed,
+            'batches': self.batches,
+            'replayed': self.replayed,
+            'errors': self.errors,
+            'dead_letters': self.dead_letters,
+            'checkpoint_errors': self.checkpoint_errors,
+            'last_checkpoint_error': self.last_checkpoint_error,
+            'journal': self.journal.stats()
+        }
@@ -0,0 +1,71 @@
+"""
+Потоковая выгрузка результатов запроса в NDJSON и CSV.
+
+Строки читаются из небуферизованного курсора пачками по fetch_size и
+сразу сериализуются, поэтому в памяти находится не больше одной пачки
+при любом объеме выгрузки. Сжатие gzip выполняется тем же потоком.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+# Формат -> Content-Type
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+
+def iter_batches(cursor, fetch_size=1000):
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def ndjson_chunks(columns, batches):
+    """Один JSON-объект на строку; одна пачка строк - один фрагмент ответа"""
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(columns, row)), default=json_default, ensure_ascii=False) + '\n'
+            for row in rows
+        ).encode('utf-8')
+
+
+def csv_chunks(columns, batches):
+    """CSV с заголовком; BOM нужен, чтобы Excel распознал UTF-8"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,172 @@
+"""
+Локальный журнал упреждающей записи (append-only) для заявок.
+
+Каждая запись - строка JSON с порядковым номером seq. Запись считается
+принятой, когда строка сброшена на диск (fsync); потоки, ждущие сброса
+одновременно, обслуживаются одним fsync (групповая синхронизация).
+
+Номер последней записи, перенесенной в MySQL, хранится в файле
+<путь>.checkpoint (атомарная замена через rename). При запуске open()
+возвращает записи после контрольной точки в исходном порядке; оборванная
+при сбое последняя строка отбрасывается. Когда все записи перенесены,
+журнал усекается.
+
+Журнал пишет только один процесс: open() берет исключительную блокировку
+flock на файл и сразу завершается JournalLockedError, если файл уже открыт
+другим процессом или воркером.
+"""
+
+import fcntl
+import json
+import os
+import threading
+
+
+class JournalLockedError(Exception):
+    """Журнал уже открыт другим процессом"""
+
+
+def fsync_directory(path):
+    """Сброс на диск записи каталога (результата rename или создания файла)"""
+    fd = os.open(os.path.dirname(path) or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """Журнал JSON-записей с номерами и групповым fsync"""
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.checkpoint_path = path + '.checkpoint'
+        self.fsync = fsync
+
+        self._file = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        # Логические счетчики байт: не сбрасываются при усечении файла
+        self._written = 0
+        self._synced = 0
+
+        self.committed_seq = 0
+        self.last_seq = 0
+
+        self.appends = 0
+        self.fsyncs = 0
+        self.truncations = 0
+
+    def open(self):
+        """Открытие журнала; возвращает незафиксированные записи для повтора"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Блокировка берется до чтения: другой процесс не должен дописывать
+        # журнал, пока этот процесс повторяет из него записи
+        self._file = open(self.path, 'ab')
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._file.close()
+            self._file = None
+            raise JournalLockedError(f'Журнал {self.path} уже открыт другим процессом')
+
+        self.committed_seq = self._read_checkpoint()
+        self.last_seq = self.committed_seq
+
+        records = []
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid_size += len(line)
+                self.last_seq = max(self.last_seq, record['seq'])
+                if record['seq'] > self.committed_seq:
+                    records.append(record)
+
+        # Оборванный хвост удаляется, иначе следующая запись склеится с ним
+        if self._file.tell() != valid_size:
+            self._file.truncate(valid_size)
+            self._file.seek(0, os.SEEK_END)
+            os.fsync(self._file.fileno())
+        return records
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def write(self, record):
+        """Дописать запись (без fsync); возвращает позицию для wait_durable()"""
+        with self._lock:
+            self.last_seq += 1
+            record['seq'] = self.last_seq
+            data = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+            self._file.write(data)
+            self._file.flush()
+            self._written += len(data)
+            self.appends += 1
+            return self._written
+
+    def wait_durable(self, position):
+        """Дождаться, пока запись до position окажется на диске"""
+        if not self.fsync:
+            return
+        with self._sync_lock:
+            if self._synced >= position:
+                # Сброшено чужим fsync, пока мы ждали
+                return
+            with self._lock:
+                target = self._written
+            os.fsync(self._file.fileno())
+            self._synced = target
+            self.fsyncs += 1
+
+    def checkpoint(self, seq):
+        """Записи до seq включительно перенесены в БД"""
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(str(seq))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        # Без сброса каталога rename может потеряться при сбое, и уже
+        # перенесенные записи будут повторены
+        fsync_directory(self.checkpoint_path)
+        self.committed_seq = seq
+
+    def truncate_if_drained(self):
+        """Усечение журнала, если все записи перенесены"""
+        with self._lock:
+            if self.last_seq != self.committed_seq or self._file.tell() == 0:
+                return False
+            self._file.truncate(0)
+            self._file.seek(0)
+            os.fsync(self._file.fileno())
+            self.truncations += 1
+            return True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'last_seq': self.last_seq,
+            'committed_seq': self.committed_seq,
+            'pending': self.last_seq - self.committed_seq,
+            'appends': self.appends,
+            'fsyncs': self.fsyncs,
+            'truncations': self.truncations
+        }
@@ -0,0 +1,207 @@
+"""
+Полнотекстовый поиск тендеров.
+
+InnoDB FULLTEXT не умеет стемминг, поэтому в tenders.search_text
+хранятся основы слов (стеммер Snowball для русского языка) из названия,
+описания и заказчика, а поисковый запрос приводится к тем же основам
+и выполняется через MATCH ... AGAINST в BOOLEAN MODE.
+"""
+
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+# Основы короче innodb_ft_min_token_size (по умолчанию 3) не индексируются
+MIN_TOKEN_SIZE = 3
+
+# Ограничение числа слов в запросе
+MAX_QUERY_TERMS = 10
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+CYRILLIC_RE = re.compile(r'^[а-я]+$')
+
+
+def _longest(*endings):
+    """Окончания в порядке убывания длины: ищется самое длинное"""
+    return tuple(sorted(endings, key=len, reverse=True))
+
+
+PERFECTIVE_GERUND_1 = _longest('вшись', 'вши', 'в')
+PERFECTIVE_GERUND_2 = _longest('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв')
+ADJECTIVE = _longest(
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому',
+    'ее', 'ие', 'ые', 'ое', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+    'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею'
+)
+PARTICIPLE_1 = _longest('ем', 'нн', 'вш', 'ющ', 'щ')
+PARTICIPLE_2 = _longest('ивш', 'ывш', 'ующ')
+REFLEXIVE = _longest('ся', 'сь')
+VERB_1 = _longest(
+    'ете', 'йте', 'ешь', 'нно',
+    'ла', 'на', 'ли', 'ем', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'й', 'л', 'н'
+)
+VERB_2 = _longest(
+    'ейте', 'уйте',
+    'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило', 'ыло', 'ено', 'ует', 'уют',
+    'ены', 'ить', 'ыть', 'ишь',
+    'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю'
+)
+NOUN = _longest(
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях',
+    'ев', 'ов', 'ие', 'ье', 'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом',
+    'ах', 'ях', 'ию', 'ью', 'ия', 'ья',
+    'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю', 'я'
+)
+SUPERLATIVE = _longest('ейше', 'ейш')
+DERIVATIONAL = _longest('ость', 'ост')
+
+
+def _regions(word):
+    """Начало областей RV и R2 (индексы в слове)"""
+    rv = len(word)
+    for i, ch in enumerate(word):
+        if ch in VOWELS:
+            rv = i + 1
+            break
+
+    def after_vowel_consonant(start):
+        for i in range(start + 1, len(word)):
+            if word[i] not in VOWELS and word[i - 1] in VOWELS:
+                return i + 1
+        return len(word)
+
+    r1 = after_vowel_consonant(0)
+    r2 = after_vowel_consonant(r1)
+    return rv, r2
+
+
+def _strip_preceded(word, start, endings):
+    """Окончания группы 1: должны следовать за 'а' или 'я' внутри RV"""
+    for ending in endings:
+        pos = len(word) - len(ending)
+        if word.endswith(ending) and pos - 1 >= start and word[pos - 1] in 'ая':
+            return word[:pos]
+    return None
+
+
+def _strip(word, start, endings):
+    for ending in endings:
+        if word.endswith(ending) and len(word) - len(ending) >= start:
+            return word[:-len(ending)]
+    return None
+
+
+def _strip_adjectival(word, start):
+    stripped = _strip(word, start, ADJECTIVE)
+    if stripped is None:
+        return None
+    participle = _strip_preceded(stripped, start, PARTICIPLE_1)
+    if participle is None:
+        participle = _strip(stripped, start, PARTICIPLE_2)
+    return participle if participle is not None else stripped
+
+
+def _strip_verb(word, start):
+    stripped = _strip_preceded(word, start, VERB_1)
+    return stripped if stripped is not None else _strip(word, start, VERB_2)
+
+
+def _strip_noun(word, start):
+    return _strip(word, start, NOUN)
+
+
+def stem(word):
+    """Основа русского слова по алгоритму Snowball"""
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC_RE.match(word):
+        return word
+
+    rv, r2 = _regions(word)
+
+    # Шаг 1
+    stripped = _strip_preceded(word, rv, PERFECTIVE_GERUND_1)
+    if stripped is None:
+        stripped = _strip(word, rv, PERFECTIVE_GERUND_2)
+    if stripped is not None:
+        word = stripped
+    else:
+        stripped = _strip(word, rv, REFLEXIVE)
+        if stripped is not None:
+            word = stripped
+        for strip in (_strip_adjectival, _strip_verb, _strip_noun):
+            stripped = strip(word, rv)
+            if stripped is not None:
+                word = stripped
+                break
+
+    # Шаг 2
+    stripped = _strip(word, rv, ('и',))
+    if stripped is not None:
+        word = stripped
+
+    # Шаг 3: словообразовательные суффиксы только внутри R2
+    stripped = _strip(word, r2, DERIVATIONAL)
+    if stripped is not None:
+        word = stripped
+
+    # Шаг 4
+    if _strip(word, rv, ('нн',)) is not None:
+        return word[:-1]
+    stripped = _strip(word, rv, SUPERLATIVE)
+    if stripped is not None:
+        word = stripped
+        return word[:-1] if _strip(word, rv, ('нн',)) is not None else word
+    stripped = _strip(word, rv, ('ь',))
+    return stripped if stripped is not None else word
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def index_text(*fields):
+    """Текст для колонки search_text: основы слов всех полей через пробел"""
+    stems = []
+    for field in fields:
+        stems.extend(stem(token) for token in tokenize(field))
+    return ' '.join(stems)
+
+
+def build_query(search):
+    """Запрос для MATCH ... AGAINST (... IN BOOLEAN MODE).
+
+    Все слова обязательны и ищутся по префиксу основы. Возвращает пустую
+    строку, если в запросе нет слов, попадающих в полнотекстовый индекс.
+    """
+    terms = []
+    for token in tokenize(search):
+        term = stem(token)
+        if len(term) >= MIN_TOKEN_SIZE and term not in terms:
+            terms.append(term)
+    return ' '.join(f'+{term}*' for term in terms[:MAX_QUERY_TERMS])
+
+
+def tender_filters(status, search):
+    """Условия выборки тендеров: (SQL после WHERE 1=1, параметры, полнотекстовый запрос)"""
+    filters = ''
+    params = []
+    fulltext_query = None
+
+    if status:
+        filters += ' AND t.status = %s'
+        params.append(status)
+
+    if search:
+        fulltext_query = build_query(search)
+
+        if fulltext_query:
+            # Поиск по основам слов через полнотекстовый индекс
+            filters += ' AND MATCH(t.search_text) AGAINST (%s IN BOOLEAN MODE)'
+            params.append(fulltext_query)
+        else:
+            # Слишком короткие слова не попадают в индекс
+            filters += ' AND (t.title LIKE %s OR t.description LIKE %s OR t.customer LIKE %s)'
+            search_param = f'%{search}%'
+            params.extend([search_param] * 3)
+
+    return filters, params, fulltext_query
@@ -0,0 +1,256 @@
+"""
+Статистика тендеров и заявок в предагрегированных таблицах.
+
+Счетчики обновляются в той же транзакции, что и запись тендера или
+заявки, поэтому чтение статистики не зависит от объема tenders и
+applications: это несколько десятков строк сводных таблиц.
+
+Каждый счетчик разбит на STATS_SLOTS строк (слот выбирается случайно),
+чтобы одновременные записи не ждали блокировку одной строки; при чтении
+слоты суммируются. rebuild() пересчитывает таблицы с нуля.
+"""
+
+import os
+import random
+from bisect import bisect_right
+from collections import Counter
+from decimal import Decimal
+
+STATS_SLOTS = int(os.environ.get('TENDER_STATS_SLOTS', 8))
+
+# Нижние границы интервалов цен заявок
+PRICE_BUCKETS = (0, 10000, 100000, 1000000, 10000000, 100000000)
+
+# Нижние границы интервалов числа заявок на тендер
+APPLICATION_COUNT_BUCKETS = (0, 1, 2, 6, 11, 51)
+
+CREATE_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS stats_tenders (
+        status VARCHAR(16) NOT NULL,
+        currency VARCHAR(3) NOT NULL,
+        slot TINYINT UNSIGNED NOT NULL,
+        tenders BIGINT NOT NULL DEFAULT 0,
+        budget_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (status, currency, slot)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS stats_application_prices (
+        bucket TINYINT UNSIGNED NOT NULL,
+        slot TINYINT UNSIGNED NOT NULL,
+        applications BIGINT NOT NULL DEFAULT 0,
+        price_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, slot)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS stats_tender_applications (
+        bucket TINYINT UNSIGNED NOT NULL,
+        slot TINYINT UNSIGNED NOT NULL,
+        tenders BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, slot)
+    )
+    '''
+]
+
+
+def bucket_of(bounds, value):
+    """Номер интервала, в который попадает значение (None и меньше нуля - в первый)"""
+    if value is None:
+        return 0
+    return max(bisect_right(bounds, value) - 1, 0)
+
+
+def bucket_sql(bounds, column):
+    """Выражение CASE для номера интервала - то же, что bucket_of()"""
+    cases = ' '.join(
+        f'WHEN {column} >= {bound} THEN {index}'
+        for index, bound in reversed(list(enumerate(bounds)))
+        if index > 0
+    )
+    return f'CASE {cases} ELSE 0 END'
+
+
+def bucket_label(bounds, index):
+    low = bounds[index]
+    if index + 1 == len(bounds):
+        return f'{low}+'
+    high = bounds[index + 1] - 1
+    return str(low) if low == high else f'{low}-{high}'
+
+
+def _slot():
+    return random.randrange(STATS_SLOTS)
+
+
+def record_tenders(cursor, tenders):
+    """Учет новых тендеров: [(статус, валюта, бюджет)]"""
+    counts = Counter()
+    budgets = Counter()
+    for status, currency, budget in tenders:
+        key = (status or 'draft', currency or 'RUB')
+        counts[key] += 1
+        budgets[key] += Decimal(str(budget)) if budget is not None else Decimal(0)
+
+    if not counts:
+        return
+
+    slot = _slot()
+    # Ключи по порядку - одинаковый порядок блокировок во всех транзакциях
+    cursor.executemany('''
+        INSERT INTO stats_tenders (status, currency, slot, tenders, budget_sum)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            tenders = tenders + VALUES(tenders),
+            budget_sum = budget_sum + VALUES(budget_sum)
+    ''', [(status, currency, slot, counts[status, currency], budgets[status, currency])
+          for status, currency in sorted(counts)])
+
+    # У нового тендера заявок нет
+    _add_tender_application_buckets(cursor, {0: sum(counts.values())})
+
+
+def record_applications(cursor, prices, tender_counts):
+    """Учет новых заявок.
+
+    prices - цены добавленных заявок; tender_counts - [(было, стало)]
+    значений applications_count для каждого затронутого тендера.
+    """
+    counts = Counter()
+    sums = Counter()
+    for price in prices:
+        price = Decimal(str(price)) if price is not None else None
+        bucket = bucket_of(PRICE_BUCKETS, price)
+        counts[bucket] += 1
+        sums[bucket] += price or Decimal(0)
+
+    slot = _slot()
+    if counts:
+        cursor.executemany('''
+            INSERT INTO stats_application_prices (bucket, slot, applications, price_sum)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                applications = applications + VALUES(applications),
+                price_sum = price_sum + VALUES(price_sum)
+        ''', [(bucket, slot, counts[bucket], sums[bucket]) for bucket in sorted(counts)])
+
+    # Тендер переходит из интервала по прежнему числу заявок в новый
+    deltas = Counter()
+    for before, after in tender_counts:
+        old_bucket = bucket_of(APPLICATION_COUNT_BUCKETS, before)
+        new_bucket = bucket_of(APPLICATION_COUNT_BUCKETS, after)
+        if old_bucket != new_bucket:
+            deltas[old_bucket] -= 1
+            deltas[new_bucket] += 1
+    _add_tender_application_buckets(cursor, deltas)
+
+
+def _add_tender_application_buckets(cursor, deltas):
+    rows = [(bucket, _slot(), delta) for bucket, delta in sorted(deltas.items()) if delta]
+    if rows:
+        cursor.executemany('''
+            INSERT INTO stats_tender_applications (bucket, slot, tenders)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE tenders = tenders + VALUES(tenders)
+        ''', rows)
+
+
+def rebuild(cursor):
+    """Пересчет сводных таблиц с нуля по tenders и applications.
+
+    Выполняется в транзакции вызывающего: INSERT ... SELECT блокирует
+    прочитанные строки, поэтому одновременные записи дождутся пересчета
+    и учтутся поверх него.
+    """
+    cursor.execute('DELETE FROM stats_tenders')
+    cursor.execute('''
+        INSERT INTO stats_tenders (status, currency, slot, tenders, budget_sum)
+        SELECT COALESCE(status, 'draft'), COALESCE(currency, 'RUB'), 0,
+               COUNT(*), COALESCE(SUM(budget), 0)
+        FROM tenders
+        GROUP BY 1, 2
+    ''')
+
+    cursor.execute('DELETE FROM stats_application_prices')
+    cursor.execute(f'''
+        INSERT INTO stats_application_prices (bucket, slot, applications, price_sum)
+        SELECT b.bucket, 0, COUNT(*), COALESCE(SUM(b.price), 0)
+        FROM (SELECT {bucket_sql(PRICE_BUCKETS, 'price')} AS bucket, price
+              FROM applications) b
+        GROUP BY b.bucket
+    ''')
+
+    cursor.execute('DELETE FROM stats_tender_applications')
+    cursor.execute(f'''
+        INSERT INTO stats_tender_applications (bucket, slot, tenders)
+        SELECT b.bucket, 0, COUNT(*)
+        FROM (SELECT {bucket_sql(APPLICATION_COUNT_BUCKETS, 'applications_count')} AS bucket
+              FROM tenders) b
+        GROUP BY b.bucket
+    ''')
+
+
+def read_stats(cursor):
+    """Сводная статистика для отчетов"""
+    cursor.execute('''
+        SELECT status, currency, SUM(tenders), SUM(budget_sum)
+        FROM stats_tenders
+        GROUP BY status, currency
+    ''')
+    by_status = Counter()
+    budget_by_currency = Counter()
+    breakdown = []
+    for status, currency, tenders, budget_sum in cursor.fetchall():
+        if not tenders:
+            continue
+        by_status[status] += int(tenders)
+        budget_by_currency[currency] += budget_sum
+        breakdown.append({
+            'status': status,
+            'currency': currency,
+            'tenders': int(tenders),
+            'budget_sum': str(budget_sum)
+        })
+
+    cursor.execute('''
+        SELECT bucket, SUM(applications), SUM(price_sum)
+        FROM stats_application_prices
+        GROUP BY bucket
+    ''')
+    prices = {bucket: (int(applications), price_sum)
+              for bucket, applications, price_sum in cursor.fetchall()}
+
+    cursor.execute('''
+        SELECT bucket, SUM(tenders)
+        FROM stats_tender_applications
+        GROUP BY bucket
+    ''')
+    per_tender = {bucket: int(tenders) for bucket, tenders in cursor.fetchall()}
+
+    total_tenders = sum(by_status.values())
+    total_applications = sum(applications for applications, _ in prices.values())
+
+    return {
+        'tenders': {
+            'total': total_tenders,
+            'by_status': dict(by_status),
+            'budget_by_currency': {currency: str(total) for currency, total in budget_by_currency.items()},
+            'by_status_currency': breakdown
+        },
+        'applications': {
+            'total': total_applications,
+            'per_tender_avg': round(total_applications / total_tenders, 2) if total_tenders else 0,
+            'per_tender': [
+                {'applications': bucket_label(APPLICATION_COUNT_BUCKETS, index),
+                 'tenders': per_tender.get(index, 0)}
+                for index in range(len(APPLICATION_COUNT_BUCKETS))
+            ],
+            'price_distribution': [
+                {'price': bucket_label(PRICE_BUCKETS, index),
+                 'applications': prices.get(index, (0, 0))[0],
+                 'price_sum': str(prices.get(index, (0, Decimal('0.00')))[1])}
+                for index in range(len(PRICE_BUCKETS))
+            ]
+        }
+    }
@@ -1,8 +1,23 @@
 from flask import Flask, request, jsonify
 import mysql.connector
+import requests
 import logging
 from datetime import datetime
 import os
+import sys
+
+# Добавляем корень проекта для общих модулей (shared)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from shared.db_pool import ConnectionPool, init_app as init_db_pool
+from shared.metrics import Metrics, init_app as init_metrics
+from shared.slow_queries import SlowQueryLog, init_app as init_slow_queries
+from shared.migrations import init_app as init_migrations
+from shared.tracing import Tracer, init_app as init_tracing, outgoing_headers
+from shared.internal_auth import internal_headers
+from shared.pagination import (
+    InvalidCursorError, decode_cursor, keyset_condition, keyset_params, next_cursor
+)
 
 app = Flask(__name__)
 
@@ -10,68 +25,96 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_db_connection():
+def _connect():
     return mysql.connector.connect(
-        host="mysql-users",
-        user="root",
-        password="password",
-        database="users_db",
+        host=os.environ.get('DB_HOST', 'mysql-users'),
+        user=os.environ.get('DB_USER', 'root'),
+        password=os.environ.get('DB_PASSWORD', 'password'),
+        database=os.environ.get('DB_NAME', 'users_db'),
         charset='utf8mb4',
         collation='utf8mb4_unicode_ci'
     )
 
-def init_db():
-    """Инициализация базы данных пользователей"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+# Пул соединений с БД (параметры задаются переменными DB_POOL_*)
+db_pool = ConnectionPool.from_env(_connect, name='users_db')
+init_db_pool(app, db_pool)
+
+# Трассировка запросов и заголовок Server-Timing (параметры TRACE_*)
+tracer = Tracer.from_env('user-service')
+init_tracing(app, tracer, db_pool)
+
+# Метрики запросов и SQL в формате Prometheus на /metrics
+metrics = Metrics()
+init_metrics(app, metrics, db_pool)
+
+# Статистика SQL по отпечаткам запросов и EXPLAIN медленных (параметры SLOW_QUERY_*)
+slow_queries = SlowQueryLog.from_env()
+init_slow_queries(app, slow_queries, db_pool, '/users/slow-queries')
+
+def get_db_connection():
+    return db_pool.connection()
+
+AUTH_SERVICE_URL = os.environ.get('AUTH_SERVICE_URL', 'http://auth-service:5001')
+
+def notify_user_changed(user_id):
+    """Сброс кэша статуса пользователя в auth-service.
     
+    Ошибка не прерывает операцию: устаревшая запись в кэше
+    все равно истечет через AUTH_VERIFY_CACHE_TTL.
+    """
     try:
-        # Таблица профилей пользователей
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_profiles (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL UNIQUE,
-                first_name VARCHAR(100),
-                last_name VARCHAR(100),
-                phone VARCHAR(20),
-                company VARCHAR(255),
-                position VARCHAR(100),
-                avatar_url VARCHAR(500),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                INDEX idx_user_id (user_id)
-            )
-        ''')
-        
-        # Таблица настроек пользователей
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_settings (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL UNIQUE,
-                email_notifications BOOLEAN DEFAULT TRUE,
-                sms_notifications BOOLEAN DEFAULT FALSE,
-                language VARCHAR(10) DEFAULT 'ru',
-                timezone VARCHAR(50) DEFAULT 'Europe/Moscow',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        ''')
-        
-        conn.commit()
-        logger.info("База данных пользователей инициализирована")
-        
-    except Exception as e:
-        logger.error(f"Ошибка инициализации БД пользователей: {str(e)}")
-        conn.rollback()
-    finally:
-        cursor.close()
-        conn.close()
+        requests.post(
+            f"{AUTH_SERVICE_URL}/auth/cache/invalidate",
+            json={'user_ids': [user_id]},
+            headers=dict(outgoing_headers(), **internal_headers()),
+            timeout=2
+        )
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Не удалось сбросить кэш пользователя {user_id} в auth-service: {str(e)}")
+
+# Миграции схемы (shared/migrations.py): применяются командой flask migrate.
+# Таблица users принадлежит auth-service, поэтому внешних ключей на нее нет
+USER_PROFILES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS user_profiles (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL UNIQUE,
+        first_name VARCHAR(100),
+        last_name VARCHAR(100),
+        phone VARCHAR(20),
+        company VARCHAR(255),
+        position VARCHAR(100),
+        avatar_url VARCHAR(500),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+'''
+
+USER_SETTINGS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS user_settings (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL UNIQUE,
+        email_notifications BOOLEAN DEFAULT TRUE,
+        sms_notifications BOOLEAN DEFAULT FALSE,
+        language VARCHAR(10) DEFAULT 'ru',
+        timezone VARCHAR(50) DEFAULT 'Europe/Moscow',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+'''
+
+MIGRATIONS = [
+    (1, 'Таблицы профилей и настроек пользователей', [USER_PROFILES_TABLE, USER_SETTINGS_TABLE])
+]
 
 @app.route('/users/health')
 def health_check():
-    return jsonify({'status': 'healthy', 'service': 'user-service'})
+    return jsonify({
+        'status': 'healthy',
+        'service': 'user-service',
+        'db_pool': db_pool.stats(),
+        'tracing': tracer.stats(),
+        'slow_queries': slow_queries.stats()
+    })
 
 @app.route('/users/profile', methods=['GET'])
 def get_profile():
@@ -179,28 +222,40 @@ def get_users():
         if user_role not in ['admin', 'manager']:
             return jsonify({'error': 'Недостаточно прав'}), 403
         
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = max(request.args.get('per_page', 10, type=int), 1)
         search = request.args.get('search', '')
+        # Курсорный режим: after= (пустой - с начала списка)
+        after = request.args.get('after')
+        skip_total = request.args.get('skip_total', '').lower() in ('1', 'true', 'yes')
+        
+        cursor_value = None
+        if after:
+            try:
+                cursor_value = decode_cursor(after)
+            except InvalidCursorError:
+                return jsonify({'error': 'Некорректный курсор'}), 400
         
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Подсчет общего количества
-        query_count = '''
-            SELECT COUNT(*) as total FROM users u
-            LEFT JOIN user_profiles p ON u.id = p.user_id
-            WHERE 1=1
-        '''
-        params_count = []
-        
-        if search:
-            query_count += ' AND (u.email LIKE %s OR p.first_name LIKE %s OR p.last_name LIKE %s)'
-            search_param = f'%{search}%'
-            params_count.extend([search_param, search_param, search_param])
-        
-        cursor.execute(query_count, params_count)
-        total = cursor.fetchone()['total']
+        # Подсчет общего количества (можно пропустить через skip_total=1)
+        total = None
+        if not skip_total:
+            query_count = '''
+                SELECT COUNT(*) as total FROM users u
+                LEFT JOIN user_profiles p ON u.id = p.user_id
+                WHERE 1=1
+            '''
+            params_count = []
+            
+            if search:
+                query_count += ' AND (u.email LIKE %s OR p.first_name LIKE %s OR p.last_name LIKE %s)'
+                search_param = f'%{search}%'
+                params_count.extend([search_param, search_param, search_param])
+            
+            cursor.execute(query_count, params_count)
+            total = cursor.fetchone()['total']
         
         # Получение пользователей
         query = '''
@@ -217,22 +272,31 @@ def get_users():
             search_param = f'%{search}%'
             params.extend([search_param, search_param, search_param])
         
-        query += ' ORDER BY u.created_at DESC LIMIT %s OFFSET %s'
-        offset = (page - 1) * per_page
-        params.extend([per_page, offset])
+        if cursor_value is not None:
+            query += keyset_condition('u.created_at', 'u.id')
+            params.extend(keyset_params(cursor_value))
+        
+        # Лишняя строка нужна, чтобы узнать, есть ли следующая страница
+        query += ' ORDER BY u.created_at DESC, u.id DESC LIMIT %s'
+        params.append(per_page + 1)
+        
+        if after is None:
+            query += ' OFFSET %s'
+            params.append((page - 1) * per_page)
         
         cursor.execute(query, params)
-        users = cursor.fetchall()
+        rows = cursor.fetchall()
         
         cursor.close()
         conn.close()
         
         return jsonify({
-            'users': users,
+            'users': rows[:per_page],
             'total': total,
             'page': page,
             'per_page': per_page,
-            'total_pages': (total + per_page - 1) // per_page
+            'total_pages': (total + per_page - 1) // per_page if total is not None else None,
+            'next_cursor': next_cursor(rows, per_page)
         })
         
     except Exception as e:
@@ -276,6 +340,9 @@ def update_user_by_admin(target_user_id):
         cursor.close()
         conn.close()
         
+        if 'role' in data or 'is_active' in data:
+            notify_user_changed(target_user_id)
+        
         logger.info(f"Пользователь {target_user_id} обновлен администратором")
         
         return jsonify({'message': 'Пользователь успешно обновлен'})
@@ -284,9 +351,8 @@ def update_user_by_admin(target_user_id):
         logger.error(f"Ошибка обновления пользователя: {str(e)}")
         return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
 
-# Инициализация БД при запуске
-with app.app_context():
-    init_db()
+# При запуске только проверяется версия схемы; миграции - flask migrate
+init_migrations(app, db_pool, MIGRATIONS)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5002, debug=True)
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+Общие модули для микросервисов системы тендерных закупок
+"""
@@ -0,0 +1,317 @@
+"""
+Пул соединений с MySQL, общий для auth-, user- и tender-service.
+
+Параметры пула читаются из переменных окружения:
+    DB_POOL_SIZE          - число постоянно удерживаемых соединений (5)
+    DB_POOL_MAX_OVERFLOW  - сколько соединений можно открыть сверх размера (10)
+    DB_POOL_PRE_PING      - проверять соединение перед выдачей (true)
+    DB_POOL_RECYCLE       - максимальное время жизни соединения, сек (3600)
+    DB_POOL_TIMEOUT       - сколько ждать свободного соединения, сек (30)
+
+Наблюдатели, добавленные add_query_observer(), получают текст, параметры
+и длительность каждого запроса курсоров пула (трассировка, метрики).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from flask import g, has_app_context
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Свободное соединение не появилось за отведенное время"""
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, '') else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class ObservedCursor:
+    """Курсор, сообщающий наблюдателям пула о каждом выполненном запросе"""
+
+    def __init__(self, raw, observers):
+        self._raw = raw
+        self._observers = observers
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def _observe(self, method, statement, params):
+        started = time.monotonic()
+        error = None
+        try:
+            return method(statement, params)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            duration = time.monotonic() - started
+            for observer in self._observers:
+                try:
+                    observer(statement, params, duration, error)
+                except Exception as e:
+                    logger.warning(f"Ошибка наблюдателя запросов: {str(e)}")
+
+    def execute(self, statement, params=None):
+        return self._observe(self._raw.execute, statement, params)
+
+    def executemany(self, statement, seq_params):
+        return self._observe(self._raw.executemany, statement, seq_params)
+
+
+class PooledConnection:
+    """Обертка над соединением: close() возвращает его в пул, а не закрывает"""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._pool.query_observers:
+            return ObservedCursor(cursor, self._pool.query_observers)
+        return cursor
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self._raw, self._created_at)
+
+    def invalidate(self):
+        """Закрытие соединения без возврата в пул (состояние сессии неизвестно,
+        например, прерванное чтение небуферизованного результата)"""
+        if self._released:
+            return
+        self._released = True
+        self._pool._discard(self._raw)
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений с переполнением, pre-ping и recycle"""
+
+    def __init__(self, connect, name='db', size=5, max_overflow=10,
+                 pre_ping=True, recycle=3600, timeout=30):
+        self._connect = connect
+        self.name = name
+        self.size = size
+        self.max_overflow = max_overflow
+        self.pre_ping = pre_ping
+        self.recycle = recycle
+        self.timeout = timeout
+
+        # Наблюдатели запросов: observer(statement, params, duration, error)
+        self.query_observers = []
+
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._opened = 0
+        self._in_use = 0
+
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._invalidated = 0
+
+    @classmethod
+    def from_env(cls, connect, name='db'):
+        """Создание пула с параметрами из переменных окружения"""
+        return cls(
+            connect,
+            name=name,
+            size=_env_int('DB_POOL_SIZE', 5),
+            max_overflow=_env_int('DB_POOL_MAX_OVERFLOW', 10),
+            pre_ping=_env_bool('DB_POOL_PRE_PING', True),
+            recycle=_env_float('DB_POOL_RECYCLE', 3600),
+            timeout=_env_float('DB_POOL_TIMEOUT', 30),
+        )
+
+    def add_query_observer(self, observer):
+        """Вызов observer после каждого execute/executemany курсоров пула"""
+        self.query_observers.append(observer)
+
+    def connection(self, track=True):
+        """Получение соединения из пула.
+
+        Внутри контекста Flask соединение дополнительно регистрируется
+        в flask.g и гарантированно возвращается в пул в teardown,
+        даже если обработчик забыл вызвать close(). track=False - для
+        соединений, которые живут дольше запроса (потоковые ответы):
+        их закрывает сам вызывающий.
+        """
+        raw, created_at = self._checkout()
+        conn = PooledConnection(self, raw, created_at)
+        if track and has_app_context():
+            g.setdefault('_db_connections', []).append(conn)
+        return conn
+
+    def _checkout(self):
+        deadline = None
+        with self._lock:
+            while True:
+                if self._idle:
+                    raw, created_at = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._opened < self.size + self.max_overflow:
+                    self._opened += 1
+                    self._in_use += 1
+                    raw, created_at = None, None
+                    break
+
+                if deadline is None:
+                    self._waits += 1
+                    wait_started = time.monotonic()
+                    deadline = wait_started + self.timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    self._wait_time += time.monotonic() - wait_started
+                    raise PoolTimeoutError(
+                        f'Пул {self.name}: нет свободных соединений за {self.timeout} сек'
+                    )
+                self._available.wait(remaining)
+
+            if deadline is not None:
+                self._wait_time += time.monotonic() - wait_started
+
+        try:
+            if raw is not None:
+                raw = self._validate(raw, created_at)
+            if raw is None:
+                raw = self._connect()
+                created_at = time.monotonic()
+                with self._lock:
+                    self._created += 1
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+                self._in_use -= 1
+                self._available.notify()
+            raise
+
+        return raw, created_at
+
+    def _validate(self, raw, created_at):
+        """Возвращает соединение, если оно пригодно, иначе закрывает его"""
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            with self._lock:
+                self._recycled += 1
+            self._close_quietly(raw)
+            return None
+
+        if self.pre_ping:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                with self._lock:
+                    self._invalidated += 1
+                self._close_quietly(raw)
+                return None
+
+        return raw
+
+    def _release(self, raw, created_at):
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            with self._lock:
+                self._invalidated += 1
+                self._opened -= 1
+                self._in_use -= 1
+                self._available.notify()
+            self._close_quietly(raw)
+            return
+
+        with self._lock:
+            self._in_use -= 1
+            if len(self._idle) < self.size:
+                self._idle.append((raw, created_at))
+                raw = None
+            else:
+                self._opened -= 1
+            self._available.notify()
+
+        if raw is not None:
+            self._close_quietly(raw)
+
+    def _discard(self, raw):
+        with self._lock:
+            self._invalidated += 1
+            self._opened -= 1
+            self._in_use -= 1
+            self._available.notify()
+        self._close_quietly(raw)
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception as e:
+            logger.warning(f"Ошибка закрытия соединения: {str(e)}")
+
+    def dispose(self):
+        """Закрытие всех простаивающих соединений"""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._opened -= len(idle)
+        for raw, _ in idle:
+            self._close_quietly(raw)
+
+    def stats(self):
+        """Статистика пула для health-эндпоинтов"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'opened': self._opened,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waits': self._waits,
+                'wait_time_ms': round(self._wait_time * 1000, 2),
+                'timeouts': self._timeouts,
+                'created': self._created,
+                'recycled': self._recycled,
+                'invalidated': self._invalidated,
+            }
+
+
+def init_app(app, pool):
+    """Подключение пула к приложению Flask"""
+    app.extensions['db_pool'] = pool
+
+    @app.teardown_appcontext
+    def release_db_connections(exc):
+        for conn in g.pop('_db_connections', []):
+            conn.close()
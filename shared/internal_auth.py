@@ -0,0 +1,43 @@
+"""
+Проверка служебных вызовов между сервисами.
+
+Служебные маршруты (список заблокированных пользователей, сброс кэша
+статуса) вызываются только другими сервисами, минуя проверку JWT
+в API Gateway. Вызывающий передает общий секрет INTERNAL_API_TOKEN
+в заголовке X-Internal-Token; без настроенного секрета служебные
+маршруты отклоняются всегда.
+"""
+
+import hmac
+import os
+from functools import wraps
+
+from flask import jsonify, request
+
+INTERNAL_TOKEN_HEADER = 'X-Internal-Token'
+INTERNAL_API_TOKEN = os.environ.get('INTERNAL_API_TOKEN', '')
+
+
+def internal_headers():
+    """Заголовок с секретом для исходящего служебного вызова"""
+    if not INTERNAL_API_TOKEN:
+        return {}
+    return {INTERNAL_TOKEN_HEADER: INTERNAL_API_TOKEN}
+
+
+def is_internal_request():
+    supplied = request.headers.get(INTERNAL_TOKEN_HEADER, '')
+    # Сравнение за постоянное время: секрет не подбирается по задержке ответа
+    return bool(INTERNAL_API_TOKEN) and hmac.compare_digest(
+        supplied.encode('utf-8'), INTERNAL_API_TOKEN.encode('utf-8')
+    )
+
+
+def internal_only(f):
+    """Маршрут только для сервисов, знающих INTERNAL_API_TOKEN"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not is_internal_request():
+            return jsonify({'error': 'Доступ только для внутренних сервисов'}), 403
+        return f(*args, **kwargs)
+    return decorated
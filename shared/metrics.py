@@ -0,0 +1,254 @@
+"""
+Метрики сервисов в текстовом формате Prometheus (/metrics).
+
+Счетчики и гистограммы с фиксированными границами хранятся по потокам:
+каждый поток пишет только в свой словарь, поэтому запись не берет
+блокировок. При чтении словари потоков суммируются; словари
+завершившихся потоков сливаются в общий и удаляются.
+
+Для приложения Flask init_app() добавляет:
+    http_requests_total{route, method, status}
+    http_request_duration_seconds{route, method}
+    db_query_duration_seconds{query}, db_query_errors_total{query}
+    db_pool_* - состояние пула соединений
+Имя запроса - команда и первая таблица: "SELECT tenders", "INSERT applications".
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+# Границы гистограмм длительности, сек
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Сколько словарей потоков держать до слияния завершившихся
+MAX_SHARDS = 256
+
+
+class Metrics:
+    """Реестр счетчиков и гистограмм без блокировок на запись"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (поток, счетчики, гистограммы) для каждого писавшего потока
+        self._shards = []
+        self._retired_counters = {}
+        self._retired_histograms = {}
+        self._help = {}
+        self._gauges = []
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def _new_shard(self):
+        counters, histograms = {}, {}
+        with self._lock:
+            if len(self._shards) >= MAX_SHARDS:
+                self._retire_dead()
+            self._shards.append((threading.current_thread(), counters, histograms))
+        self._local.counters = counters
+        self._local.histograms = histograms
+
+    def inc(self, name, labels=(), value=1):
+        """Увеличение счетчика; labels - кортеж пар (имя, значение)"""
+        try:
+            counters = self._local.counters
+        except AttributeError:
+            self._new_shard()
+            counters = self._local.counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        """Наблюдение в гистограмме: значение попадает в первый интервал с границей >= value"""
+        try:
+            histograms = self._local.histograms
+        except AttributeError:
+            self._new_shard()
+            histograms = self._local.histograms
+        key = (name, labels)
+        state = histograms.get(key)
+        if state is None:
+            # Счетчики интервалов (+Inf последним), сумма, количество
+            state = histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def gauge(self, fn):
+        """Источник мгновенных значений: fn() -> [(имя, метки, значение)]"""
+        self._gauges.append(fn)
+
+    def _retire_dead(self):
+        # Вызывается под self._lock; завершившийся поток больше не пишет
+        alive = []
+        for thread, counters, histograms in self._shards:
+            if thread.is_alive():
+                alive.append((thread, counters, histograms))
+                continue
+            _merge_counters(self._retired_counters, counters)
+            _merge_histograms(self._retired_histograms, histograms)
+        self._shards = alive
+
+    def collect(self):
+        """Суммы по всем потокам: (счетчики, гистограммы)"""
+        with self._lock:
+            self._retire_dead()
+            counters = dict(self._retired_counters)
+            histograms = {key: [list(state[0]), state[1], state[2]]
+                          for key, state in self._retired_histograms.items()}
+            shards = list(self._shards)
+
+        for _, shard_counters, shard_histograms in shards:
+            # Копия словаря атомарна: владелец может писать одновременно
+            _merge_counters(counters, dict(shard_counters))
+            _merge_histograms(histograms, dict(shard_histograms))
+        return counters, histograms
+
+    def render(self):
+        """Текстовый формат Prometheus"""
+        counters, histograms = self.collect()
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name in described:
+                return
+            described.add(name)
+            kind, help_text = self._help.get(name, (kind, ''))
+            if help_text:
+                lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, 'counter')
+            lines.append(f'{name}{format_labels(labels)} {value}')
+
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else repr(float(bound))
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", le),))} {cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} {total}')
+            lines.append(f'{name}_count{format_labels(labels)} {count}')
+
+        for fn in self._gauges:
+            for name, labels, value in fn():
+                header(name, 'gauge')
+                lines.append(f'{name}{format_labels(labels)} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _merge_counters(target, source):
+    for key, value in source.items():
+        target[key] = target.get(key, 0) + value
+
+
+def _merge_histograms(target, source):
+    for key, (counts, total, count) in source.items():
+        state = target.get(key)
+        if state is None:
+            target[key] = [list(counts), total, count]
+            continue
+        state[0] = [a + b for a, b in zip(state[0], counts)]
+        state[1] += total
+        state[2] += count
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+# Где искать таблицу для каждой команды
+_QUERY_TABLE = {
+    'SELECT': re.compile(r'\bFROM\s+`?(\w+)', re.IGNORECASE),
+    'DELETE': re.compile(r'\bFROM\s+`?(\w+)', re.IGNORECASE),
+    'INSERT': re.compile(r'\bINTO\s+`?(\w+)', re.IGNORECASE),
+    'REPLACE': re.compile(r'\bINTO\s+`?(\w+)', re.IGNORECASE),
+    'UPDATE': re.compile(r'^\s*UPDATE\s+(?:LOW_PRIORITY\s+|IGNORE\s+)*`?(\w+)', re.IGNORECASE),
+    'CREATE': re.compile(r'\bTABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)', re.IGNORECASE),
+    'ALTER': re.compile(r'\bTABLE\s+`?(\w+)', re.IGNORECASE)
+}
+_query_names = {}
+
+
+def query_name(statement):
+    """Короткое имя запроса для меток: команда и первая таблица"""
+    name = _query_names.get(statement)
+    if name is not None:
+        return name
+    text = statement.decode('utf-8', 'replace') if isinstance(statement, bytes) else statement
+    words = text.split(None, 1)
+    verb = words[0].upper() if words and words[0].isalpha() else 'OTHER'
+    pattern = _QUERY_TABLE.get(verb)
+    match = pattern.search(text) if pattern else None
+    name = f'{verb} {match.group(1)}' if match else verb
+    # Тексты запросов почти всегда постоянные; размер кэша ограничен на случай IN (...)
+    if len(_query_names) < 10000:
+        _query_names[statement] = name
+    return name
+
+
+def init_app(app, metrics, db_pool=None, path='/metrics'):
+    """Метрики запросов Flask (и пула соединений) и маршрут /metrics"""
+    app.extensions['metrics'] = metrics
+    metrics.describe('http_requests_total', 'counter', 'Обработанные запросы')
+    metrics.describe('http_request_duration_seconds', 'histogram', 'Время обработки запроса')
+
+    @app.before_request
+    def start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            # Метка - шаблон маршрута, а не путь: число рядов ограничено
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.inc('http_requests_total',
+                        (('route', route), ('method', request.method), ('status', str(response.status_code))))
+            metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                            (('route', route), ('method', request.method)))
+        return response
+
+    if db_pool is not None:
+        metrics.describe('db_query_duration_seconds', 'histogram', 'Время выполнения SQL-запроса')
+        metrics.describe('db_query_errors_total', 'counter', 'SQL-запросы, завершившиеся ошибкой')
+
+        def observe_query(statement, params, duration, error):
+            labels = (('query', query_name(statement)),)
+            metrics.observe('db_query_duration_seconds', duration, labels)
+            if error is not None:
+                metrics.inc('db_query_errors_total', labels)
+
+        db_pool.add_query_observer(observe_query)
+
+        def pool_gauges():
+            stats = db_pool.stats()
+            labels = (('pool', db_pool.name),)
+            return [
+                ('db_pool_in_use', labels, stats['in_use']),
+                ('db_pool_idle', labels, stats['idle']),
+                ('db_pool_opened', labels, stats['opened'])
+            ]
+
+        metrics.gauge(pool_gauges)
+
+    def metrics_view():
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule(path, 'metrics', metrics_view)
@@ -0,0 +1,247 @@
+"""
+Версионные миграции схемы БД, общие для auth-, user- и tender-service.
+
+Миграции сервиса - список MIGRATIONS из (версия, описание, шаги) в его
+app.py, передаваемый в init_app(); шаг - текст SQL или функция
+fn(conn, cursor). Примененные версии хранятся в таблице schema_version.
+
+Миграции выполняются один раз на развертывание командой
+
+    flask --app app.py migrate [--wait 60]
+
+а не при запуске каждого процесса: приложение при импорте только
+сравнивает версию схемы с ожидаемой и пишет в журнал, если она отстает.
+Одновременные запуски команды разделены блокировкой GET_LOCK: вторая
+дождется первой и ничего не применит.
+
+DDL в MySQL не откатывается, поэтому шаги пишутся повторяемыми:
+CREATE TABLE IF NOT EXISTS, add_column(), add_index() и drop_index()
+с проверкой существования. Индексы и колонки меняются без блокировки
+записи (ALGORITHM=INPLACE, LOCK=NONE), если MySQL это поддерживает.
+"""
+
+import logging
+import time
+
+import click
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_TABLE = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        description VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        duration_ms INT NOT NULL DEFAULT 0
+    )
+'''
+
+# Имя блокировки MySQL на время применения миграций
+LOCK_NAME = 'schema_migrations'
+
+# ER_ALTER_OPERATION_NOT_SUPPORTED(_REASON): изменение нельзя выполнить онлайн
+ONLINE_DDL_UNSUPPORTED = (1845, 1846)
+
+
+class MigrationError(Exception):
+    """Миграции не удалось применить"""
+
+
+def column_exists(cursor, table, column):
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    ''', (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def index_exists(cursor, table, index):
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    ''', (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+def alter_online(cursor, table, clause):
+    """ALTER TABLE без блокировки записи; если так нельзя - обычный ALTER"""
+    try:
+        cursor.execute(f'ALTER TABLE {table} {clause}, ALGORITHM=INPLACE, LOCK=NONE')
+    except Exception as e:
+        if getattr(e, 'errno', None) not in ONLINE_DDL_UNSUPPORTED:
+            raise
+        logger.warning(f"Изменение {table} ({clause}) нельзя выполнить онлайн, таблица будет заблокирована: {str(e)}")
+        cursor.execute(f'ALTER TABLE {table} {clause}')
+
+
+def add_column(cursor, table, column, definition):
+    """Добавление колонки, если ее нет; definition - тип и параметры"""
+    if column_exists(cursor, table, column):
+        return False
+    alter_online(cursor, table, f'ADD COLUMN {column} {definition}')
+    return True
+
+
+def add_index(cursor, table, index, columns, kind='INDEX'):
+    """Добавление индекса, если его нет; kind - INDEX, UNIQUE KEY или FULLTEXT INDEX"""
+    if index_exists(cursor, table, index):
+        return False
+    alter_online(cursor, table, f'ADD {kind} {index} ({columns})')
+    return True
+
+
+def drop_index(cursor, table, index):
+    """Удаление индекса, если он есть"""
+    if not index_exists(cursor, table, index):
+        return False
+    alter_online(cursor, table, f'DROP INDEX {index}')
+    return True
+
+
+def latest_version(migrations):
+    return migrations[-1][0] if migrations else 0
+
+
+def applied_versions(cursor):
+    cursor.execute('SELECT version FROM schema_version')
+    return {row[0] for row in cursor.fetchall()}
+
+
+def validate(migrations):
+    versions = [version for version, _, _ in migrations]
+    if versions != sorted(set(versions)):
+        raise MigrationError('Версии миграций должны возрастать и не повторяться')
+
+
+def migrate(conn, migrations, lock_timeout=600):
+    """Применение недостающих миграций по порядку; список примененных версий"""
+    validate(migrations)
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT GET_LOCK(%s, %s)', (LOCK_NAME, lock_timeout))
+        if cursor.fetchone()[0] != 1:
+            raise MigrationError(f'Не удалось получить блокировку миграций за {lock_timeout} с')
+
+        try:
+            cursor.execute(SCHEMA_VERSION_TABLE)
+            # Читается после блокировки: миграции мог применить другой процесс
+            applied = applied_versions(cursor)
+            done = []
+
+            for version, description, steps in migrations:
+                if version in applied:
+                    continue
+
+                logger.info(f"Миграция {version}: {description}")
+                started = time.monotonic()
+                try:
+                    for step in steps:
+                        if callable(step):
+                            step(conn, cursor)
+                        else:
+                            cursor.execute(step)
+                    cursor.execute(
+                        'INSERT INTO schema_version (version, description, duration_ms) VALUES (%s, %s, %s)',
+                        (version, description, int((time.monotonic() - started) * 1000))
+                    )
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    raise MigrationError(f'Миграция {version} ({description}) не применена: {str(e)}') from e
+
+                done.append(version)
+
+            return done
+        finally:
+            # Ошибка освобождения не должна скрыть ошибку миграции:
+            # блокировка снимается и при разрыве сессии с MySQL
+            try:
+                cursor.execute('SELECT RELEASE_LOCK(%s)', (LOCK_NAME,))
+                cursor.fetchone()
+            except Exception as e:
+                logger.warning(f"Ошибка освобождения блокировки миграций: {str(e)}")
+    finally:
+        cursor.close()
+
+
+def schema_status(conn, migrations):
+    """Текущая и ожидаемая версии схемы и недостающие миграции"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            SELECT COUNT(*) FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'schema_version'
+        ''')
+        applied = applied_versions(cursor) if cursor.fetchone()[0] else set()
+    finally:
+        cursor.close()
+
+    return {
+        'version': max(applied, default=0),
+        'expected': latest_version(migrations),
+        'pending': [version for version, _, _ in migrations if version not in applied]
+    }
+
+
+def check_schema(db_pool, migrations):
+    """Проверка версии схемы при запуске процесса; ошибки только пишутся в журнал"""
+    conn = None
+    try:
+        conn = db_pool.connection(track=False)
+        status = schema_status(conn, migrations)
+    except Exception as e:
+        logger.error(f"Ошибка проверки версии схемы БД: {str(e)}")
+        return None
+    finally:
+        if conn is not None:
+            conn.close()
+
+    if status['pending']:
+        logger.error(
+            f"Схема БД {db_pool.name} устарела: версия {status['version']}, "
+            f"ожидается {status['expected']}, не применены {status['pending']}. "
+            f"Выполните flask --app app.py migrate"
+        )
+    elif status['version'] > status['expected']:
+        logger.warning(f"Схема БД {db_pool.name} новее кода: версия {status['version']}, "
+                       f"ожидается {status['expected']}")
+    return status
+
+
+def run_migrations(db_pool, migrations, wait=0):
+    """Применение миграций; wait - сколько секунд ждать доступности БД"""
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            conn = db_pool.connection(track=False)
+            break
+        except Exception as e:
+            if time.monotonic() >= deadline:
+                raise
+            logger.info(f"БД {db_pool.name} недоступна, повтор: {str(e)}")
+            time.sleep(2)
+
+    try:
+        done = migrate(conn, migrations)
+    finally:
+        conn.close()
+
+    if done:
+        logger.info(f"Схема БД {db_pool.name} обновлена до версии {done[-1]}, применены {done}")
+    else:
+        logger.info(f"Схема БД {db_pool.name} актуальна, версия {latest_version(migrations)}")
+    return done
+
+
+def init_app(app, db_pool, migrations):
+    """Команда flask migrate и проверка версии схемы при запуске"""
+    validate(migrations)
+    app.extensions['migrations'] = (db_pool, migrations)
+
+    @app.cli.command('migrate')
+    @click.option('--wait', default=0, type=int, help='Сколько секунд ждать доступности БД')
+    def migrate_command(wait):
+        """Применить миграции схемы БД"""
+        run_migrations(db_pool, migrations, wait)
+
+    return check_schema(db_pool, migrations)
@@ -0,0 +1,59 @@
+"""
+Курсорная (keyset) пагинация по паре (created_at, id).
+
+Курсор непрозрачен для клиента: это base64url от JSON с последними
+значениями ключа сортировки на странице. Следующая страница выбирается
+условием "строго после курсора" по индексу (created_at, id) без OFFSET,
+поэтому глубина страницы не влияет на скорость, а вставка новых
+записей не сдвигает строки между страницами.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+CURSOR_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class InvalidCursorError(ValueError):
+    """Курсор поврежден или сформирован не этим сервисом"""
+
+
+def encode_cursor(created_at, row_id):
+    if isinstance(created_at, datetime):
+        created_at = created_at.strftime(CURSOR_DATETIME_FORMAT)
+    payload = json.dumps({'c': created_at, 'i': row_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (created_at, id) из курсора"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        created_at = datetime.strptime(payload['c'], CURSOR_DATETIME_FORMAT)
+        row_id = int(payload['i'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(str(e))
+    return created_at, row_id
+
+
+def keyset_condition(created_column, id_column):
+    """Условие "после курсора" для сортировки по убыванию (created_at, id)"""
+    return (
+        f' AND ({created_column} < %s'
+        f' OR ({created_column} = %s AND {id_column} < %s))'
+    )
+
+
+def keyset_params(cursor_value):
+    created_at, row_id = cursor_value
+    return [created_at, created_at, row_id]
+
+
+def next_cursor(rows, per_page, created_key='created_at', id_key='id'):
+    """Курсор следующей страницы; rows запрошены с запасом в одну строку"""
+    if len(rows) <= per_page:
+        return None
+    last = rows[per_page - 1]
+    return encode_cursor(last[created_key], last[id_key])
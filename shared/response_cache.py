@@ -0,0 +1,149 @@
+"""
+Кэш готовых JSON-ответов с ETag и инвалидацией по тегам.
+
+Ответ хранится целиком (тело в байтах и ETag), поэтому попадание не
+требует ни запросов к БД, ни сериализации. Размер ограничен числом
+записей и суммарным объемом тел; при переполнении вытесняются давно
+не использованные записи. Каждая запись помечается тегами (например,
+'tender:5' или 'status:active'), и изменение данных сбрасывает только
+записи с затронутыми тегами.
+
+Чтобы ответ, собранный до изменения данных, не попал в кэш уже после
+инвалидации, читатель запоминает поколение кэша до обращения к БД,
+а set() отбрасывает результат, если с тех пор была инвалидация.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_etag(body):
+    return hashlib.sha1(body).hexdigest()
+
+
+class CachedResponse:
+    """Тело ответа, его ETag и теги для инвалидации"""
+
+    __slots__ = ('body', 'etag', 'tags', 'expires_at')
+
+    def __init__(self, body, tags=(), expires_at=0.0):
+        self.body = body
+        self.etag = make_etag(body)
+        self.tags = frozenset(tags)
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """LRU-кэш ответов с TTL, лимитом по памяти и тегами"""
+
+    def __init__(self, maxsize=1000, max_bytes=32 * 1024 * 1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_skips = 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, body, tags=(), generation=None):
+        """Сохранение ответа; запись возвращается и тогда, когда не сохранена"""
+        entry = CachedResponse(body, tags, time.monotonic() + self.ttl)
+        if self.ttl <= 0 or self.maxsize <= 0 or len(body) > self.max_bytes:
+            return entry
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                # Данные менялись, пока ответ собирался
+                self.stale_skips += 1
+                return entry
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = entry
+            self._bytes += len(body)
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+        return entry
+
+    def invalidate(self, *tags):
+        """Сброс всех записей с любым из тегов; возвращает число записей"""
+        with self._lock:
+            self._generation += 1
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'stale_skips': self.stale_skips
+            }
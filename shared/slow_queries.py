@@ -0,0 +1,352 @@
+"""
+Журнал медленных SQL-запросов сервисов.
+
+Наблюдатель пула соединений учитывает каждый запрос по его отпечатку -
+тексту, в котором литералы и параметры заменены на ?, списки IN (...)
+и строки VALUES свернуты, а пробелы и регистр нормализованы. Запросы,
+собранные из частей (WHERE 1=1 AND ...), с разными значениями
+фильтров дают один отпечаток, с разным набором условий - разные.
+
+Для запроса дольше порога сохраняются последние несколько случаев и один
+раз на отпечаток выполняется EXPLAIN - фоновым потоком на отдельном
+соединении пула. Параметры в отчете по умолчанию обезличены - только тип
+и длина ('str(12)', 'int'): в них бывают email, хеши паролей и токены.
+
+Отчет - отпечатки, отсортированные по суммарному времени, - отдается
+администратору по GET <path>; DELETE <path> очищает статистику.
+
+Переменные окружения:
+    SLOW_QUERY_THRESHOLD_MS      - порог медленного запроса, мс (100)
+    SLOW_QUERY_EXPLAIN           - выполнять EXPLAIN (true)
+    SLOW_QUERY_SAMPLES           - сколько медленных случаев хранить на отпечаток (5)
+    SLOW_QUERY_MAX_FINGERPRINTS  - сколько отпечатков хранить (500)
+    SLOW_QUERY_CAPTURE_PARAMS    - сохранять значения параметров, а не их типы (false)
+"""
+
+import logging
+import os
+import queue
+import re
+import threading
+from collections import deque
+from datetime import datetime
+
+from flask import jsonify, request
+
+from shared.tracing import shorten_sql
+
+logger = logging.getLogger(__name__)
+
+# Отпечаток, под которым учитываются запросы сверх SLOW_QUERY_MAX_FINGERPRINTS
+OTHER_FINGERPRINT = '<other>'
+
+# Команды, для которых MySQL умеет EXPLAIN без выполнения запроса
+EXPLAIN_VERBS = ('select', 'update', 'delete', 'with')
+
+_COMMENTS = re.compile(r'/\*.*?\*/|--\s[^\n]*', re.DOTALL)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_PLACEHOLDERS = re.compile(r'%\(\w+\)s|%s')
+_NUMBERS = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ROWS = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+
+_fingerprints = {}
+
+
+def fingerprint(statement):
+    """Нормализованный текст запроса без значений"""
+    cached = _fingerprints.get(statement)
+    if cached is not None:
+        return cached
+    text = statement.decode('utf-8', 'replace') if isinstance(statement, bytes) else statement
+    # Сначала строки: в них могут встретиться -- и /*
+    text = _STRINGS.sub('?', text)
+    text = _COMMENTS.sub(' ', text)
+    text = _PLACEHOLDERS.sub('?', text)
+    text = _NUMBERS.sub('?', text)
+    text = _SPACES.sub(' ', text).strip().lower()
+    # IN (?, ?, ?) и VALUES (?, ?), (?, ?) не зависят от числа значений
+    text = _LISTS.sub('(...)', text)
+    text = _ROWS.sub('(...)', text)
+    # Тексты запросов почти всегда постоянные; размер кэша ограничен на случай IN (...)
+    if len(_fingerprints) < 10000:
+        _fingerprints[statement] = text
+    return text
+
+
+def _short_value(value, limit=200):
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value).decode('utf-8', 'replace')
+    if isinstance(value, str):
+        return value if len(value) <= limit else value[:limit] + '...'
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return _short_value(str(value), limit)
+
+
+def describe_params(params):
+    """Параметры запроса для отчета: значения укорочены, у executemany - первая строка"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: _short_value(value) for key, value in params.items()}
+    params = list(params)
+    if params and isinstance(params[0], (list, tuple, dict)):
+        return {'rows': len(params), 'first': describe_params(params[0])}
+    return [_short_value(value) for value in params]
+
+
+def _redact_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes, bytearray)):
+        return f'{type(value).__name__}({len(value)})'
+    return type(value).__name__
+
+
+def redact_params(params):
+    """Параметры запроса для отчета без значений: тип и длина строк"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: _redact_value(value) for key, value in params.items()}
+    params = list(params)
+    if params and isinstance(params[0], (list, tuple, dict)):
+        return {'rows': len(params), 'first': redact_params(params[0])}
+    return [_redact_value(value) for value in params]
+
+
+def _is_batch(params):
+    return isinstance(params, list) and bool(params) and isinstance(params[0], (list, tuple, dict))
+
+
+class QueryStats:
+    """Статистика одного отпечатка"""
+
+    __slots__ = ('calls', 'total', 'max', 'errors', 'slow_calls', 'samples', 'explain')
+
+    def __init__(self, samples):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.slow_calls = 0
+        self.samples = deque(maxlen=samples)
+        # None - не запрашивался, иначе строки EXPLAIN или {'error': ...}
+        self.explain = None
+
+
+class SlowQueryLog:
+    """Учет запросов по отпечаткам и EXPLAIN медленных"""
+
+    def __init__(self, threshold=0.1, explain=True, samples=5, max_fingerprints=500, capture_params=False):
+        self.threshold = threshold
+        self.explain_enabled = explain
+        self.samples = samples
+        self.max_fingerprints = max_fingerprints
+        self.capture_params = capture_params
+
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._since = datetime.now()
+
+        self._connect = None
+        self._explain_queue = queue.Queue(100)
+        self._thread = None
+        self.explained = 0
+        self.explain_dropped = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            threshold=float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100)) / 1000,
+            explain=os.environ.get('SLOW_QUERY_EXPLAIN', 'true').strip().lower() in ('1', 'true', 'yes', 'on'),
+            samples=int(os.environ.get('SLOW_QUERY_SAMPLES', 5)),
+            max_fingerprints=int(os.environ.get('SLOW_QUERY_MAX_FINGERPRINTS', 500)),
+            capture_params=os.environ.get('SLOW_QUERY_CAPTURE_PARAMS', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+        )
+
+    def set_connect(self, connect):
+        """Источник соединений для EXPLAIN: connect() -> соединение с cursor() и close()"""
+        self._connect = connect
+
+    def on_query(self, statement, params, duration, error):
+        """Наблюдатель запросов пула соединений"""
+        if threading.current_thread() is self._thread:
+            # Собственные EXPLAIN не учитываются
+            return
+        key = fingerprint(statement)
+        slow = duration >= self.threshold
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = OTHER_FINGERPRINT
+                    stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = QueryStats(self.samples)
+            stats.calls += 1
+            stats.total += duration
+            if duration > stats.max:
+                stats.max = duration
+            if error is not None:
+                stats.errors += 1
+            if not slow:
+                return
+            stats.slow_calls += 1
+            stats.samples.append({
+                'duration_ms': round(duration * 1000, 2),
+                # Значения нужны только EXPLAIN, в отчет они попадают лишь по явному разрешению
+                'params': describe_params(params) if self.capture_params else redact_params(params),
+                'at': datetime.now().isoformat(timespec='seconds'),
+                'error': str(error) if error is not None else None
+            })
+            need_explain = (
+                stats.explain is None and key != OTHER_FINGERPRINT and error is None
+                and self.explain_enabled and self._connect is not None
+                and key.startswith(EXPLAIN_VERBS) and not _is_batch(params)
+            )
+            if need_explain:
+                stats.explain = {'pending': True}
+
+        logger.warning(f"Медленный SQL-запрос ({duration * 1000:.0f} мс): {shorten_sql(statement)}")
+        if need_explain:
+            self._schedule_explain(key, statement, params)
+
+    def _schedule_explain(self, key, statement, params):
+        # Поток запускается при первом медленном запросе, а не при импорте модуля
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='slow-query-explain', daemon=True)
+                    self._thread.start()
+        try:
+            self._explain_queue.put_nowait((key, statement, params))
+        except queue.Full:
+            with self._lock:
+                self.explain_dropped += 1
+                # Можно будет повторить при следующем медленном запросе
+                stats = self._stats.get(key)
+                if stats is not None:
+                    stats.explain = None
+
+    def _run(self):
+        while True:
+            key, statement, params = self._explain_queue.get()
+            try:
+                result = self._explain(statement, params)
+                with self._lock:
+                    self.explained += 1
+            except Exception as e:
+                logger.warning(f"Ошибка EXPLAIN медленного запроса: {str(e)}")
+                result = {'error': str(e)}
+            finally:
+                self._explain_queue.task_done()
+            with self._lock:
+                stats = self._stats.get(key)
+                if stats is not None:
+                    stats.explain = result
+
+    def _explain(self, statement, params):
+        if isinstance(statement, bytes):
+            statement = statement.decode('utf-8')
+        conn = self._connect()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute('EXPLAIN ' + statement, params)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+            if getattr(conn, 'in_transaction', False):
+                conn.rollback()
+        finally:
+            conn.close()
+        return [{column: _short_value(value, 1000) for column, value in row.items()} for row in rows]
+
+    def flush(self):
+        """Ожидание выполнения всех поставленных EXPLAIN"""
+        if self._thread is not None:
+            self._explain_queue.join()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._since = datetime.now()
+
+    def report(self, limit=20, sort='total'):
+        """Отпечатки по убыванию суммарного (или sort: max, avg, calls) времени"""
+        with self._lock:
+            items = [
+                (key, stats.calls, stats.total, stats.max, stats.errors, stats.slow_calls,
+                 list(stats.samples), stats.explain)
+                for key, stats in self._stats.items()
+            ]
+            since = self._since
+
+        order = {
+            'total': lambda item: item[2],
+            'max': lambda item: item[3],
+            'avg': lambda item: item[2] / item[1],
+            'calls': lambda item: item[1]
+        }[sort]
+        items.sort(key=order, reverse=True)
+
+        queries = [
+            {
+                'fingerprint': key,
+                'calls': calls,
+                'total_ms': round(total * 1000, 2),
+                'avg_ms': round(total * 1000 / calls, 3),
+                'max_ms': round(maximum * 1000, 2),
+                'errors': errors,
+                'slow_calls': slow_calls,
+                'slow_samples': samples,
+                'explain': explain
+            }
+            for key, calls, total, maximum, errors, slow_calls, samples, explain in items[:limit]
+        ]
+        return {
+            'since': since.isoformat(timespec='seconds'),
+            'threshold_ms': round(self.threshold * 1000, 2),
+            'fingerprints': len(items),
+            'queries': queries
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'threshold_ms': round(self.threshold * 1000, 2),
+                'fingerprints': len(self._stats),
+                'explained': self.explained,
+                'explain_dropped': self.explain_dropped,
+                'capture_params': self.capture_params
+            }
+
+
+REPORT_SORTS = ('total', 'max', 'avg', 'calls')
+
+
+def init_app(app, slow_log, db_pool, path):
+    """Учет запросов пула соединений и отчет администратору по path"""
+    app.extensions['slow_queries'] = slow_log
+    db_pool.add_query_observer(slow_log.on_query)
+    # EXPLAIN выполняется вне запроса, соединение возвращает сам журнал
+    slow_log.set_connect(lambda: db_pool.connection(track=False))
+
+    def slow_queries_view():
+        if request.headers.get('X-User-Role') != 'admin':
+            return jsonify({'error': 'Недостаточно прав'}), 403
+
+        if request.method == 'DELETE':
+            slow_log.reset()
+            return jsonify({'message': 'Статистика запросов очищена'})
+
+        sort = request.args.get('sort', 'total')
+        if sort not in REPORT_SORTS:
+            return jsonify({'error': f'Сортировка: {", ".join(REPORT_SORTS)}'}), 400
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        return jsonify(slow_log.report(limit, sort))
+
+    app.add_url_rule(path, 'slow_queries', slow_queries_view, methods=['GET', 'DELETE'])
@@ -0,0 +1,378 @@
+"""
+Сквозная трассировка запросов: API Gateway -> сервисы.
+
+Контекст трассировки передается заголовком traceparent в формате
+W3C Trace Context:
+    00-<trace_id, 32 hex>-<span_id родителя, 16 hex>-<флаги, 2 hex>
+
+Gateway начинает трассировку (или продолжает входящую) и передает
+заголовок сервисам; сервис записывает спаны обработчика, каждого
+SQL-запроса и JSON-сериализации. Суммы времени по категориям
+возвращаются клиенту в заголовке Server-Timing, а номер трассировки -
+в X-Trace-Id.
+
+Спаны пишутся фоновым потоком строками JSON в файл и/или отправляются
+UDP-датаграммами на локальный коллектор. Без того и другого спаны не
+сохраняются, но Server-Timing все равно формируется.
+
+Переменные окружения:
+    TRACE_FILE         - файл для спанов (JSON Lines)
+    TRACE_COLLECTOR    - адрес UDP-коллектора host:port
+    TRACE_SAMPLE_RATE  - доля сохраняемых трассировок, начатых здесь (1.0)
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = 'traceparent'
+
+
+def new_trace_id():
+    return '%032x' % random.getrandbits(128)
+
+
+def new_span_id():
+    return '%016x' % random.getrandbits(64)
+
+
+def parse_traceparent(value):
+    """(trace_id, span_id родителя, sampled) или None, если заголовок неверен"""
+    if not value:
+        return None
+    parts = value.strip().lower().split('-')
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    version, trace_id, span_id, flags = parts[:4]
+    try:
+        int(trace_id, 16)
+        int(span_id, 16)
+        flags = int(flags, 16)
+    except ValueError:
+        return None
+    if version == 'ff' or trace_id == '0' * 32 or span_id == '0' * 16:
+        return None
+    return trace_id, span_id, bool(flags & 1)
+
+
+def format_traceparent(trace_id, span_id, sampled):
+    return f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}"
+
+
+def shorten_sql(statement, limit=300):
+    """Текст запроса в одну строку, без параметров"""
+    if isinstance(statement, bytes):
+        statement = statement.decode('utf-8', 'replace')
+    text = ' '.join(statement.split())
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+class SpanExporter:
+    """Фоновая запись спанов в файл JSON Lines и/или UDP-коллектор"""
+
+    def __init__(self, path=None, collector=None, max_queue=10000):
+        self.path = path or None
+        self.collector = None
+        if collector:
+            host, _, port = collector.rpartition(':')
+            self.collector = (host or '127.0.0.1', int(port))
+
+        self._queue = queue.Queue(max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.exported = 0
+        self.dropped = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            path=os.environ.get('TRACE_FILE'),
+            collector=os.environ.get('TRACE_COLLECTOR')
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.path or self.collector)
+
+    def export(self, spans):
+        """Постановка спанов в очередь; при переполнении они отбрасываются"""
+        if not self.enabled or not spans:
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += len(spans)
+
+    def _ensure_started(self):
+        # Поток запускается при первой записи, а не при импорте модуля
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        output = None
+        sock = None
+        while True:
+            spans = self._queue.get()
+            try:
+                lines = [json.dumps(span, ensure_ascii=False, separators=(',', ':')) for span in spans]
+                if self.path:
+                    if output is None:
+                        output = open(self.path, 'a', encoding='utf-8')
+                    output.write('\n'.join(lines) + '\n')
+                    output.flush()
+                if self.collector:
+                    if sock is None:
+                        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    for line in lines:
+                        sock.sendto(line.encode('utf-8'), self.collector)
+                self.exported += len(spans)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Ошибка записи спанов: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Ожидание записи всех поставленных в очередь спанов"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'collector': '%s:%s' % self.collector if self.collector else None,
+            'queued': self._queue.qsize(),
+            'exported': self.exported,
+            'dropped': self.dropped,
+            'errors': self.errors
+        }
+
+
+class RequestTrace:
+    """Спаны одного запроса и суммы времени по категориям для Server-Timing"""
+
+    def __init__(self, tracer, name, trace_id, parent_id, sampled):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        # Решение о выборке передается дальше, даже если здесь спаны не пишутся
+        self.recording = sampled and tracer.exporter.enabled
+        self.attributes = {}
+
+        self.started = time.time()
+        self._started_monotonic = time.monotonic()
+        self._stack = [self.span_id]
+        self.spans = []
+        # Категория -> [суммарное время, число спанов]
+        self.timings = {}
+
+    def elapsed(self):
+        return time.monotonic() - self._started_monotonic
+
+    def traceparent(self):
+        """Заголовок для исходящего запроса: родитель - текущий спан"""
+        return format_traceparent(self.trace_id, self._stack[-1], self.sampled)
+
+    def record(self, name, category, duration, attributes=None, error=None,
+               span_id=None, parent_id=None):
+        """Учет завершившейся операции длительностью duration секунд"""
+        if category:
+            totals = self.timings.setdefault(category, [0.0, 0])
+            totals[0] += duration
+            totals[1] += 1
+
+        if not self.recording or len(self.spans) >= self.tracer.max_spans:
+            return
+        span = {
+            'trace_id': self.trace_id,
+            'span_id': span_id or new_span_id(),
+            'parent_id': parent_id or self._stack[-1],
+            'service': self.tracer.service_name,
+            'name': name,
+            'start': round(time.time() - duration, 6),
+            'duration_ms': round(duration * 1000, 3)
+        }
+        if attributes:
+            span['attributes'] = attributes
+        if error is not None:
+            span['error'] = str(error)
+        self.spans.append(span)
+
+    @contextmanager
+    def span(self, name, category=None, **attributes):
+        """Вложенный спан: исходящие запросы внутри получат его как родителя"""
+        span_id = new_span_id()
+        parent_id = self._stack[-1]
+        self._stack.append(span_id)
+        started = time.monotonic()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._stack.pop()
+            self.record(name, category, time.monotonic() - started, attributes or None,
+                        error, span_id, parent_id)
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing: категории и общее время"""
+        entries = [
+            f'{category};dur={total * 1000:.1f};desc="{count}"'
+            for category, (total, count) in self.timings.items()
+        ]
+        entries.append(f'{self.tracer.timing_name};dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(entries)
+
+    def finish(self, error=None):
+        duration = self.elapsed()
+        if not self.recording:
+            return
+        root = {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'service': self.tracer.service_name,
+            'name': self.name,
+            'start': round(self.started, 6),
+            'duration_ms': round(duration * 1000, 3),
+            'attributes': self.attributes
+        }
+        if error is not None:
+            root['error'] = str(error)
+        self.tracer.exporter.export([root] + self.spans)
+
+
+class Tracer:
+    """Начало трассировок запросов сервиса"""
+
+    def __init__(self, service_name, exporter=None, sample_rate=1.0,
+                 timing_name='app', max_spans=500):
+        self.service_name = service_name
+        self.exporter = exporter or SpanExporter()
+        self.sample_rate = sample_rate
+        self.timing_name = timing_name
+        self.max_spans = max_spans
+
+    @classmethod
+    def from_env(cls, service_name, timing_name='app'):
+        return cls(
+            service_name,
+            SpanExporter.from_env(),
+            sample_rate=float(os.environ.get('TRACE_SAMPLE_RATE', 1.0)),
+            timing_name=timing_name
+        )
+
+    def start(self, name, traceparent=None):
+        """Трассировка запроса; входящий traceparent продолжает чужую трассировку"""
+        parsed = parse_traceparent(traceparent)
+        if parsed:
+            trace_id, parent_id, sampled = parsed
+        else:
+            trace_id, parent_id = new_trace_id(), None
+            sampled = random.random() < self.sample_rate
+        return RequestTrace(self, name, trace_id, parent_id, sampled)
+
+    def on_query(self, statement, params, duration, error):
+        """Наблюдатель запросов пула соединений: спан на каждый SQL-запрос"""
+        trace = current_trace()
+        if trace is not None:
+            trace.record('sql', 'db', duration, {'db.statement': shorten_sql(statement)}, error)
+
+    def stats(self):
+        return {
+            'service': self.service_name,
+            'sample_rate': self.sample_rate,
+            'exporter': self.exporter.stats()
+        }
+
+
+def current_trace():
+    """Трассировка текущего запроса Flask или None"""
+    if not has_request_context():
+        return None
+    return g.get('_trace')
+
+
+@contextmanager
+def span(name, category=None, **attributes):
+    """Спан текущего запроса; вне запроса ничего не записывает"""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    with trace.span(name, category, **attributes):
+        yield
+
+
+def outgoing_headers():
+    """Заголовки для исходящего HTTP-запроса из обработчика"""
+    trace = current_trace()
+    if trace is None:
+        return {}
+    return {TRACEPARENT_HEADER: trace.traceparent()}
+
+
+class TracedJSONProvider(DefaultJSONProvider):
+    """JSON-сериализация с учетом времени в трассировке"""
+
+    def dumps(self, obj, **kwargs):
+        with span('json.dumps', 'json'):
+            return super().dumps(obj, **kwargs)
+
+
+def init_app(app, tracer, db_pool=None):
+    """Подключение трассировки к приложению Flask (и к пулу соединений)"""
+    app.extensions['tracer'] = tracer
+    app.json = TracedJSONProvider(app)
+
+    if db_pool is not None:
+        db_pool.add_query_observer(tracer.on_query)
+
+    @app.before_request
+    def start_trace():
+        rule = request.url_rule.rule if request.url_rule else request.path
+        g._trace = tracer.start(f'{request.method} {rule}', request.headers.get(TRACEPARENT_HEADER))
+
+    @app.after_request
+    def add_server_timing(response):
+        trace = current_trace()
+        if trace is not None:
+            trace.attributes['http.status_code'] = response.status_code
+            # Заголовки Server-Timing сервиса (через gateway) сохраняются
+            response.headers.add('Server-Timing', trace.server_timing())
+            response.headers['X-Trace-Id'] = trace.trace_id
+        return response
+
+    @app.teardown_request
+    def finish_trace(exc):
+        trace = g.pop('_trace', None)
+        if trace is not None:
+            trace.finish(exc)
+
+    # Трассировка начинается раньше остальных обработчиков before_request
+    app.before_request_funcs.setdefault(None, [])
+    funcs = app.before_request_funcs[None]
+    funcs.insert(0, funcs.pop())
@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+"""
+Воспроизводимый нагрузочный тест всего стека через API Gateway.
+
+Этапы:
+    1. (--start) Запуск gateway и сервисов локальными процессами на
+       локальном MySQL: базы bench_* пересоздаются, схему и администратора
+       создают миграции сервисов (flask migrate), как при развертывании.
+    2. Наполнение: тендеры импортом NDJSON, пользователи регистрацией,
+       заявки - подачей от имени пользователей. Данные генерируются
+       из --seed, поэтому при одинаковых параметрах совпадают.
+    3. Смешанная нагрузка (фаза mixed): --concurrency потоков в замкнутом
+       цикле выполняют операции с весами из --mix:
+           browse - список тендеров, страницы 1..5
+           search - поиск по слову из названий
+           detail - карточка тендера
+           login  - вход пользователя
+           bid    - заявка на случайный тендер (повторная дает 400)
+    4. Подача заявок перед дедлайном (фаза rush): новый тендер, на который
+       все пользователи одновременно подают по одной заявке; проверяется,
+       что каждая заявка принята ровно один раз.
+
+По каждой операции считаются RPS и задержки p50/p95/p99/max. Результат
+записывается в JSON (--output) вместе с коммитом и параметрами запуска;
+--compare сравнивает его с прошлым результатом и завершается с кодом 1,
+если p95 выросла или RPS упал больше чем на --threshold процентов.
+
+Примеры:
+    # Стек уже запущен (docker-compose up)
+    python tests/load/bench.py --url http://localhost:5000 --output before.json
+
+    # Запуск сервисов на локальном MySQL и сравнение с прошлым результатом
+    python tests/load/bench.py --start --mysql-password password \\
+        --tenders 20000 --users 200 --duration 60 --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import random
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+ADMIN_EMAIL = 'admin@tender-system.ru'
+ADMIN_PASSWORD = 'admin123'
+USER_PASSWORD = 'bench-password'
+
+# Сервис -> (путь к приложению, база данных, смещение порта от --base-port)
+STACK = {
+    'auth': ('services/auth-service/app.py', 'bench_auth', 1),
+    'users': ('services/user-service/app.py', 'bench_users', 2),
+    'tenders': ('services/tender-service/app.py', 'bench_tenders', 3),
+    'gateway': ('api-gateway/app.py', None, 0)
+}
+HEALTH = {
+    'auth': '/auth/health',
+    'users': '/users/health',
+    'tenders': '/tenders/health',
+    'gateway': '/health'
+}
+
+# Приложение запускается без отладчика и перезагрузчика, как в рабочем режиме
+LAUNCHER = '''
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location('app', sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+module.app.run(host='127.0.0.1', port=int(sys.argv[2]), threaded=True, debug=False)
+'''
+
+WORDS = [
+    'поставка', 'ремонт', 'строительство', 'обслуживание', 'оборудования',
+    'медицинского', 'дорог', 'здания', 'программного', 'обеспечения',
+    'топлива', 'мебели', 'продуктов', 'питания', 'уборка', 'охрана',
+    'компьютеров', 'связи', 'освещения', 'транспорта', 'школы', 'больницы'
+]
+CUSTOMERS = [
+    'ГБУ "Городская больница"', 'МБОУ "Школа №5"', 'АО "Энергосбыт"',
+    'ООО "Дорстрой"', 'Администрация района', 'ФГУП "Почта"'
+]
+STATUSES = ['active'] * 6 + ['draft', 'completed', 'cancelled']
+CURRENCIES = ['RUB'] * 8 + ['USD', 'EUR']
+
+DEFAULT_MIX = 'browse=40,search=20,detail=30,login=5,bid=5'
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'Неизвестная операция: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Recorder:
+    """Результаты запросов по операциям; каждый поток пишет в свой список"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._lists = []
+        self.started = None
+        self.finished = None
+
+    def add(self, name, status, latency):
+        results = getattr(self._local, 'results', None)
+        if results is None:
+            results = self._local.results = []
+            with self._lock:
+                self._lists.append(results)
+        results.append((name, status, latency))
+
+    def summary(self):
+        elapsed = (self.finished or time.monotonic()) - self.started
+        by_name = defaultdict(list)
+        for results in self._lists:
+            for name, status, latency in results:
+                by_name[name].append((status, latency))
+
+        endpoints = {}
+        for name, items in sorted(by_name.items()):
+            latencies = sorted(latency * 1000 for _, latency in items)
+            errors = sum(1 for status, _ in items if status is None or status >= 500)
+            client_errors = sum(1 for status, _ in items if status is not None and 400 <= status < 500)
+            endpoints[name] = {
+                'count': len(items),
+                'errors': errors,
+                'client_errors': client_errors,
+                'rps': round(len(items) / elapsed, 2),
+                'p50_ms': round(percentile(latencies, 0.50), 2),
+                'p95_ms': round(percentile(latencies, 0.95), 2),
+                'p99_ms': round(percentile(latencies, 0.99), 2),
+                'max_ms': round(latencies[-1], 2)
+            }
+        return {'duration_s': round(elapsed, 2), 'endpoints': endpoints}
+
+
+class Client:
+    """HTTP-клиент потока нагрузки: свой Session и учет каждого запроса"""
+
+    def __init__(self, base_url, recorder, timeout=30):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def request(self, name, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            if self.recorder is not None:
+                self.recorder.add(name, None, time.perf_counter() - started)
+            return None
+        if self.recorder is not None:
+            self.recorder.add(name, response.status_code, time.perf_counter() - started)
+        return response
+
+
+# Операции смешанной нагрузки: fn(client, world, rnd)
+
+def op_browse(client, world, rnd):
+    client.request('browse', 'GET', '/api/tenders', params={'page': rnd.randint(1, 5), 'per_page': 20})
+
+
+def op_search(client, world, rnd):
+    client.request('search', 'GET', '/api/tenders', params={'search': rnd.choice(WORDS), 'per_page': 20})
+
+
+def op_detail(client, world, rnd):
+    client.request('detail', 'GET', f'/api/tenders/{rnd.choice(world.tender_ids)}')
+
+
+def op_login(client, world, rnd):
+    email, _, _ = rnd.choice(world.users)
+    client.request('login', 'POST', '/api/auth/login', json={'email': email, 'password': USER_PASSWORD})
+
+
+def op_bid(client, world, rnd):
+    _, _, token = rnd.choice(world.users)
+    client.request(
+        'bid', 'POST', f'/api/tenders/{rnd.choice(world.active_ids)}/applications',
+        json={'proposal': 'Предложение', 'price': rnd.randint(1000, 1000000)},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+
+
+OPERATIONS = {
+    'browse': op_browse,
+    'search': op_search,
+    'detail': op_detail,
+    'login': op_login,
+    'bid': op_bid
+}
+
+
+class World:
+    """Данные, на которые опирается нагрузка"""
+
+    def __init__(self):
+        self.admin_token = None
+        self.users = []          # (email, user_id, token)
+        self.tender_ids = []
+        self.active_ids = []
+
+
+def login(base_url, email, password):
+    response = requests.post(f'{base_url}/api/auth/login',
+                             json={'email': email, 'password': password}, timeout=60)
+    response.raise_for_status()
+    return response.json()['token']
+
+
+def generate_tender(rnd, deadline):
+    title = ' '.join(rnd.sample(WORDS, 3)).capitalize()
+    return {
+        'title': title,
+        'description': ' '.join(rnd.choice(WORDS) for _ in range(20)),
+        'customer': rnd.choice(CUSTOMERS),
+        'budget': rnd.randint(10, 100000) * 1000,
+        'currency': rnd.choice(CURRENCIES),
+        'status': rnd.choice(STATUSES),
+        'deadline': deadline
+    }
+
+
+def seed(args, world):
+    """Наполнение стека данными; возвращает длительности этапов"""
+    rnd = random.Random(args.seed)
+    timings = {}
+    auth = {'Authorization': f'Bearer {world.admin_token}'}
+    deadline = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d %H:%M:%S')
+
+    started = time.monotonic()
+    for offset in range(0, args.tenders, args.import_chunk):
+        count = min(args.import_chunk, args.tenders - offset)
+        body = '\n'.join(
+            json.dumps(generate_tender(rnd, deadline), ensure_ascii=False) for _ in range(count)
+        ).encode('utf-8')
+        response = requests.post(f'{args.url}/api/tenders/import', data=body, timeout=600,
+                                 headers=dict(auth, **{'Content-Type': 'application/x-ndjson'}))
+        response.raise_for_status()
+        if response.json()['failed']:
+            raise RuntimeError(f'Импорт тендеров: {response.json()["errors"][:3]}')
+    timings['tenders_s'] = round(time.monotonic() - started, 2)
+
+    # Идентификаторы берутся из выгрузки: в базе могут быть и прежние тендеры
+    for status, target in (('', world.tender_ids), ('active', world.active_ids)):
+        response = requests.get(f'{args.url}/api/tenders/export', headers=auth,
+                                params={'status': status, 'format': 'ndjson'}, stream=True, timeout=600)
+        response.raise_for_status()
+        target.extend(json.loads(line)['id'] for line in response.iter_lines() if line)
+    if not world.active_ids:
+        raise RuntimeError('Нет активных тендеров для нагрузки')
+
+    started = time.monotonic()
+    run_id = f'{args.seed}-{int(time.time())}'
+
+    def register(i):
+        email = f'bench-{run_id}-{i}@example.com'
+        response = requests.post(f'{args.url}/api/auth/register', timeout=120,
+                                 json={'email': email, 'password': USER_PASSWORD, 'role': 'client'})
+        response.raise_for_status()
+        data = response.json()
+        return email, data['user_id'], data['token']
+
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        world.users.extend(executor.map(register, range(args.users)))
+    timings['users_s'] = round(time.monotonic() - started, 2)
+
+    started = time.monotonic()
+    pairs = set()
+    while len(pairs) < min(args.applications, len(world.users) * len(world.active_ids)):
+        pairs.add((rnd.randrange(len(world.users)), rnd.choice(world.active_ids)))
+
+    def apply(pair):
+        user_index, tender_id = pair
+        response = requests.post(
+            f'{args.url}/api/tenders/{tender_id}/applications', timeout=60,
+            json={'proposal': 'Предложение', 'price': 1000 + user_index},
+            headers={'Authorization': f'Bearer {world.users[user_index][2]}'}
+        )
+        return response.status_code
+
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        statuses = list(executor.map(apply, sorted(pairs)))
+    if any(status >= 500 for status in statuses):
+        raise RuntimeError('Ошибки 5xx при наполнении заявками')
+    timings['applications_s'] = round(time.monotonic() - started, 2)
+    return timings
+
+
+def run_mixed(args, world):
+    recorder = Recorder()
+    mix = list(args.mix.items())
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    stop = threading.Event()
+    measuring = threading.Event()
+
+    def worker(index):
+        rnd = random.Random(args.seed * 1000 + index)
+        client = Client(args.url, None)
+        while not stop.is_set():
+            # Прогрев не учитывается: записывать начинаем после --warmup
+            client.recorder = recorder if measuring.is_set() else None
+            OPERATIONS[rnd.choices(names, weights)[0]](client, world, rnd)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.warmup)
+    recorder.started = time.monotonic()
+    measuring.set()
+    time.sleep(args.duration)
+    recorder.finished = time.monotonic()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return recorder.summary()
+
+
+def run_rush(args, world):
+    """Все пользователи одновременно подают заявку на новый тендер"""
+    response = requests.post(f'{args.url}/api/tenders', timeout=30, json={
+        'title': 'Нагрузочный тест: подача заявок перед дедлайном',
+        'customer': 'ООО "Нагрузка"',
+        'status': 'active',
+        'deadline': (datetime.now() + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+    }, headers={'Authorization': f'Bearer {world.admin_token}'})
+    response.raise_for_status()
+    tender_id = response.json()['tender_id']
+
+    recorder = Recorder()
+    barrier = threading.Barrier(min(args.concurrency, len(world.users)))
+    local = threading.local()
+
+    def bid(user):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client(args.url, recorder)
+            # Первая волна стартует одновременно
+            barrier.wait()
+        response = client.request(
+            'bid_rush', 'POST', f'/api/tenders/{tender_id}/applications',
+            json={'proposal': 'Предложение', 'price': 1000 + user[1]},
+            headers={'Authorization': f'Bearer {user[2]}'}
+        )
+        return response.status_code if response is not None else None
+
+    recorder.started = time.monotonic()
+    with ThreadPoolExecutor(barrier.parties) as executor:
+        statuses = list(executor.map(bid, world.users))
+    recorder.finished = time.monotonic()
+
+    result = recorder.summary()
+    accepted = sum(1 for status in statuses if status in (201, 202))
+    tender = requests.get(f'{args.url}/api/tenders/{tender_id}', timeout=30).json()
+    result['check'] = {
+        'tender_id': tender_id,
+        'accepted': accepted,
+        'expected': len(world.users),
+        # В режиме журнала заявки попадают в счетчик после пакетной записи
+        'applications_count': tender.get('applications_count')
+    }
+    return result
+
+
+class Stack:
+    """Gateway и сервисы, запущенные локальными процессами"""
+
+    def __init__(self, args):
+        self.args = args
+        self.processes = {}
+        self.log_dir = args.log_dir or tempfile.mkdtemp(prefix='bench-logs-')
+        # Общий секрет служебных маршрутов (список заблокированных для gateway)
+        self.internal_token = secrets.token_hex(16)
+        self.urls = {
+            name: f'http://127.0.0.1:{args.base_port + offset}'
+            for name, (_, _, offset) in STACK.items()
+        }
+
+    def recreate_databases(self):
+        import mysql.connector
+
+        conn = mysql.connector.connect(host=self.args.mysql_host, user=self.args.mysql_user,
+                                       password=self.args.mysql_password)
+        cursor = conn.cursor()
+        for _, database, _ in STACK.values():
+            if database:
+                cursor.execute(f'DROP DATABASE IF EXISTS `{database}`')
+                cursor.execute(f'CREATE DATABASE `{database}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci')
+        cursor.close()
+        conn.close()
+
+    def environment(self, name):
+        env = dict(os.environ)
+        env.update({
+            'DB_HOST': self.args.mysql_host,
+            'DB_USER': self.args.mysql_user,
+            'DB_PASSWORD': self.args.mysql_password,
+            'AUTH_SERVICE_URL': self.urls['auth'],
+            'USER_SERVICE_URL': self.urls['users'],
+            'TENDER_SERVICE_URL': self.urls['tenders'],
+            'INTERNAL_API_TOKEN': self.internal_token,
+            'PYTHONUNBUFFERED': '1'
+        })
+        database = STACK[name][1]
+        if database:
+            env['DB_NAME'] = database
+        for item in self.args.service_env:
+            key, _, value = item.partition('=')
+            env[key] = value
+        return env
+
+    def start(self):
+        self.recreate_databases()
+        for name, (path, database, _) in STACK.items():
+            path = os.path.join(ROOT, path)
+            log = open(os.path.join(self.log_dir, f'{name}.log'), 'w')
+            if database:
+                subprocess.run(
+                    [sys.executable, '-m', 'flask', '--app', path, 'migrate'],
+                    cwd=os.path.dirname(path), env=self.environment(name),
+                    stdout=log, stderr=subprocess.STDOUT, check=True
+                )
+            port = self.urls[name].rsplit(':', 1)[1]
+            self.processes[name] = subprocess.Popen(
+                [sys.executable, '-c', LAUNCHER, path, port],
+                cwd=os.path.dirname(path), env=self.environment(name),
+                stdout=log, stderr=subprocess.STDOUT
+            )
+        for name in STACK:
+            self.wait_healthy(name)
+
+    def wait_healthy(self, name, timeout=120):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.processes[name].poll() is not None:
+                break
+            try:
+                if requests.get(self.urls[name] + HEALTH[name], timeout=2).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError(f'{name} не запустился, журнал: {os.path.join(self.log_dir, name + ".log")}')
+
+    def stop(self):
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if not self.args.log_dir:
+            shutil.rmtree(self.log_dir, ignore_errors=True)
+
+
+def compare(result, baseline, threshold):
+    """Печать изменений относительно прошлого результата; список регрессий"""
+    regressions = []
+    print(f'\nСравнение с {baseline["meta"].get("commit")} (порог {threshold}%):')
+    for phase, data in result['phases'].items():
+        base_phase = baseline.get('phases', {}).get(phase)
+        if not base_phase:
+            continue
+        for name, stats in data['endpoints'].items():
+            base = base_phase['endpoints'].get(name)
+            if not base:
+                continue
+            p95 = (stats['p95_ms'] - base['p95_ms']) * 100 / base['p95_ms'] if base['p95_ms'] else 0.0
+            rps = (stats['rps'] - base['rps']) * 100 / base['rps'] if base['rps'] else 0.0
+            print(f'  {phase}/{name:10} p95 {base["p95_ms"]:8.1f} -> {stats["p95_ms"]:8.1f} мс ({p95:+6.1f}%)'
+                  f'   rps {base["rps"]:8.1f} -> {stats["rps"]:8.1f} ({rps:+6.1f}%)')
+            # RPS фазы rush определяется числом пользователей, а не пропускной способностью
+            if p95 > threshold or (phase == 'mixed' and rps < -threshold):
+                regressions.append(f'{phase}/{name}')
+            if stats['errors'] > base['errors']:
+                regressions.append(f'{phase}/{name}: ошибок {base["errors"]} -> {stats["errors"]}')
+    return regressions
+
+
+def print_phase(name, data):
+    print(f'\nФаза {name}, {data["duration_s"]} с:')
+    print(f'  {"операция":10} {"запросов":>9} {"5xx":>5} {"4xx":>5} {"rps":>9} '
+          f'{"p50":>8} {"p95":>8} {"p99":>8} {"max":>8}')
+    for endpoint, stats in data['endpoints'].items():
+        print(f'  {endpoint:10} {stats["count"]:9} {stats["errors"]:5} {stats["client_errors"]:5} '
+              f'{stats["rps"]:9.1f} {stats["p50_ms"]:8.1f} {stats["p95_ms"]:8.1f} '
+              f'{stats["p99_ms"]:8.1f} {stats["max_ms"]:8.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест всего стека')
+    parser.add_argument('--url', default='http://localhost:5000', help='адрес API Gateway')
+    parser.add_argument('--start', action='store_true', help='запустить gateway и сервисы локально')
+    parser.add_argument('--base-port', type=int, default=15000, help='порт gateway при --start, сервисы - следующие')
+    parser.add_argument('--mysql-host', default='127.0.0.1')
+    parser.add_argument('--mysql-user', default='root')
+    parser.add_argument('--mysql-password', default='password')
+    parser.add_argument('--service-env', action='append', default=[], metavar='KEY=VALUE',
+                        help='переменная окружения сервисов при --start (можно повторять)')
+    parser.add_argument('--log-dir', help='куда сохранить журналы сервисов при --start')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--tenders', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--applications', type=int, default=2000)
+    parser.add_argument('--import-chunk', type=int, default=5000, help='тендеров в одном запросе импорта')
+    parser.add_argument('--skip-seed', action='store_true', help='не наполнять, использовать имеющиеся тендеры')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'веса операций (по умолчанию {DEFAULT_MIX})')
+    parser.add_argument('--phases', default='mixed,rush')
+    parser.add_argument('--output', help='файл JSON с результатом')
+    parser.add_argument('--compare', help='прошлый результат JSON для сравнения')
+    parser.add_argument('--threshold', type=float, default=10.0, help='допустимое ухудшение, %%')
+    args = parser.parse_args()
+
+    stack = None
+    if args.start:
+        stack = Stack(args)
+        args.url = stack.urls['gateway']
+        print(f'Запуск сервисов, журналы: {stack.log_dir}')
+
+    result = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'config': {key: value for key, value in vars(args).items()
+                       if key not in ('mysql_password', 'compare', 'output')}
+        },
+        'phases': {}
+    }
+
+    try:
+        if stack is not None:
+            stack.start()
+
+        world = World()
+        world.admin_token = login(args.url, ADMIN_EMAIL, ADMIN_PASSWORD)
+        if args.skip_seed:
+            args.tenders = args.users = args.applications = 0
+        result['seed'] = seed(args, world)
+        print(f'Наполнение: {result["seed"]}; тендеров {len(world.tender_ids)}, '
+              f'активных {len(world.active_ids)}, пользователей {len(world.users)}')
+
+        phases = [phase.strip() for phase in args.phases.split(',') if phase.strip()]
+        if 'mixed' in phases and not world.users and {'login', 'bid'} & set(args.mix):
+            raise RuntimeError('Для операций login и bid нужны пользователи (--users)')
+
+        for phase in phases:
+            if phase == 'mixed':
+                result['phases']['mixed'] = run_mixed(args, world)
+            elif phase == 'rush' and world.users:
+                result['phases']['rush'] = run_rush(args, world)
+        for phase, data in result['phases'].items():
+            print_phase(phase, data)
+    finally:
+        if stack is not None:
+            stack.stop()
+
+    problems = []
+    rush = result['phases'].get('rush')
+    if rush:
+        check = rush['check']
+        print(f'\nПроверка rush: {check}')
+        if check['accepted'] != check['expected']:
+            problems.append('не каждая заявка фазы rush принята')
+    if any(stats['errors'] for data in result['phases'].values() for stats in data['endpoints'].values()):
+        problems.append('есть ответы 5xx или ошибки соединения')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f'\nРезультат записан в {args.output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        problems.extend(f'регрессия {item}' for item in regressions)
+
+    for problem in problems:
+        print(f'ОШИБКА: {problem}')
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
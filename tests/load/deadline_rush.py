@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест подачи заявок перед дедлайном.
+
+Много пользователей одновременно подают заявки на один активный тендер,
+каждый - по несколько раз (двойной клик, повтор клиента). Проверяется:
+    - нет ответов 5xx (гонка на unique_application больше не дает 500);
+    - каждый пользователь получил ровно одну заявку (201), повторы - 400;
+    - applications_count тендера равен числу созданных заявок;
+    - пропускная способность (заявок в секунду) и задержки p50/p95/p99.
+
+Запросы идут напрямую в tender-service с заголовками X-User-ID/X-User-Role,
+как их выставляет API Gateway.
+
+Пример:
+    python tests/load/deadline_rush.py --users 500 --repeats 2 --concurrency 50
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+_local = threading.local()
+
+
+def session():
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def create_tender(base_url):
+    response = requests.post(f'{base_url}/tenders', json={
+        'title': 'Нагрузочный тест: подача заявок',
+        'customer': 'ООО "Нагрузка"',
+        'status': 'active',
+        'deadline': (datetime.now() + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+    }, headers={'X-User-ID': '1', 'X-User-Role': 'admin'}, timeout=10)
+    response.raise_for_status()
+    return response.json()['tender_id']
+
+
+def submit(base_url, tender_id, user_id):
+    started = time.monotonic()
+    try:
+        response = session().post(
+            f'{base_url}/tenders/{tender_id}/applications',
+            json={'proposal': f'Предложение пользователя {user_id}', 'price': 1000 + user_id},
+            headers={'X-User-ID': str(user_id), 'X-User-Role': 'client'},
+            timeout=30
+        )
+        status = response.status_code
+    except requests.RequestException:
+        status = 'error'
+    return user_id, status, time.monotonic() - started
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест подачи заявок')
+    parser.add_argument('--url', default='http://localhost:5003', help='адрес tender-service')
+    parser.add_argument('--tender-id', type=int, help='активный тендер (по умолчанию создается новый)')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--repeats', type=int, default=2, help='заявок от каждого пользователя')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--first-user-id', type=int, default=100000)
+    args = parser.parse_args()
+
+    tender_id = args.tender_id or create_tender(args.url)
+    user_ids = [args.first_user_id + i for i in range(args.users)] * args.repeats
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        results = list(executor.map(lambda uid: submit(args.url, tender_id, uid), user_ids))
+    elapsed = time.monotonic() - started
+
+    statuses = Counter(status for _, status, _ in results)
+    created_per_user = Counter(uid for uid, status, _ in results if status == 201)
+    latencies = [latency * 1000 for _, _, latency in results]
+
+    tender = requests.get(f'{args.url}/tenders/{tender_id}', timeout=10).json()
+
+    print(f'Тендер {tender_id}: {len(results)} запросов за {elapsed:.2f} с, '
+          f'{len(results) / elapsed:.1f} запросов/с, {statuses[201] / elapsed:.1f} заявок/с')
+    print(f'Коды ответов: {dict(statuses)}')
+    print(f'Задержка, мс: p50={statistics.median(latencies):.1f} '
+          f'p95={percentile(latencies, 0.95):.1f} p99={percentile(latencies, 0.99):.1f}')
+    print(f'applications_count={tender.get("applications_count")}')
+
+    problems = []
+    if any(status == 'error' or status >= 500 for status in statuses):
+        problems.append('есть ответы 5xx или ошибки соединения')
+    if any(count != 1 for count in created_per_user.values()) or len(created_per_user) != args.users:
+        problems.append('не каждый пользователь получил ровно одну заявку')
+    if args.tender_id is None and tender.get('applications_count') != statuses[201]:
+        problems.append('applications_count не совпадает с числом заявок')
+
+    for problem in problems:
+        print(f'ОШИБКА: {problem}')
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Накладные расходы метрик (shared/metrics.py).
+
+Измеряется:
+    - время одной операции inc() и observe() в одном потоке и в нескольких
+      потоках одновременно;
+    - время запроса Flask к простому обработчику без метрик и с метриками
+      (через test client, без сети), разница - цена метрик на запрос.
+
+Пример:
+    python tests/load/metrics_overhead.py --ops 200000 --requests 5000
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from shared.metrics import Metrics, init_app
+
+
+def per_op_ns(fn, ops):
+    started = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter() - started) * 1e9 / ops
+
+
+def threaded_ns(fn, ops, threads):
+    """Среднее время операции, когда threads потоков пишут одновременно"""
+    barrier = threading.Barrier(threads + 1)
+
+    def work():
+        barrier.wait()
+        for _ in range(ops):
+            fn()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) * 1e9 / (ops * threads)
+
+
+def make_app(with_metrics):
+    app = Flask(__name__)
+    if with_metrics:
+        init_app(app, Metrics())
+
+    @app.route('/tenders/<int:tender_id>')
+    def tender(tender_id):
+        return jsonify({'id': tender_id, 'title': 'Поставка', 'status': 'active'})
+
+    return app
+
+
+def per_request_us(app, requests_count):
+    client = app.test_client()
+    for _ in range(200):
+        client.get('/tenders/1')
+    started = time.perf_counter()
+    for i in range(requests_count):
+        client.get(f'/tenders/{i}')
+    return (time.perf_counter() - started) * 1e6 / requests_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Накладные расходы метрик')
+    parser.add_argument('--ops', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    metrics = Metrics()
+    labels = (('route', '/tenders/<int:tender_id>'), ('method', 'GET'), ('status', '200'))
+    inc = lambda: metrics.inc('http_requests_total', labels)
+    observe = lambda: metrics.observe('http_request_duration_seconds', 0.012, labels[:2])
+    baseline = lambda: None
+
+    empty_ns = per_op_ns(baseline, args.ops)
+    print(f'inc():      {per_op_ns(inc, args.ops) - empty_ns:8.0f} нс, '
+          f'{args.threads} потоков: {threaded_ns(inc, args.ops // args.threads, args.threads):8.0f} нс')
+    print(f'observe():  {per_op_ns(observe, args.ops) - empty_ns:8.0f} нс, '
+          f'{args.threads} потоков: {threaded_ns(observe, args.ops // args.threads, args.threads):8.0f} нс')
+
+    plain = min(per_request_us(make_app(False), args.requests) for _ in range(3))
+    measured = min(per_request_us(make_app(True), args.requests) for _ in range(3))
+    print(f'Запрос Flask без метрик: {plain:.1f} мкс, с метриками: {measured:.1f} мкс, '
+          f'разница {measured - plain:.1f} мкс ({(measured - plain) * 100 / plain:.1f}%)')
+
+    started = time.perf_counter()
+    metrics.render()
+    print(f'render(): {(time.perf_counter() - started) * 1000:.2f} мс')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
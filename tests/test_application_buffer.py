@@ -0,0 +1,208 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from decimal import Decimal
+
+from mysql.connector import errors
+
+# Добавляем путь к проекту и к сервису тендеров
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'tender-service'))
+
+from application_buffer import ApplicationBuffer
+from journal import Journal
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Условие не выполнено за отведенное время')
+        time.sleep(0.01)
+
+
+class FakeDatabase:
+    """Таблицы applications и application_dead_letters с транзакциями"""
+
+    def __init__(self):
+        self.applications = {}
+        self.dead_letters = []
+        self.fail_next = None
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def insert_application(self, row):
+        if Decimal(row[4]) > Decimal('9999999999999.99'):
+            raise errors.DataError(msg="Out of range value for column 'price'", errno=1264)
+        if row[0] in self.conn.db.applications or row[0] in self.conn.applications:
+            raise errors.IntegrityError(msg='Duplicate entry', errno=1062)
+        self.conn.applications[row[0]] = row
+
+    def executemany(self, statement, rows):
+        if 'INTO applications' not in statement:
+            return
+        if self.conn.db.fail_next is not None:
+            error, self.conn.db.fail_next = self.conn.db.fail_next, None
+            raise error
+        # Многострочный INSERT: ошибка в одной строке отменяет весь запрос
+        saved = dict(self.conn.applications)
+        try:
+            for row in rows:
+                self.insert_application(row)
+        except Exception:
+            self.conn.applications = saved
+            raise
+
+    def execute(self, statement, params=None):
+        if 'INTO applications' in statement:
+            self.insert_application(params)
+        elif 'INTO application_dead_letters' in statement:
+            self.conn.dead_letters.append(params)
+        elif statement.startswith('SELECT id, applications_count'):
+            self.rows = [(tender_id, 1) for tender_id in params]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.rollback()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.db.applications.update(self.applications)
+        self.db.dead_letters.extend(self.dead_letters)
+        self.rollback()
+
+    def rollback(self):
+        self.applications = {}
+        self.dead_letters = []
+
+    def close(self):
+        pass
+
+
+class TestApplicationBuffer(unittest.TestCase):
+    """Тесты буфера заявок"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.journal = Journal(os.path.join(self.directory, 'applications.journal'), fsync=False)
+        self.committed = []
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def make_buffer(self, id_block_size=1000, get_connection=None):
+        buffer = ApplicationBuffer(self.journal, get_connection, on_commit=self.committed.append,
+                                   id_block_size=id_block_size, retry_interval=0.01)
+        buffer.reserved = []
+
+        def reserve():
+            # Резервирование идет без общей блокировки буфера
+            self.assertFalse(buffer._lock.locked())
+            start = 1 + id_block_size * len(buffer.reserved)
+            buffer.reserved.append(start)
+            return start, start + id_block_size
+
+        buffer._reserve_id_block = reserve
+        buffer._find_existing = lambda *args: None
+        return buffer
+
+    def test_01_id_block_prefetch(self):
+        """Следующий блок номеров резервируется, когда текущий израсходован наполовину"""
+        buffer = self.make_buffer(id_block_size=4)
+        self.journal.open()
+
+        ids = [buffer.submit(1, user_id, 'Предложение', '100.00')[0] for user_id in range(1, 8)]
+
+        self.assertEqual(ids, [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(buffer.reserved, [1, 5, 9])
+
+    def test_02_checkpoint_error(self):
+        """Ошибка контрольной точки не останавливает перенос и видна в stats()"""
+        buffer = self.make_buffer()
+        buffer._commit_batch = lambda batch: (Counter(record['tender_id'] for record in batch), set())
+        checkpoint = self.journal.checkpoint
+
+        def broken_checkpoint(seq):
+            raise OSError('No space left on device')
+
+        self.journal.checkpoint = broken_checkpoint
+        buffer.start()
+        buffer.submit(1, 1, 'Предложение', '100.00')
+        buffer.submit(1, 2, 'Предложение', '200.00')
+        wait_for(lambda: buffer.stats()['committed'] == 2)
+
+        stats = buffer.stats()
+        self.assertEqual(stats['queued'], 0)
+        self.assertEqual(stats['checkpoint_errors'], stats['batches'])
+        self.assertEqual(stats['last_checkpoint_error'], 'No space left on device')
+        self.assertEqual(stats['journal']['committed_seq'], 0)
+        self.assertTrue(buffer._thread.is_alive())
+
+        # Следующая пачка сдвигает контрольную точку дальше всех записей
+        self.journal.checkpoint = checkpoint
+        buffer.submit(1, 3, 'Предложение', '300.00')
+        wait_for(lambda: buffer.stats()['committed'] == 3)
+
+        stats = buffer.stats()
+        self.assertIsNone(stats['last_checkpoint_error'])
+        self.assertEqual(stats['journal']['committed_seq'], 3)
+        self.assertEqual(sum(counts[1] for counts in self.committed), 3)
+
+    def test_03_dead_letter(self):
+        """Запись, которую MySQL не принимает, откладывается и не блокирует очередь"""
+        # Журнал, записанный до проверки цены: вторая заявка не помещается в DECIMAL(15,2)
+        self.journal.open()
+        for application_id, price in ((1, '100.00'), (2, '1E+20'), (3, '300.00')):
+            self.journal.write({'id': application_id, 'tender_id': 1, 'user_id': application_id,
+                                'proposal': 'Предложение', 'price': price,
+                                'ts': '2026-01-01 10:00:00', 'key': None})
+        self.journal.close()
+
+        db = FakeDatabase()
+        # Ошибка схемы - не ошибка данных: пачка повторяется целиком
+        db.fail_next = errors.ProgrammingError(msg="Table 'applications' doesn't exist", errno=1146)
+        buffer = self.make_buffer(get_connection=db.connect)
+        buffer.start()
+        wait_for(lambda: buffer.stats()['queued'] == 0)
+
+        stats = buffer.stats()
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['committed'], 2)
+        self.assertEqual(stats['dead_letters'], 1)
+        self.assertEqual(stats['journal']['committed_seq'], 3)
+        self.assertEqual(sorted(db.applications), [1, 3])
+        self.assertEqual([(row[0], row[1]) for row in db.dead_letters], [(2, 2)])
+        self.assertIn('Out of range', db.dead_letters[0][3])
+
+        # Отложенной заявки нет в БД - пользователь может подать ее снова
+        buffer._reserve_id_block = lambda: (4, 1004)
+        application_id, created = buffer.submit(1, 2, 'Предложение', '200.00')
+        self.assertTrue(created)
+        wait_for(lambda: buffer.stats()['committed'] == 3)
+        self.assertIn(application_id, db.applications)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,67 @@
+import unittest
+import os
+import sys
+import time
+
+# Добавляем путь к проекту
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    """Тесты in-process кэша с TTL и LRU"""
+
+    def test_01_hit_and_miss(self):
+        """Счетчики попаданий и промахов"""
+        cache = TTLCache(maxsize=10, ttl=10)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_02_lru_eviction(self):
+        """При переполнении вытесняется давно не использованная запись"""
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_03_expiration(self):
+        """Запись не живет дольше TTL"""
+        cache = TTLCache(maxsize=10, ttl=0.01)
+        cache.set('a', 1)
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_04_entry_ttl_bounded_by_cache_ttl(self):
+        """TTL записи не может превышать TTL кэша"""
+        cache = TTLCache(maxsize=10, ttl=0.01)
+        cache.set('a', 1, ttl=100)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('a'))
+
+        cache.set('b', 1, ttl=0)
+        self.assertEqual(len(cache), 0)
+
+    def test_05_invalidate(self):
+        """Явный сброс записи"""
+        cache = TTLCache(maxsize=10, ttl=10)
+        cache.set(7, False)
+        self.assertTrue(cache.invalidate(7))
+        self.assertFalse(cache.invalidate(7))
+        self.assertIsNone(cache.get(7))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
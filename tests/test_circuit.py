@@ -0,0 +1,138 @@
+import unittest
+import os
+import sys
+import time
+
+# Добавляем путь к API Gateway
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api-gateway'))
+
+from circuit import RollingWindow, UpstreamGuard, CircuitOpenError, BulkheadFullError, CLOSED, OPEN, HALF_OPEN
+
+
+class TestUpstreamGuard(unittest.TestCase):
+    """Тесты выключателя и bulkhead для сервиса"""
+
+    def call(self, guard, ok, latency=0.01):
+        probe = guard.acquire()
+        guard.release(ok, latency, probe)
+
+    def test_01_trips_on_error_rate(self):
+        """Выключатель размыкается при доле ошибок выше порога"""
+        guard = UpstreamGuard('tenders', min_requests=4, error_threshold=0.5, open_seconds=60)
+        self.call(guard, True)
+        self.call(guard, False)
+        self.call(guard, True)
+        self.assertEqual(guard.state, CLOSED)
+
+        self.call(guard, False)
+        self.assertEqual(guard.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            guard.acquire()
+
+    def test_02_half_open_probe(self):
+        """После паузы пропускается один пробный запрос"""
+        guard = UpstreamGuard('tenders', min_requests=1, open_seconds=0.01)
+        self.call(guard, False)
+        time.sleep(0.02)
+
+        probe = guard.acquire()
+        self.assertIsNotNone(probe)
+        with self.assertRaises(CircuitOpenError):
+            guard.acquire()
+        guard.release(True, 0.01, probe)
+        self.assertEqual(guard.state, CLOSED)
+
+    def test_03_bulkhead(self):
+        """Запросы сверх лимита отклоняются сразу"""
+        guard = UpstreamGuard('tenders', max_concurrent=1)
+        guard.acquire()
+        with self.assertRaises(BulkheadFullError):
+            guard.acquire()
+        guard.release(True, 0.01)
+        guard.acquire()
+
+    def test_04_adaptive_timeout(self):
+        """Таймаут следует за p99 в пределах настроенного"""
+        guard = UpstreamGuard('tenders', read_timeout=30, timeout_factor=3, min_timeout=1)
+        self.assertEqual(guard.read_timeout(), 30)
+
+        for _ in range(100):
+            self.call(guard, True, latency=0.5)
+        self.assertAlmostEqual(guard.read_timeout(), 1.5)
+
+    def test_05_straggler_is_not_probe(self):
+        """Ответ запроса, начатого до размыкания, не решает судьбу пробного"""
+        guard = UpstreamGuard('tenders', min_requests=1, open_seconds=0.01)
+        straggler = guard.acquire()
+        self.assertIsNone(straggler)
+        self.call(guard, False)
+        self.assertEqual(guard.state, OPEN)
+        time.sleep(0.02)
+
+        probe = guard.acquire()
+        # Медленный запрос closed-эпохи завершается раньше пробного
+        guard.release(True, 0.5, straggler)
+        self.assertEqual(guard.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            guard.acquire()
+
+        guard.release(False, 0.01, probe)
+        self.assertEqual(guard.state, OPEN)
+        self.assertEqual(guard.trips, 2)
+
+    def test_06_stale_probe_after_reset(self):
+        """Пробный запрос до сброса не закрывает выключатель с новым пробным"""
+        guard = UpstreamGuard('tenders', min_requests=1, open_seconds=0.01)
+        self.call(guard, False)
+        time.sleep(0.02)
+        stale = guard.acquire()
+
+        guard.reset()
+        self.call(guard, False)
+        time.sleep(0.02)
+        probe = guard.acquire()
+
+        guard.release(True, 0.01, stale)
+        self.assertEqual(guard.state, HALF_OPEN)
+        guard.release(True, 0.01, probe)
+        self.assertEqual(guard.state, CLOSED)
+
+
+class TestRollingWindow(unittest.TestCase):
+    """Тесты скользящего окна запросов"""
+
+    def test_01_counts_on_eviction(self):
+        """Счетчики уменьшаются при вытеснении по размеру и по времени"""
+        window = RollingWindow(window=0.05, maxlen=3)
+        window.add(False, 0.1)
+        window.add(True, 0.1)
+        window.add(False, 0.1)
+        self.assertEqual(window.counts(), (3, 2))
+
+        # Вытесняется самая старая ошибка
+        window.add(True, 0.1)
+        self.assertEqual(window.counts(), (3, 1))
+
+        time.sleep(0.06)
+        self.assertEqual(window.counts(), (0, 0))
+
+    def test_02_percentile_cached(self):
+        """Перцентиль пересчитывается не чаще раза в refresh секунд"""
+        window = RollingWindow(refresh=60)
+        for _ in range(10):
+            window.add(True, 0.5)
+        self.assertIsNone(window.percentile(0.99, min_samples=20))
+
+        for _ in range(10):
+            window.add(True, 0.5)
+        self.assertEqual(window.percentile(0.99, min_samples=20), 0.5)
+
+        window.add(True, 5.0)
+        self.assertEqual(window.percentile(0.99, min_samples=20), 0.5)
+
+        window.refresh = 0
+        self.assertEqual(window.percentile(0.99, min_samples=20), 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
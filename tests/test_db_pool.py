@@ -0,0 +1,186 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Добавляем путь к проекту
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.db_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    """Заглушка соединения mysql.connector"""
+
+    def __init__(self):
+        self.closed = False
+        self.alive = True
+        self.in_transaction = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise ConnectionError('gone away')
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self):
+        return FakeCursor()
+
+
+class FakeCursor:
+    """Заглушка курсора: запрос с ошибкой начинается с FAIL"""
+
+    rowcount = 1
+
+    def execute(self, statement, params=None):
+        if statement.startswith('FAIL'):
+            raise ValueError('syntax error')
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Тесты пула соединений с БД"""
+
+    def setUp(self):
+        self.opened = []
+
+        def connect():
+            conn = FakeConnection()
+            self.opened.append(conn)
+            return conn
+
+        self.connect = connect
+
+    def test_01_connection_reused(self):
+        """Соединение возвращается в пул и выдается повторно"""
+        pool = ConnectionPool(self.connect, size=2, max_overflow=0)
+        conn = pool.connection()
+        conn.close()
+        conn = pool.connection()
+        conn.close()
+
+        self.assertEqual(len(self.opened), 1)
+        stats = pool.stats()
+        self.assertEqual(stats['in_use'], 0)
+        self.assertEqual(stats['idle'], 1)
+
+    def test_02_overflow_closed_on_release(self):
+        """Соединения сверх размера пула закрываются при возврате"""
+        pool = ConnectionPool(self.connect, size=1, max_overflow=1)
+        first = pool.connection()
+        second = pool.connection()
+        first.close()
+        second.close()
+
+        self.assertEqual(pool.stats()['idle'], 1)
+        self.assertEqual(sum(conn.closed for conn in self.opened), 1)
+
+    def test_03_wait_timeout(self):
+        """При исчерпании пула ожидание ограничено таймаутом"""
+        pool = ConnectionPool(self.connect, size=1, max_overflow=0, timeout=0.05)
+        conn = pool.connection()
+
+        with self.assertRaises(PoolTimeoutError):
+            pool.connection()
+
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+        conn.close()
+
+    def test_04_waiter_gets_released_connection(self):
+        """Ожидающий поток получает освободившееся соединение"""
+        pool = ConnectionPool(self.connect, size=1, max_overflow=0, timeout=2)
+        conn = pool.connection()
+
+        timer = threading.Timer(0.05, conn.close)
+        timer.start()
+        started = time.monotonic()
+        second = pool.connection()
+        self.assertLess(time.monotonic() - started, 2)
+        second.close()
+
+        self.assertEqual(len(self.opened), 1)
+        self.assertGreater(pool.stats()['wait_time_ms'], 0)
+
+    def test_05_pre_ping_replaces_dead_connection(self):
+        """Мертвое соединение заменяется новым при выдаче"""
+        pool = ConnectionPool(self.connect, size=1, max_overflow=0, pre_ping=True)
+        conn = pool.connection()
+        conn.close()
+        self.opened[0].alive = False
+
+        conn = pool.connection()
+        conn.close()
+
+        self.assertEqual(len(self.opened), 2)
+        self.assertTrue(self.opened[0].closed)
+        self.assertEqual(pool.stats()['invalidated'], 1)
+
+    def test_06_recycle_by_lifetime(self):
+        """Соединение старше recycle закрывается"""
+        pool = ConnectionPool(self.connect, size=1, max_overflow=0, recycle=0.01)
+        conn = pool.connection()
+        conn.close()
+        time.sleep(0.02)
+
+        conn = pool.connection()
+        conn.close()
+
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(pool.stats()['recycled'], 1)
+
+    def test_07_open_transaction_rolled_back(self):
+        """Незавершенная транзакция откатывается при возврате в пул"""
+        pool = ConnectionPool(self.connect, size=1, max_overflow=0)
+        conn = pool.connection()
+        self.opened[0].in_transaction = True
+        conn.close()
+        conn.close()
+
+        self.assertEqual(self.opened[0].rollbacks, 1)
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+    def test_08_invalidate_discards_connection(self):
+        """invalidate() закрывает соединение и освобождает место в пуле"""
+        pool = ConnectionPool(self.connect, size=1, max_overflow=0)
+        conn = pool.connection()
+        conn.invalidate()
+        conn.close()
+
+        self.assertTrue(self.opened[0].closed)
+        stats = pool.stats()
+        self.assertEqual((stats['opened'], stats['in_use'], stats['idle']), (0, 0, 0))
+
+        pool.connection().close()
+        self.assertEqual(len(self.opened), 2)
+
+    def test_09_query_observers(self):
+        """Наблюдатель получает каждый запрос, в том числе завершившийся ошибкой"""
+        pool = ConnectionPool(self.connect, size=1, max_overflow=0)
+        seen = []
+        pool.add_query_observer(
+            lambda statement, params, duration, error: seen.append((statement, params, error))
+        )
+
+        conn = pool.connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT %s', (1,))
+        with self.assertRaises(ValueError):
+            cursor.execute('FAIL')
+        self.assertEqual(cursor.rowcount, 1)
+        conn.close()
+
+        self.assertEqual(seen[0], ('SELECT %s', (1,), None))
+        self.assertEqual(seen[1][0], 'FAIL')
+        self.assertIsInstance(seen[1][2], ValueError)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,68 @@
+import unittest
+import gzip
+import json
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+# Добавляем путь к сервису тендеров
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'tender-service'))
+
+from export import iter_batches, ndjson_chunks, csv_chunks, gzip_chunks
+
+
+class FakeCursor:
+    """Курсор, отдающий заранее заданные строки через fetchmany"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.fetches = 0
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+
+class TestExport(unittest.TestCase):
+    """Тесты потоковой выгрузки"""
+
+    COLUMNS = ['id', 'title', 'budget', 'created_at']
+    ROWS = [
+        (1, 'Поставка, "бумаги"', Decimal('10.50'), datetime(2024, 1, 1, 12, 0)),
+        (2, 'Ремонт', None, datetime(2024, 1, 2))
+    ]
+
+    def test_01_batches(self):
+        """Строки читаются пачками заданного размера"""
+        cursor = FakeCursor(range(5))
+        batches = list(iter_batches(cursor, fetch_size=2))
+
+        self.assertEqual(batches, [[0, 1], [2, 3], [4]])
+        self.assertEqual(cursor.fetches, 4)
+
+    def test_02_ndjson(self):
+        """Одна строка - один JSON-объект, даты в ISO 8601"""
+        data = b''.join(ndjson_chunks(self.COLUMNS, [self.ROWS])).decode('utf-8')
+        lines = [json.loads(line) for line in data.splitlines()]
+
+        self.assertEqual(lines[0]['title'], 'Поставка, "бумаги"')
+        self.assertEqual(lines[0]['budget'], '10.50')
+        self.assertEqual(lines[0]['created_at'], '2024-01-01T12:00:00')
+        self.assertIsNone(lines[1]['budget'])
+
+    def test_03_csv_with_gzip(self):
+        """CSV с заголовком и экранированием, сжатый потоком"""
+        chunks = gzip_chunks(csv_chunks(self.COLUMNS, iter([self.ROWS[:1], self.ROWS[1:]])))
+        data = gzip.decompress(b''.join(chunks)).decode('utf-8-sig')
+
+        self.assertEqual(data.splitlines(), [
+            'id,title,budget,created_at',
+            '1,"Поставка, ""бумаги""",10.50,2024-01-01 12:00:00',
+            '2,Ремонт,,2024-01-02 00:00:00'
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,62 @@
+import unittest
+import os
+import sys
+
+# Добавляем путь к сервису аутентификации
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'auth-service'))
+
+from hashing import PasswordHasher, HashQueueFullError, normalize_method
+
+
+class TestPasswordHasher(unittest.TestCase):
+    """Тесты хеширования паролей в пуле процессов"""
+
+    def test_01_hash_and_verify(self):
+        """Хеш проверяется тем же паролем и не проверяется другим"""
+        hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1)
+        password_hash = hasher.hash('secret')
+
+        self.assertTrue(password_hash.startswith('pbkdf2:sha256:1000$'))
+        self.assertTrue(hasher.verify(password_hash, 'secret'))
+        self.assertFalse(hasher.verify(password_hash, 'wrong'))
+
+    def test_02_needs_rehash(self):
+        """Хеш с другой стоимостью требует обновления"""
+        hasher = PasswordHasher(method='pbkdf2:sha256:2000', workers=1)
+        self.assertTrue(hasher.needs_rehash('pbkdf2:sha256:1000$salt$hash'))
+        self.assertTrue(hasher.needs_rehash('scrypt:32768:8:1$salt$hash'))
+        self.assertFalse(hasher.needs_rehash('pbkdf2:sha256:2000$salt$hash'))
+
+    def test_03_queue_full(self):
+        """При заполненной очереди задача сразу отклоняется"""
+        hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, queue_size=1)
+        hasher._slots.acquire()
+
+        with self.assertRaises(HashQueueFullError):
+            hasher.hash('secret')
+        self.assertEqual(hasher.stats()['rejected'], 1)
+
+    def test_04_short_method(self):
+        """Краткая запись метода не требует обновления хешей, созданных ею же"""
+        hasher = PasswordHasher(method='scrypt', workers=1)
+        self.assertEqual(hasher.method, 'scrypt:32768:8:1')
+
+        password_hash = hasher.hash('secret')
+        self.assertFalse(hasher.needs_rehash(password_hash))
+        self.assertTrue(hasher.needs_rehash('pbkdf2:sha256:600000$salt$hash'))
+
+    def test_05_normalize_method(self):
+        """Полная запись метода совпадает с префиксом хеша werkzeug"""
+        self.assertEqual(normalize_method('pbkdf2'), 'pbkdf2:sha256:600000')
+        self.assertEqual(normalize_method('pbkdf2:sha512'), 'pbkdf2:sha512:600000')
+        self.assertEqual(normalize_method('pbkdf2:sha256:1000'), 'pbkdf2:sha256:1000')
+        self.assertEqual(normalize_method('scrypt:1024:8:1'), 'scrypt:1024:8:1')
+        with self.assertRaises(ValueError):
+            normalize_method('scrypt:1024')
+
+        hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1)
+        self.assertEqual(hasher.hash('secret').split('$', 1)[0], normalize_method('pbkdf2:sha256:1000'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
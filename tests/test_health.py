@@ -0,0 +1,53 @@
+import unittest
+import os
+import sys
+import threading
+
+# Добавляем путь к API Gateway
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api-gateway'))
+
+from health import HealthMonitor, HEALTHY, UNREACHABLE
+
+
+class TestHealthMonitor(unittest.TestCase):
+    """Тесты фонового опроса сервисов"""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.calls = {'auth': 0, 'tenders': 0}
+
+        def auth():
+            self.calls['auth'] += 1
+            return 200
+
+        def tenders():
+            self.calls['tenders'] += 1
+            self.release.wait(5)
+            return 200
+
+        self.monitor = HealthMonitor({'auth': auth, 'tenders': tenders}, interval=0, deadline=0.05)
+
+    def tearDown(self):
+        self.release.set()
+
+    def test_01_stalled_probe_not_resubmitted(self):
+        """Опрос дольше дедлайна не запускается второй раз, пока не завершится"""
+        for _ in range(3):
+            snapshot = self.monitor.refresh()
+            self.assertEqual(snapshot['auth']['status'], HEALTHY)
+            self.assertEqual(snapshot['tenders']['status'], UNREACHABLE)
+
+        self.assertEqual(self.calls, {'auth': 3, 'tenders': 1})
+        self.assertEqual(self.monitor.stats()['stalled_probes'], 2)
+
+        # Завершившийся опрос дает результат следующему обновлению
+        self.release.set()
+        self.assertEqual(self.monitor.refresh()['tenders']['status'], HEALTHY)
+        self.assertEqual(self.calls['tenders'], 1)
+
+        self.monitor.refresh()
+        self.assertEqual(self.calls['tenders'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
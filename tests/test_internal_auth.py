@@ -0,0 +1,51 @@
+import unittest
+import os
+import sys
+
+from flask import Flask, jsonify
+
+# Добавляем путь к проекту
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared import internal_auth
+from shared.internal_auth import INTERNAL_TOKEN_HEADER, internal_headers, internal_only
+
+
+class TestInternalAuth(unittest.TestCase):
+    """Тесты проверки служебных вызовов между сервисами"""
+
+    def setUp(self):
+        self.saved_token = internal_auth.INTERNAL_API_TOKEN
+        app = Flask(__name__)
+
+        @app.route('/auth/blocked')
+        @internal_only
+        def blocked():
+            return jsonify({'user_ids': [7]})
+
+        self.client = app.test_client()
+
+    def tearDown(self):
+        internal_auth.INTERNAL_API_TOKEN = self.saved_token
+
+    def test_01_token_required(self):
+        """Без секрета или с чужим секретом - 403, с верным - ответ маршрута"""
+        internal_auth.INTERNAL_API_TOKEN = 'secret'
+
+        self.assertEqual(self.client.get('/auth/blocked').status_code, 403)
+        self.assertEqual(self.client.get('/auth/blocked', headers={INTERNAL_TOKEN_HEADER: 'guess'}).status_code, 403)
+
+        response = self.client.get('/auth/blocked', headers=internal_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'user_ids': [7]})
+
+    def test_02_not_configured(self):
+        """Секрет не задан - служебные маршруты закрыты для всех"""
+        internal_auth.INTERNAL_API_TOKEN = ''
+
+        self.assertEqual(internal_headers(), {})
+        self.assertEqual(self.client.get('/auth/blocked', headers={INTERNAL_TOKEN_HEADER: ''}).status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,132 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+# Добавляем путь к сервису тендеров
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'tender-service'))
+
+import journal as journal_module
+from journal import Journal, JournalLockedError
+
+
+class TestJournal(unittest.TestCase):
+    """Тесты журнала заявок"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'applications.journal')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def reopen(self, journal):
+        journal.close()
+        journal = Journal(self.path)
+        return journal, journal.open()
+
+    def test_01_replay_after_restart(self):
+        """Незафиксированные записи возвращаются при открытии в исходном порядке"""
+        journal = Journal(self.path)
+        self.assertEqual(journal.open(), [])
+
+        for user_id in (1, 2, 3):
+            journal.wait_durable(journal.write({'user_id': user_id}))
+
+        journal, records = self.reopen(journal)
+        self.assertEqual([r['user_id'] for r in records], [1, 2, 3])
+        self.assertEqual([r['seq'] for r in records], [1, 2, 3])
+
+        # Нумерация продолжается после перезапуска
+        journal.write({'user_id': 4})
+        self.assertEqual(journal.last_seq, 4)
+        journal.close()
+
+    def test_02_torn_tail_dropped(self):
+        """Оборванная при сбое последняя строка отбрасывается"""
+        journal = Journal(self.path)
+        journal.open()
+        journal.wait_durable(journal.write({'user_id': 1}))
+        journal.close()
+
+        with open(self.path, 'ab') as f:
+            f.write(b'{"user_id":2,"se')
+
+        journal = Journal(self.path)
+        records = journal.open()
+        self.assertEqual([r['user_id'] for r in records], [1])
+
+        # Новая запись не склеивается с отброшенным хвостом
+        journal.write({'user_id': 3})
+        journal, records = self.reopen(journal)
+        self.assertEqual([r['user_id'] for r in records], [1, 3])
+        journal.close()
+
+    def test_03_checkpoint_and_truncate(self):
+        """Перенесенные записи не повторяются, пустой журнал усекается"""
+        journal = Journal(self.path)
+        journal.open()
+        for user_id in (1, 2, 3):
+            journal.write({'user_id': user_id})
+
+        journal.checkpoint(2)
+        self.assertFalse(journal.truncate_if_drained())
+
+        journal, records = self.reopen(journal)
+        self.assertEqual([r['user_id'] for r in records], [3])
+
+        journal.checkpoint(3)
+        self.assertTrue(journal.truncate_if_drained())
+        self.assertEqual(os.path.getsize(self.path), 0)
+
+        journal, records = self.reopen(journal)
+        self.assertEqual(records, [])
+        journal.write({'user_id': 4})
+        self.assertEqual(journal.last_seq, 4)
+        journal.close()
+
+    def test_04_group_fsync(self):
+        """Один fsync покрывает все записи, сделанные до него"""
+        journal = Journal(self.path)
+        journal.open()
+        first = journal.write({'user_id': 1})
+        second = journal.write({'user_id': 2})
+
+        journal.wait_durable(second)
+        journal.wait_durable(first)
+        self.assertEqual(journal.fsyncs, 1)
+        journal.close()
+
+    def test_05_single_writer(self):
+        """Второе открытие того же журнала сразу отклоняется"""
+        journal = Journal(self.path)
+        journal.open()
+        journal.write({'user_id': 1})
+
+        with self.assertRaises(JournalLockedError):
+            Journal(self.path).open()
+
+        journal, records = self.reopen(journal)
+        self.assertEqual([r['user_id'] for r in records], [1])
+        journal.close()
+
+    def test_06_checkpoint_syncs_directory(self):
+        """После замены контрольной точки сбрасывается запись каталога"""
+        synced = []
+        saved = journal_module.fsync_directory
+        journal_module.fsync_directory = synced.append
+        try:
+            journal = Journal(self.path)
+            journal.open()
+            journal.write({'user_id': 1})
+            journal.checkpoint(1)
+            journal.close()
+        finally:
+            journal_module.fsync_directory = saved
+
+        self.assertEqual(synced, [self.path + '.checkpoint'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
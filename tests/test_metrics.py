@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+import threading
+
+from flask import Flask, jsonify
+
+# Добавляем путь к проекту
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.metrics import Metrics, init_app, query_name
+
+
+class TestMetrics(unittest.TestCase):
+    """Тесты метрик Prometheus"""
+
+    def test_01_counters_from_many_threads(self):
+        """Счетчики потоков суммируются, в том числе завершившихся"""
+        metrics = Metrics()
+
+        def work():
+            for _ in range(1000):
+                metrics.inc('jobs_total', (('kind', 'a'),))
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        metrics.inc('jobs_total', (('kind', 'a'),), 5)
+
+        counters, _ = metrics.collect()
+        self.assertEqual(counters[('jobs_total', (('kind', 'a'),))], 8005)
+        # Повторный сбор после слияния завершившихся потоков дает то же
+        counters, _ = metrics.collect()
+        self.assertEqual(counters[('jobs_total', (('kind', 'a'),))], 8005)
+
+    def test_02_histogram_rendering(self):
+        """Гистограмма выводится накопительно, с +Inf, суммой и количеством"""
+        metrics = Metrics(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            metrics.observe('latency_seconds', value, (('route', '/x'),))
+
+        text = metrics.render()
+
+        self.assertIn('# TYPE latency_seconds histogram', text)
+        self.assertIn('latency_seconds_bucket{route="/x",le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{route="/x",le="1.0"} 3', text)
+        self.assertIn('latency_seconds_bucket{route="/x",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_sum{route="/x"} 3.65', text)
+        self.assertIn('latency_seconds_count{route="/x"} 4', text)
+
+    def test_03_query_names(self):
+        """Имя запроса - команда и первая таблица"""
+        self.assertEqual(query_name('\n  SELECT t.id FROM tenders t WHERE 1=1'), 'SELECT tenders')
+        self.assertEqual(query_name('INSERT IGNORE INTO applications (id) VALUES (%s)'), 'INSERT applications')
+        self.assertEqual(query_name('UPDATE users SET is_active = %s'), 'UPDATE users')
+        self.assertEqual(query_name('SET SESSION net_write_timeout = 600'), 'SET')
+
+    def test_04_flask_routes(self):
+        """Запросы размечаются шаблоном маршрута и кодом ответа"""
+        app = Flask(__name__)
+        metrics = Metrics()
+        init_app(app, metrics)
+
+        @app.route('/items/<int:item_id>')
+        def item(item_id):
+            if item_id == 0:
+                return jsonify({'error': 'not found'}), 404
+            return jsonify({'id': item_id})
+
+        client = app.test_client()
+        client.get('/items/1')
+        client.get('/items/2')
+        client.get('/items/0')
+
+        text = client.get('/metrics').get_data(as_text=True)
+        self.assertIn(
+            'http_requests_total{route="/items/<int:item_id>",method="GET",status="200"} 2', text
+        )
+        self.assertIn(
+            'http_requests_total{route="/items/<int:item_id>",method="GET",status="404"} 1', text
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{route="/items/<int:item_id>",method="GET"} 3', text
+        )
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,158 @@
+import unittest
+import os
+import re
+import sys
+
+# Добавляем путь к проекту
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.migrations import MigrationError, add_index, migrate, schema_status
+
+
+class OnlineDDLError(Exception):
+    errno = 1846
+
+
+class FakeDatabase:
+    """Состояние базы: таблица schema_version, индексы, выполненные запросы"""
+
+    def __init__(self, online_ddl=True):
+        self.online_ddl = online_ddl
+        self.versions = set()
+        self.has_version_table = False
+        self.indexes = set()
+        self.statements = []
+        self.locked = False
+
+
+class FakeCursor:
+    def __init__(self, db, conn):
+        self.db = db
+        self.conn = conn
+        self.result = []
+
+    def execute(self, statement, params=None):
+        text = ' '.join(statement.split())
+        self.db.statements.append(text)
+        self.result = []
+
+        if text.startswith('SELECT GET_LOCK'):
+            self.db.locked = True
+            self.result = [(1,)]
+        elif text.startswith('SELECT RELEASE_LOCK'):
+            self.db.locked = False
+            self.result = [(1,)]
+        elif 'schema_version (' in text and text.startswith('CREATE TABLE'):
+            self.db.has_version_table = True
+        elif text.startswith('SELECT version FROM schema_version'):
+            self.result = [(version,) for version in self.db.versions]
+        elif text.startswith('INSERT INTO schema_version'):
+            self.conn.pending.add(params[0])
+        elif 'information_schema.TABLES' in text:
+            self.result = [(1 if self.db.has_version_table else 0,)]
+        elif 'information_schema.STATISTICS' in text:
+            self.result = [(1 if params[1] in self.db.indexes else 0,)]
+        elif text.startswith('ALTER TABLE'):
+            if 'ALGORITHM=INPLACE' in text and not self.db.online_ddl:
+                raise OnlineDDLError('ALGORITHM=INPLACE is not supported')
+            match = re.search(r'ADD (?:\w+ )*?(\w+) \(', text)
+            self.db.indexes.add(match.group(1))
+        elif text == 'FAIL':
+            raise RuntimeError('ошибка шага')
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.pending = set()
+
+    def cursor(self):
+        return FakeCursor(self.db, self)
+
+    def commit(self):
+        self.db.versions |= self.pending
+        self.pending = set()
+
+    def rollback(self):
+        self.pending = set()
+
+
+def add_status_index(conn, cursor):
+    add_index(cursor, 'tenders', 'idx_status_created', 'status, created_at, id')
+
+
+MIGRATIONS = [
+    (1, 'Таблица тендеров', ['CREATE TABLE IF NOT EXISTS tenders (id INT)']),
+    (2, 'Индекс списка тендеров', [add_status_index])
+]
+
+
+class TestMigrations(unittest.TestCase):
+    """Тесты версионных миграций схемы"""
+
+    def test_01_applied_once(self):
+        """Миграции применяются по порядку один раз и записываются в schema_version"""
+        db = FakeDatabase()
+        conn = FakeConnection(db)
+
+        self.assertEqual(schema_status(conn, MIGRATIONS), {'version': 0, 'expected': 2, 'pending': [1, 2]})
+        self.assertEqual(migrate(conn, MIGRATIONS), [1, 2])
+        self.assertEqual(db.versions, {1, 2})
+        self.assertIn('idx_status_created', db.indexes)
+        self.assertFalse(db.locked)
+
+        # Повторный запуск (другой процесс, следующий деплой) ничего не меняет
+        db.statements = []
+        self.assertEqual(migrate(conn, MIGRATIONS), [])
+        self.assertFalse(any(s.startswith(('ALTER', 'CREATE TABLE IF NOT EXISTS tenders')) for s in db.statements))
+        self.assertEqual(schema_status(conn, MIGRATIONS)['pending'], [])
+
+    def test_02_online_ddl(self):
+        """Индекс добавляется онлайн, без поддержки - обычным ALTER, существующий пропускается"""
+        db = FakeDatabase()
+        cursor = FakeCursor(db, FakeConnection(db))
+
+        add_index(cursor, 'tenders', 'idx_deadline', 'deadline')
+        self.assertIn('ALTER TABLE tenders ADD INDEX idx_deadline (deadline), ALGORITHM=INPLACE, LOCK=NONE',
+                      db.statements)
+
+        db.online_ddl = False
+        add_index(cursor, 'tenders', 'ft_search_text', 'search_text', kind='FULLTEXT INDEX')
+        self.assertEqual(db.statements[-1], 'ALTER TABLE tenders ADD FULLTEXT INDEX ft_search_text (search_text)')
+
+        db.statements = []
+        self.assertFalse(add_index(cursor, 'tenders', 'idx_deadline', 'deadline'))
+        self.assertFalse(any(s.startswith('ALTER') for s in db.statements))
+
+    def test_03_failed_migration(self):
+        """Ошибка шага: версия не записана, следующие не применяются, блокировка снята"""
+        db = FakeDatabase()
+        conn = FakeConnection(db)
+        migrations = MIGRATIONS + [(3, 'Сломанная миграция', ['FAIL']), (4, 'Следующая', ['SELECT 1'])]
+
+        with self.assertRaises(MigrationError):
+            migrate(conn, migrations)
+
+        self.assertEqual(db.versions, {1, 2})
+        self.assertFalse(db.locked)
+        self.assertEqual(schema_status(conn, migrations)['pending'], [3, 4])
+
+    def test_04_versions_must_increase(self):
+        """Повтор или убывание версий - ошибка до выполнения"""
+        db = FakeDatabase()
+        with self.assertRaises(MigrationError):
+            migrate(FakeConnection(db), [MIGRATIONS[1], MIGRATIONS[0]])
+        self.assertEqual(db.statements, [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,88 @@
+import unittest
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+# Добавляем путь к проекту
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.pagination import (
+    CURSOR_DATETIME_FORMAT, InvalidCursorError, encode_cursor, decode_cursor,
+    keyset_condition, keyset_params, next_cursor
+)
+
+
+class TestPagination(unittest.TestCase):
+    """Тесты курсорной пагинации"""
+
+    def setUp(self):
+        # Три записи с одинаковым created_at: порядок между ними задает id
+        self.db = sqlite3.connect(':memory:')
+        self.db.execute('CREATE TABLE tenders (id INTEGER, created_at TEXT)')
+        self.db.executemany('INSERT INTO tenders VALUES (?, ?)', [
+            (1, '2024-01-01 10:00:00'),
+            (2, '2024-01-02 10:00:00'),
+            (3, '2024-01-02 10:00:00'),
+            (4, '2024-01-02 10:00:00'),
+            (5, '2024-01-03 10:00:00')
+        ])
+
+    def tearDown(self):
+        self.db.close()
+
+    def page(self, after, per_page):
+        query = 'SELECT id, created_at FROM tenders t WHERE 1=1'
+        params = []
+        if after:
+            query += keyset_condition('t.created_at', 't.id')
+            params = [value.strftime(CURSOR_DATETIME_FORMAT) if isinstance(value, datetime) else value
+                      for value in keyset_params(decode_cursor(after))]
+        query += ' ORDER BY t.created_at DESC, t.id DESC LIMIT ?'
+        rows = self.db.execute(query.replace('%s', '?'), params + [per_page + 1]).fetchall()
+        rows = [{'id': row_id, 'created_at': created_at} for row_id, created_at in rows]
+        return [row['id'] for row in rows[:per_page]], next_cursor(rows, per_page)
+
+    def test_01_round_trip(self):
+        """Курсор возвращает те же created_at и id, без дополнения base64"""
+        token = encode_cursor(datetime(2024, 1, 2, 10, 0), 3)
+        self.assertNotIn('=', token)
+        self.assertEqual(decode_cursor(token), (datetime(2024, 1, 2, 10, 0), 3))
+        self.assertEqual(decode_cursor(encode_cursor('2024-01-02 10:00:00', 3)),
+                         (datetime(2024, 1, 2, 10, 0), 3))
+
+    def test_02_ties_split_across_pages(self):
+        """Записи с одинаковым created_at не теряются и не повторяются на границе страниц"""
+        pages = []
+        after = None
+        while True:
+            ids, after = self.page(after, 2)
+            pages.append(ids)
+            if after is None:
+                break
+        self.assertEqual(pages, [[5, 4], [3, 2], [1]])
+
+    def test_03_has_more(self):
+        """Курсор есть, только если запрошенная с запасом строка нашлась"""
+        ids, after = self.page(None, 5)
+        self.assertEqual(ids, [5, 4, 3, 2, 1])
+        self.assertIsNone(after)
+
+        ids, after = self.page(None, 4)
+        self.assertEqual(ids, [5, 4, 3, 2])
+        self.assertEqual(decode_cursor(after), (datetime(2024, 1, 2, 10, 0), 2))
+        self.assertEqual(self.page(after, 4), ([1], None))
+
+    def test_04_invalid_cursor(self):
+        """Поврежденный или подделанный курсор - InvalidCursorError"""
+        valid = encode_cursor('2024-01-02 10:00:00', 3)
+        for token in ('', '!!!', 'bm90IGpzb24', valid[:-3],
+                      encode_cursor('вчера', 3), encode_cursor('2024-01-02 10:00:00', 'x'),
+                      'eyJjIjoiMjAyNC0wMS0wMiAxMDowMDowMCJ9'):
+            with self.subTest(token=token):
+                with self.assertRaises(InvalidCursorError):
+                    decode_cursor(token)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
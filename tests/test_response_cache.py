@@ -0,0 +1,62 @@
+import unittest
+import os
+import sys
+
+# Добавляем путь к проекту
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    """Тесты кэша ответов с тегами и ETag"""
+
+    def test_01_etag_depends_on_body(self):
+        """ETag одинаков для одинаковых тел и различается для разных"""
+        cache = ResponseCache()
+        first = cache.set('a', b'{"id": 1}')
+        second = cache.set('b', b'{"id": 1}')
+        third = cache.set('c', b'{"id": 2}')
+
+        self.assertEqual(first.etag, second.etag)
+        self.assertNotEqual(first.etag, third.etag)
+        self.assertIs(cache.get('a'), first)
+
+    def test_02_invalidate_by_tag(self):
+        """Сбрасываются только записи с указанным тегом"""
+        cache = ResponseCache()
+        cache.set('detail:1', b'1', ['tender:1'])
+        cache.set('list:active', b'[1, 2]', ['tender:1', 'tender:2', 'status:active'])
+        cache.set('list:draft', b'[3]', ['tender:3', 'status:draft'])
+
+        self.assertEqual(cache.invalidate('tender:1'), 2)
+        self.assertIsNone(cache.get('detail:1'))
+        self.assertIsNone(cache.get('list:active'))
+        self.assertIsNotNone(cache.get('list:draft'))
+
+    def test_03_memory_limit(self):
+        """Суммарный объем тел не превышает лимит"""
+        cache = ResponseCache(maxsize=100, max_bytes=10)
+        cache.set('a', b'12345')
+        cache.set('b', b'12345')
+        cache.set('c', b'12345')
+
+        self.assertIsNone(cache.get('a'))
+        self.assertLessEqual(cache.stats()['bytes'], 10)
+
+        cache.set('big', b'x' * 11)
+        self.assertIsNone(cache.get('big'))
+
+    def test_04_stale_generation_not_stored(self):
+        """Ответ, собранный до инвалидации, не сохраняется"""
+        cache = ResponseCache()
+        generation = cache.generation
+        cache.invalidate('tender:1')
+        cache.set('detail:1', b'old', ['tender:1'], generation=generation)
+
+        self.assertIsNone(cache.get('detail:1'))
+        self.assertEqual(cache.stats()['stale_skips'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
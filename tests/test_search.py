@@ -0,0 +1,94 @@
+import unittest
+import os
+import sqlite3
+import sys
+
+# Добавляем путь к сервису тендеров
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'tender-service'))
+
+from search import stem, index_text, build_query, tender_filters
+
+
+class TestRussianStemmer(unittest.TestCase):
+    """Тесты стеммера для полнотекстового поиска тендеров"""
+
+    def test_01_word_forms_share_stem(self):
+        """Формы одного слова приводятся к одной основе"""
+        self.assertEqual(stem('поставка'), stem('поставки'))
+        self.assertEqual(stem('ремонт'), stem('ремонта'))
+        self.assertEqual(stem('разработка'), stem('разработки'))
+
+    def test_02_snowball_reference(self):
+        """Совпадение с эталонными основами Snowball"""
+        expected = {
+            'важнейший': 'важн',
+            'красивейшая': 'красив',
+            'стоимость': 'стоимост',
+            'офисных': 'офисн',
+            'компьютеров': 'компьютер',
+        }
+        for word, result in expected.items():
+            self.assertEqual(stem(word), result, word)
+
+    def test_03_non_cyrillic_kept(self):
+        """Латиница и числа не изменяются"""
+        self.assertEqual(stem('SIEM'), 'siem')
+        self.assertEqual(stem('2024'), '2024')
+
+    def test_04_query_matches_index(self):
+        """Основы запроса являются префиксами проиндексированных основ"""
+        indexed = index_text('Поставка компьютерной техники').split()
+        query = build_query('компьютерная техника')
+
+        terms = [term.strip('+*') for term in query.split()]
+        self.assertEqual(len(terms), 2)
+        for term in terms:
+            self.assertTrue(any(token.startswith(term) for token in indexed), term)
+
+    def test_05_short_words_skipped(self):
+        """Слова короче минимального размера токена не попадают в запрос"""
+        self.assertEqual(build_query('и в на'), '')
+        self.assertEqual(build_query('ремонт и отделка'), '+ремонт* +отделк*')
+
+
+class TestTenderFilters(unittest.TestCase):
+    """Тесты условий выборки тендеров"""
+
+    def setUp(self):
+        self.db = sqlite3.connect(':memory:')
+        self.db.execute('CREATE TABLE tenders (id INTEGER, title TEXT, description TEXT, '
+                        'customer TEXT, status TEXT)')
+        self.db.executemany('INSERT INTO tenders VALUES (?, ?, ?, ?, ?)', [
+            (1, 'Сопровождение инфраструктуры', 'Поддержка ИТ-систем заказчика', 'АО Энерго', 'active'),
+            (2, 'Ремонт кровли', 'Замена покрытия', 'ИТ Сервис', 'active'),
+            (3, 'Поставка мебели', 'Офисные столы', 'ООО Ромашка', 'active'),
+            (4, 'ИТ-аудит', 'Проверка систем', 'ООО Ромашка', 'draft')
+        ])
+
+    def tearDown(self):
+        self.db.close()
+
+    def select(self, status, search):
+        filters, params, fulltext_query = tender_filters(status, search)
+        self.assertFalse(fulltext_query)
+        rows = self.db.execute(
+            'SELECT t.id FROM tenders t WHERE 1=1' + filters.replace('%s', '?'), params
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def test_01_short_term_in_description(self):
+        """Короткое слово ищется по названию, описанию и заказчику"""
+        self.assertEqual(build_query('ИТ'), '')
+        self.assertEqual(self.select('active', 'ИТ'), [1, 2])
+        self.assertEqual(self.select('', 'ИТ'), [1, 2, 4])
+
+    def test_02_fulltext_query(self):
+        """Слово из индекса ищется через MATCH по основе"""
+        filters, params, fulltext_query = tender_filters('active', 'поставки')
+        self.assertEqual(filters, ' AND t.status = %s AND MATCH(t.search_text) AGAINST (%s IN BOOLEAN MODE)')
+        self.assertEqual(params, ['active', '+поставк*'])
+        self.assertEqual(fulltext_query, '+поставк*')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,68 @@
+import unittest
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Добавляем путь к API Gateway
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api-gateway'))
+
+from singleflight import SingleFlight, AsyncSingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Тесты объединения одинаковых одновременных запросов"""
+
+    def test_01_threads_share_one_call(self):
+        """Одновременные вызовы с одним ключом выполняют функцию один раз"""
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return 'ответ'
+
+        with ThreadPoolExecutor(10) as executor:
+            futures = [executor.submit(flight.do, 'tenders/1', fetch) for _ in range(10)]
+            results = [future.result() for future in futures]
+
+        self.assertEqual(results, ['ответ'] * 10)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats()['deduplicated'], 9)
+
+    def test_02_error_shared_and_not_cached(self):
+        """Ошибка передается ожидающим, следующий вызов выполняется заново"""
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError('сбой')
+
+        with self.assertRaises(ValueError):
+            flight.do('k', fail)
+        self.assertEqual(flight.do('k', lambda: 42), 42)
+
+    def test_03_async(self):
+        """Асинхронный вариант объединяет корутины одного цикла"""
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'ответ'
+
+        async def main():
+            return await asyncio.gather(*[flight.do('k', fetch) for _ in range(5)])
+
+        self.assertEqual(asyncio.run(main()), ['ответ'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
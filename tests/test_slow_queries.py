@@ -0,0 +1,137 @@
+import unittest
+import os
+import sys
+import time
+
+from flask import Flask
+
+# Добавляем путь к проекту
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.db_pool import ConnectionPool
+from shared.slow_queries import SlowQueryLog, fingerprint, init_app
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+        self.rows = []
+
+    def execute(self, statement, params=None):
+        self.log.append((statement, params))
+        if statement.startswith('EXPLAIN'):
+            self.rows = [{'id': 1, 'select_type': 'SIMPLE', 'table': 'tenders',
+                          'type': 'ALL', 'key': None, 'rows': 20000}]
+        elif 'FROM tenders' in statement:
+            time.sleep(0.02)
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    in_transaction = False
+    log = []
+
+    def ping(self, reconnect=False):
+        pass
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.log)
+
+    def close(self):
+        pass
+
+
+class TestSlowQueries(unittest.TestCase):
+    """Тесты журнала медленных запросов"""
+
+    def setUp(self):
+        FakeConnection.log = []
+        self.pool = ConnectionPool(FakeConnection, size=2, max_overflow=0)
+        self.slow_log = SlowQueryLog(threshold=0.01)
+
+        self.app = Flask(__name__)
+        init_app(self.app, self.slow_log, self.pool, '/tenders/slow-queries')
+        self.client = self.app.test_client()
+
+    def run_query(self, statement, params=None):
+        conn = self.pool.connection(track=False)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(statement, params)
+        conn.close()
+
+    def test_01_fingerprint(self):
+        """Значения и длина IN (...) не меняют отпечаток, набор условий - меняет"""
+        first = fingerprint("SELECT * FROM tenders t WHERE 1=1 AND t.status = %s AND t.id IN (%s, %s) LIMIT 20")
+        second = fingerprint("select *\n  from tenders t where 1=1 and t.status = 'closed' AND t.id IN (%s) LIMIT 50")
+        other = fingerprint("SELECT * FROM tenders t WHERE 1=1 AND t.budget >= %s LIMIT 20")
+
+        self.assertEqual(first, 'select * from tenders t where ?=? and t.status = ? and t.id in (...) limit ?')
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(
+            fingerprint('INSERT INTO users (email, role) VALUES (%s, %s), (%s, %s)'),
+            'insert into users (email, role) values (...)'
+        )
+
+    def test_02_slow_query_explained_once(self):
+        """Медленный запрос: параметры обезличены, EXPLAIN - один раз на отпечаток"""
+        for status in ('active', 'closed', 'draft'):
+            self.run_query('SELECT * FROM tenders WHERE status = %s', (status,))
+        self.run_query('SELECT id FROM users WHERE email = %s', ('a@b.ru',))
+        self.slow_log.flush()
+
+        explains = [entry for entry in FakeConnection.log if entry[0].startswith('EXPLAIN')]
+        self.assertEqual(explains, [('EXPLAIN SELECT * FROM tenders WHERE status = %s', ('active',))])
+
+        report = self.slow_log.report()
+        self.assertEqual(report['fingerprints'], 2)
+        top = report['queries'][0]
+        self.assertEqual(top['fingerprint'], 'select * from tenders where status = ?')
+        self.assertEqual(top['calls'], 3)
+        self.assertEqual(top['slow_calls'], 3)
+        self.assertEqual([s['params'] for s in top['slow_samples']], [['str(6)'], ['str(6)'], ['str(5)']])
+        self.assertEqual(top['explain'][0]['type'], 'ALL')
+
+        # Быстрый запрос учтен, но без параметров и EXPLAIN
+        fast = report['queries'][1]
+        self.assertEqual(fast['slow_calls'], 0)
+        self.assertIsNone(fast['explain'])
+
+    def test_03_capture_params(self):
+        """Значения параметров сохраняются только по явному разрешению"""
+        self.run_query('SELECT * FROM tenders WHERE status = %s AND budget >= %s', ('active', 100))
+        sample = self.slow_log.report()['queries'][0]['slow_samples'][0]
+        self.assertEqual(sample['params'], ['str(6)', 'int'])
+
+        self.slow_log.reset()
+        self.slow_log.capture_params = True
+        self.run_query('SELECT * FROM tenders WHERE status = %s AND budget >= %s', ('active', 100))
+        self.slow_log.flush()
+        sample = self.slow_log.report()['queries'][0]['slow_samples'][0]
+        self.assertEqual(sample['params'], ['active', 100])
+
+    def test_04_report_endpoint(self):
+        """Отчет доступен только администратору и очищается DELETE"""
+        self.run_query('SELECT * FROM tenders WHERE id = %s', (1,))
+        self.slow_log.flush()
+
+        self.assertEqual(self.client.get('/tenders/slow-queries').status_code, 403)
+
+        headers = {'X-User-Role': 'admin'}
+        response = self.client.get('/tenders/slow-queries?sort=max&limit=5', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['queries'][0]['fingerprint'],
+                         'select * from tenders where id = ?')
+        self.assertEqual(self.client.get('/tenders/slow-queries?sort=name', headers=headers).status_code, 400)
+
+        self.client.delete('/tenders/slow-queries', headers=headers)
+        self.assertEqual(self.client.get('/tenders/slow-queries', headers=headers).get_json()['queries'], [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
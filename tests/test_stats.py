@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+from decimal import Decimal
+
+# Добавляем путь к сервису тендеров
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'tender-service'))
+
+from stats import (
+    PRICE_BUCKETS, APPLICATION_COUNT_BUCKETS, bucket_of, bucket_label,
+    record_tenders, record_applications, read_stats
+)
+
+
+class FakeCursor:
+    """Курсор, складывающий счетчики сводных таблиц в словари"""
+
+    def __init__(self):
+        self.tables = {
+            'stats_tenders': {},
+            'stats_application_prices': {},
+            'stats_tender_applications': {}
+        }
+        self.result = []
+
+    def executemany(self, query, rows):
+        table = query.split('INSERT INTO')[1].split()[0]
+        key_size = {'stats_tenders': 3}.get(table, 2)
+        for row in rows:
+            key, values = row[:key_size], row[key_size:]
+            current = self.tables[table].get(key, (0,) * len(values))
+            self.tables[table][key] = tuple(a + b for a, b in zip(current, values))
+
+    def execute(self, query, params=None):
+        table = query.split('FROM')[1].split()[0]
+        key_size = {'stats_tenders': 2}.get(table, 1)
+        totals = {}
+        for key, values in self.tables[table].items():
+            group = key[:key_size]
+            current = totals.get(group, (0,) * len(values))
+            totals[group] = tuple(a + b for a, b in zip(current, values))
+        self.result = [group + values for group, values in totals.items()]
+
+    def fetchall(self):
+        return self.result
+
+
+class TestStats(unittest.TestCase):
+    """Тесты сводной статистики"""
+
+    def test_01_buckets(self):
+        """Границы интервалов включаются в интервал справа"""
+        self.assertEqual(bucket_of(PRICE_BUCKETS, Decimal('9999.99')), 0)
+        self.assertEqual(bucket_of(PRICE_BUCKETS, 10000), 1)
+        self.assertEqual(bucket_of(PRICE_BUCKETS, 10 ** 9), len(PRICE_BUCKETS) - 1)
+        self.assertEqual(bucket_of(PRICE_BUCKETS, None), 0)
+        self.assertEqual(bucket_of(APPLICATION_COUNT_BUCKETS, 5), 2)
+        self.assertEqual(bucket_label(APPLICATION_COUNT_BUCKETS, 2), '2-5')
+        self.assertEqual(bucket_label(APPLICATION_COUNT_BUCKETS, 1), '1')
+
+    def test_02_incremental_updates(self):
+        """Записи тендеров и заявок сразу видны в статистике"""
+        cursor = FakeCursor()
+        record_tenders(cursor, [
+            ('active', 'RUB', '1000.50'),
+            ('active', 'RUB', None),
+            ('draft', 'USD', 200)
+        ])
+        record_applications(cursor, [500, '20000'], [(0, 1), (1, 2)])
+        record_applications(cursor, [700], [(0, 1)])
+
+        stats = read_stats(cursor)
+
+        self.assertEqual(stats['tenders']['total'], 3)
+        self.assertEqual(stats['tenders']['by_status'], {'active': 2, 'draft': 1})
+        self.assertEqual(stats['tenders']['budget_by_currency'], {'RUB': '1000.50', 'USD': '200'})
+
+        applications = stats['applications']
+        self.assertEqual(applications['total'], 3)
+        self.assertEqual(applications['per_tender_avg'], 1.0)
+        # Один тендер без заявок, один с одной, один с двумя
+        self.assertEqual([b['tenders'] for b in applications['per_tender'][:3]], [1, 1, 1])
+        self.assertEqual(applications['price_distribution'][0]['applications'], 2)
+        self.assertEqual(applications['price_distribution'][0]['price_sum'], '1200')
+        self.assertEqual(applications['price_distribution'][1]['applications'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
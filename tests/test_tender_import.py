@@ -0,0 +1,86 @@
+import unittest
+import importlib.util
+import json
+import os
+import sys
+
+# Добавляем путь к проекту и к сервису тендеров
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'tender-service'))
+
+# app.py есть у каждого сервиса и у шлюза: модуль загружается под своим именем
+_spec = importlib.util.spec_from_file_location(
+    'tender_app', os.path.join(os.path.dirname(__file__), '..', 'services', 'tender-service', 'app.py')
+)
+tender_app = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(tender_app)
+
+
+class FakeConnection:
+    def cursor(self):
+        return self
+
+    def close(self):
+        pass
+
+
+class TestTenderImport(unittest.TestCase):
+    """Тесты валидации тендеров при создании и импорте"""
+
+    HEADERS = {'X-User-ID': '1', 'X-User-Role': 'manager'}
+    VALID = {'title': 'Поставка бумаги', 'customer': 'ООО Ромашка', 'deadline': '2030-01-01 12:00:00'}
+
+    def setUp(self):
+        self.inserted = []
+
+        def insert_batch(conn, cursor, batch):
+            self.inserted.extend(line_no for line_no, _ in batch)
+            return []
+
+        self.saved = tender_app.get_db_connection, tender_app.insert_tender_batch
+        tender_app.get_db_connection = FakeConnection
+        tender_app.insert_tender_batch = insert_batch
+        self.client = tender_app.app.test_client()
+
+    def tearDown(self):
+        tender_app.get_db_connection, tender_app.insert_tender_batch = self.saved
+
+    def test_01_validate_types(self):
+        """Поля неверного типа и бюджет вне DECIMAL(15,2) отклоняются"""
+        self.assertIsNone(tender_app.validate_tender(dict(self.VALID, budget='1000.50')))
+        self.assertIsNone(tender_app.validate_tender(dict(self.VALID, description=None)))
+
+        for field, value in (('title', 5), ('customer', ['ООО']), ('description', {'text': 'x'}),
+                             ('deadline', 20300101), ('title', 'x' * 501), ('budget', -1),
+                             ('budget', '1.005'), ('budget', True), ('budget', 'много'), ('budget', 10 ** 14)):
+            with self.subTest(field=field, value=value):
+                self.assertIsNotNone(tender_app.validate_tender(dict(self.VALID, **{field: value})))
+
+    def test_02_mixed_ndjson(self):
+        """Ошибочные строки попадают в отчет, остальные загружаются"""
+        lines = [
+            json.dumps(self.VALID),
+            json.dumps(dict(self.VALID, title=5)),
+            '{не json',
+            json.dumps(dict(self.VALID, budget='abc')),
+            json.dumps(dict(self.VALID, customer='ООО Лютик'))
+        ]
+        response = self.client.post('/tenders/import', data='\n'.join(lines).encode('utf-8'),
+                                    headers=self.HEADERS)
+
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()
+        self.assertEqual(result['imported'], 2)
+        self.assertEqual(result['failed'], 3)
+        self.assertEqual([error['line'] for error in result['errors']], [2, 3, 4])
+        self.assertEqual(self.inserted, [1, 5])
+
+    def test_03_create_invalid_type(self):
+        """POST /tenders с числом в title - 400, а не 500"""
+        response = self.client.post('/tenders', json=dict(self.VALID, title=5), headers=self.HEADERS)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
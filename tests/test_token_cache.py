@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+import time
+
+# Добавляем путь к проекту и к API Gateway
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api-gateway'))
+
+from token_cache import TokenCache, RevocationList
+
+
+class TestTokenCache(unittest.TestCase):
+    """Тесты кэша проверенных токенов"""
+
+    def test_01_ttl_capped_at_exp(self):
+        """Запись живет до exp токена, даже если ttl кэша больше"""
+        cache = TokenCache(ttl=3600)
+        data = {'user_id': 1, 'exp': time.time() + 0.05}
+        cache.set('token', data)
+
+        self.assertEqual(cache.get('token'), data)
+        self.assertIsNone(cache.get('other'))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('token'))
+
+    def test_02_expired_not_cached(self):
+        """Истекший токен не кэшируется, токен без exp живет ttl кэша"""
+        cache = TokenCache(ttl=0.05)
+        cache.set('expired', {'user_id': 1, 'exp': time.time() - 1})
+        self.assertIsNone(cache.get('expired'))
+
+        cache.set('no-exp', {'user_id': 2})
+        cache.set('long', {'user_id': 3, 'exp': time.time() + 3600})
+        self.assertIsNotNone(cache.get('no-exp'))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('no-exp'))
+        self.assertIsNone(cache.get('long'))
+
+
+class TestRevocationList(unittest.TestCase):
+    """Тесты списка заблокированных пользователей"""
+
+    def test_01_refresh(self):
+        """Список заменяется целиком, при ошибке остается прежний"""
+        responses = [[1, 2], RuntimeError('auth-service недоступен'), [2]]
+
+        def fetch():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        revocations = RevocationList(fetch, refresh_interval=0)
+        self.assertFalse(revocations.is_blocked(1))
+
+        self.assertTrue(revocations.refresh())
+        self.assertTrue(revocations.is_blocked(1))
+
+        self.assertFalse(revocations.refresh())
+        self.assertTrue(revocations.is_blocked(1))
+        self.assertEqual(revocations.errors, 1)
+
+        self.assertTrue(revocations.refresh())
+        self.assertFalse(revocations.is_blocked(1))
+        self.assertTrue(revocations.is_blocked(2))
+
+        stats = revocations.stats()
+        self.assertEqual(stats['blocked_users'], 1)
+        self.assertEqual(stats['refreshes'], 2)
+
+    def test_02_no_thread_without_interval(self):
+        """При refresh_interval=0 фоновый поток не запускается"""
+        revocations = RevocationList(lambda: [], refresh_interval=0)
+        revocations.start()
+        self.assertIsNone(revocations._thread)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
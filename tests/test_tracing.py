@@ -0,0 +1,120 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from flask import Flask, jsonify
+
+# Добавляем путь к проекту
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.db_pool import ConnectionPool
+from shared.tracing import (
+    SpanExporter, Tracer, init_app, parse_traceparent, format_traceparent, outgoing_headers
+)
+
+INCOMING = '00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01'
+
+
+class FakeCursor:
+    def execute(self, statement, params=None):
+        pass
+
+    def fetchall(self):
+        return [{'id': 1}]
+
+
+class FakeConnection:
+    in_transaction = False
+
+    def ping(self, reconnect=False):
+        pass
+
+    def cursor(self, dictionary=False):
+        return FakeCursor()
+
+    def close(self):
+        pass
+
+
+class TestTracing(unittest.TestCase):
+    """Тесты сквозной трассировки"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'spans.jsonl')
+        self.tracer = Tracer('test-service', SpanExporter(path=self.path))
+        self.pool = ConnectionPool(FakeConnection, size=1, max_overflow=0)
+
+        self.app = Flask(__name__)
+        init_app(self.app, self.tracer, self.pool)
+
+        @self.app.route('/items')
+        def items():
+            conn = self.pool.connection()
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('SELECT id\n  FROM items WHERE status = %s', ('active',))
+            cursor.execute('SELECT COUNT(*) FROM items')
+            rows = cursor.fetchall()
+            conn.close()
+            return jsonify({'items': rows, 'headers': outgoing_headers()})
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_spans(self):
+        self.tracer.exporter.flush()
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_01_traceparent_format(self):
+        """Разбор заголовка traceparent; неверные значения игнорируются"""
+        trace_id, span_id, sampled = parse_traceparent(INCOMING)
+        self.assertEqual(format_traceparent(trace_id, span_id, sampled), INCOMING)
+        self.assertIsNone(parse_traceparent('00-xyz-b7ad6b7169203331-01'))
+        self.assertIsNone(parse_traceparent('00-' + '0' * 32 + '-b7ad6b7169203331-01'))
+        self.assertIsNone(parse_traceparent(None))
+
+    def test_02_incoming_context_continued(self):
+        """Сервис продолжает трассировку gateway и отдает Server-Timing"""
+        response = self.client.get('/items', headers={'traceparent': INCOMING})
+
+        self.assertEqual(response.headers['X-Trace-Id'], '0af7651916cd43dd8448eb211c80319c')
+        timing = response.headers['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="2"', timing)
+        self.assertIn('json;dur=', timing)
+        self.assertIn('app;dur=', timing)
+
+        # Исходящий вызов из обработчика продолжает ту же трассировку
+        outgoing = parse_traceparent(response.get_json()['headers']['traceparent'])
+        self.assertEqual(outgoing[0], '0af7651916cd43dd8448eb211c80319c')
+
+        spans = self.read_spans()
+        root = spans[0]
+        self.assertEqual(root['name'], 'GET /items')
+        self.assertEqual(root['parent_id'], 'b7ad6b7169203331')
+        self.assertEqual(root['attributes']['http.status_code'], 200)
+
+        sql = [s for s in spans if s['name'] == 'sql']
+        self.assertEqual(len(sql), 2)
+        self.assertEqual(sql[0]['attributes']['db.statement'],
+                         'SELECT id FROM items WHERE status = %s')
+        self.assertTrue(all(s['parent_id'] == root['span_id'] for s in sql))
+        self.assertIn('json.dumps', [s['name'] for s in spans])
+
+    def test_03_not_sampled(self):
+        """Трассировка без флага sampled не записывается, Server-Timing остается"""
+        response = self.client.get('/items', headers={'traceparent': INCOMING[:-2] + '00'})
+
+        self.assertIn('db;dur=', response.headers['Server-Timing'])
+        self.tracer.exporter.flush()
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)